@@ -0,0 +1,106 @@
+import csv
+import glob
+import os
+import re
+from typing import Dict, List, Tuple, Optional
+from cnt.source_index import SourceIndex
+
+# "Cover" anywhere ("FullCover"), or "cover" as a word of its own – but not "Discover"
+_COVER_RE = re.compile(r"Cover|(?<![A-Za-z])(?:cover|COVER)")
+
+
+def parse_project_folder_name(folder_name: str) -> Dict[str, str]:
+    """
+    Tokenize a project folder name of the form <id>_<semester>_<last name>_<print type>,
+    e.g. "11492_S24_Monroe_Color".
+
+    Returns:
+        dict: 'folder_id', 'semester', 'last_name', 'print_type' and 'output_directory_name'
+
+    Raises:
+        ValueError: if the name doesn't follow the convention
+    """
+    folder_tokens = folder_name.split("_")
+    if len(folder_tokens) < 4 or not all(folder_tokens[:4]):
+        raise ValueError(f"'{folder_name}' does not match <id>_<semester>_<name>_<type>")
+
+    folder_id = folder_tokens[0]  # 11492
+    folder_last_name = folder_tokens[2]  # Monroe
+    return {
+        "folder_id": folder_id,
+        "semester": folder_tokens[1],  # S24
+        "last_name": folder_last_name,
+        "print_type": folder_tokens[3],  # Color
+        "output_directory_name": f"{folder_id}_{folder_last_name}",  # 11492_Monroe
+    }
+
+
+def discover_documents(project_path: str, folder_id: str,
+                       index: Optional[SourceIndex] = None) -> Tuple[List[str], List[str]]:
+    """
+    Find the layout and cover InDesign files of a project without asking:
+    every .indd in <project>/<id>_Layout is a layout file, except those with
+    "Cover" in their name, which are covers. .indd files in a top-level
+    folder with "Cover" in its name are covers too.
+
+    Args:
+        project_path (str): Project folder
+        folder_id (str): Folder ID, e.g. 11492
+        index (SourceIndex): Index of the project folder; when given, nothing is listed again
+
+    Returns:
+        tuple: (layout_paths, cover_paths), each sorted
+    """
+    layout_dir = os.path.join(project_path, f"{folder_id}_Layout")
+    layout_paths, cover_paths = [], []
+
+    if index is not None and index.covers(project_path):
+        def indd_files(folder):
+            return index.files(folder, suffix=".indd")
+        folders = sorted(entry.path for entry in index.listdir(project_path) if entry.is_dir)
+    else:
+        def indd_files(folder):
+            return sorted(glob.glob(os.path.join(glob.escape(folder), "*.indd")))
+        folders = [folder for folder in sorted(glob.glob(os.path.join(glob.escape(project_path), "*")))
+                   if os.path.isdir(folder)]
+
+    for path in indd_files(layout_dir):
+        if _COVER_RE.search(os.path.basename(path)):
+            cover_paths.append(path)
+        else:
+            layout_paths.append(path)
+
+    for folder in folders:
+        if _COVER_RE.search(os.path.basename(folder)):
+            cover_paths.extend(indd_files(folder))
+
+    return layout_paths, cover_paths
+
+
+def load_project_list(list_path: str) -> List[str]:
+    """
+    Read project folders from a CSV (first column, or a 'project_folder'
+    column if there is a header) or a plain text file with one folder per
+    line. Blank lines and lines starting with '#' are ignored; relative
+    paths are taken relative to the list file.
+
+    Returns:
+        list: Absolute project folder paths, in file order
+    """
+    base_dir = os.path.dirname(os.path.abspath(list_path))
+    with open(list_path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = [row for row in csv.reader(f) if row and row[0].strip() and not row[0].lstrip().startswith("#")]
+
+    column = 0
+    if rows:
+        header = [cell.strip().lower() for cell in rows[0]]
+        if "project_folder" in header:
+            column = header.index("project_folder")
+            rows = rows[1:]
+
+    folders = []
+    for row in rows:
+        if column < len(row) and row[column].strip():
+            folder = os.path.expanduser(row[column].strip())
+            folders.append(os.path.normpath(os.path.join(base_dir, folder)))
+    return folders
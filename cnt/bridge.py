@@ -0,0 +1,291 @@
+import abc
+import json
+import os
+import platform
+import re
+import select
+import shutil
+import subprocess
+import threading
+import time
+from typing import Optional, Dict, List, Any, Callable, Union
+
+
+# JXA program run by the long-lived osascript process. It reads one JSON
+# request per line from stdin ({"id": n, "script": "<AppleScript source>"}),
+# compiles each distinct script once with NSAppleScript, executes it and
+# writes one JSON response per line to stdout. EOF on stdin ends the process.
+JXA_BRIDGE_SERVER = r'''
+ObjC.import("Foundation");
+
+var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+var compiled = {};
+var buffer = "";
+
+function reply(obj) {
+    var line = $(JSON.stringify(obj) + "\n");
+    stdout.writeData(line.dataUsingEncoding($.NSUTF8StringEncoding));
+}
+
+function runScript(source) {
+    var script = compiled[source];
+    var err = Ref();
+    if (script === undefined) {
+        script = $.NSAppleScript.alloc.initWithSource($(source));
+        if (!script.compileAndReturnError(err)) {
+            return {success: false, output: "", error: describe(err[0]), error_number: number(err[0])};
+        }
+        compiled[source] = script;
+    }
+    var result = script.executeAndReturnError(err);
+    if (result.isNil()) {
+        return {success: false, output: "", error: describe(err[0]), error_number: number(err[0])};
+    }
+    var text = result.stringValue;
+    return {success: true, output: text.isNil() ? "" : text.js, error: "", error_number: 0};
+}
+
+function describe(info) {
+    var d = ObjC.deepUnwrap(info) || {};
+    return d.NSAppleScriptErrorMessage || d.NSAppleScriptErrorBriefMessage || "(no message)";
+}
+
+function number(info) {
+    var d = ObjC.deepUnwrap(info) || {};
+    return d.NSAppleScriptErrorNumber || -1;
+}
+
+while (true) {
+    var data = stdin.availableData;
+    if (data.length === 0) break;
+    buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+    var nl;
+    while ((nl = buffer.indexOf("\n")) >= 0) {
+        var line = buffer.slice(0, nl);
+        buffer = buffer.slice(nl + 1);
+        if (!line) continue;
+        var request = JSON.parse(line);
+        var response;
+        try {
+            response = runScript(request.script);
+        } catch (e) {
+            response = {success: false, output: "", error: String(e), error_number: -1};
+        }
+        response.id = request.id;
+        reply(response);
+    }
+}
+'''
+
+
+class ScriptingBackend(abc.ABC):
+    """
+    Runs AppleScript source and returns a structured result dict:
+
+        success       True if the script ran without error
+        output        the script's result as text ("" if none)
+        error         error message on failure ("" otherwise)
+        error_number  AppleScript error number on failure (0 otherwise)
+        seconds       wall time of the command
+    """
+
+    def __init__(self):
+        self.commands_run = 0
+        self.command_seconds = 0.0
+
+    @abc.abstractmethod
+    def run(self, script: str) -> Dict[str, Any]:
+        """
+        Run *script* and return the result dict described above.
+        """
+
+    def close(self):
+        """
+        Release any resources held by the backend.
+        """
+        pass
+
+    def _record(self, result: Dict[str, Any], started: float) -> Dict[str, Any]:
+        result["seconds"] = time.perf_counter() - started
+        self.commands_run += 1
+        self.command_seconds += result["seconds"]
+        return result
+
+
+class OsascriptBackend(ScriptingBackend):
+    def __init__(self, osascript_path="/usr/bin/osascript", timeout: float = 1500.0):
+        """
+        Scripting backend that keeps one osascript interpreter alive for the
+        whole run and sends it commands over a pipe, so the process spawn and
+        the compile of repeated scripts are paid once instead of per command.
+
+        Args:
+            osascript_path (str): Path to the osascript binary
+            timeout (float): Longest wait for a reply before the interpreter is
+                killed (and respawned by the next command); above the 1200s
+                AppleScript timeout the package script uses
+        """
+        super().__init__()
+        self.osascript_path = osascript_path
+        self.timeout = timeout
+        self.process: Optional[subprocess.Popen] = None
+        self.spawn_count = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _ensure_process(self):
+        if self.process is not None and self.process.poll() is None:
+            return
+        self.process = subprocess.Popen(
+            [self.osascript_path, "-l", "JavaScript", "-e", JXA_BRIDGE_SERVER],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1
+        )
+        self.spawn_count += 1
+
+    def run(self, script: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with self._lock:
+            try:
+                self._ensure_process()
+                self._next_id += 1
+                request = json.dumps({"id": self._next_id, "script": script})
+                self.process.stdin.write(request + "\n")
+                self.process.stdin.flush()
+                # The server writes each reply as one line, so once any of it
+                # is readable readline() won't block for long
+                readable, _, _ = select.select([self.process.stdout], [], [], self.timeout)
+                if not readable:
+                    self._kill()
+                    return self._record({"success": False, "output": "",
+                                         "error": f"osascript bridge gave no reply within {self.timeout:g}s",
+                                         "error_number": -1}, started)
+                line = self.process.stdout.readline()
+            except (OSError, ValueError) as exc:
+                self._kill()
+                return self._record({"success": False, "output": "", "error": str(exc), "error_number": -1}, started)
+
+            if not line:
+                # The interpreter died mid-command; the next call respawns it.
+                self._kill()
+                return self._record({"success": False, "output": "", "error": "osascript bridge exited unexpectedly",
+                                     "error_number": -1}, started)
+
+        result = json.loads(line)
+        result.pop("id", None)
+        return self._record(result, started)
+
+    def _kill(self):
+        if self.process is not None:
+            try:
+                self.process.kill()
+                self.process.wait(timeout=5)
+            except Exception:
+                pass
+        self.process = None
+
+    def close(self):
+        """
+        Close the pipe so the interpreter exits, and reap it.
+        """
+        with self._lock:
+            if self.process is None:
+                return
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except Exception:
+                self._kill()
+            self.process = None
+
+
+class FakeBackend(ScriptingBackend):
+    # Answers to the readiness probes AppleScript polls through its Waiter, so
+    # dry runs don't sit out every timeout: InDesign is frontmost with no
+    # dialog open, documents have no missing fonts, Extensis Connect has a
+    # window, and InDesign has quit when asked whether it is running.
+    # Checked in this order, after the caller's own responses.
+    READY_RESPONSES: Dict[str, Dict[str, Any]] = {
+        "frontmost of process": {"output": "true"},
+        'subrole is "AXDialog"': {"output": "0"},
+        "fonts of document 1": {"output": "0"},
+        'windows of process "Extensis Connect"': {"output": "true"},
+        "is running": {"output": "false"},
+    }
+
+    # Marks the package script; answered by _package() unless the caller's responses do
+    PACKAGE_SCRIPT = "tell myDoc to package"
+    # Source folders InDesign copies into a package next to the document
+    PACKAGE_FOLDERS = ("Links", "Document fonts")
+
+    def __init__(self, responses: Optional[Dict[str, Union[Dict[str, Any], Callable[[str], Dict[str, Any]]]]] = None):
+        """
+        In-process scripting backend for Linux and dry runs. Every script is
+        recorded in `self.calls`; the first entry of *responses* (then the
+        package script, then READY_RESPONSES) whose key appears in the script
+        decides the result, otherwise it succeeds with empty output.
+
+        The package script is answered like InDesign would: the last document
+        opened is copied with its Links and Document fonts folders and an
+        Instructions.txt report into <layout_dir>/<name>_Packaged, and the
+        JSON report points at that folder.
+
+        Args:
+            responses (dict): Substring → result dict, or callable(script) → result dict
+        """
+        super().__init__()
+        self.responses = responses or {}
+        self.calls: List[str] = []
+        self.open_document: Optional[str] = None
+
+    def run(self, script: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        self.calls.append(script)
+        opened = re.search(r'^\s*open "(.*)"\s*$', script, re.MULTILINE)
+        if opened:
+            self.open_document = opened.group(1)
+
+        responses = (list(self.responses.items()) + [(self.PACKAGE_SCRIPT, self._package)]
+                     + list(self.READY_RESPONSES.items()))
+        for needle, response in responses:
+            if needle in script:
+                result = response(script) if callable(response) else dict(response)
+                break
+        else:
+            result = {"success": True, "output": ""}
+
+        result.setdefault("success", True)
+        result.setdefault("output", "")
+        result.setdefault("error", "")
+        result.setdefault("error_number", 0)
+        return self._record(result, started)
+
+    def _package(self, script: str) -> Dict[str, Any]:
+        if self.open_document is None:
+            return {"success": False, "error": "No document is open in InDesign.", "error_number": -2700}
+        layout_dir = re.search(r'^set destRootPOSIX to "(.*)"$', script, re.MULTILINE).group(1).replace(r'\"', '"')
+        document = os.path.basename(self.open_document)
+        package_path = os.path.join(layout_dir, os.path.splitext(document)[0] + "_Packaged")
+        os.makedirs(package_path, exist_ok=True)
+        shutil.copy2(self.open_document, package_path)
+        for folder in self.PACKAGE_FOLDERS:
+            source = os.path.join(os.path.dirname(self.open_document), folder)
+            if os.path.isdir(source):
+                shutil.copytree(source, os.path.join(package_path, folder), dirs_exist_ok=True)
+        with open(os.path.join(package_path, "Instructions.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Packaged {document} (fake InDesign)\n")
+        return {"output": json.dumps({"package_path": package_path, "document": document})}
+
+
+def default_backend() -> ScriptingBackend:
+    """
+    The osascript bridge on macOS, the in-process fake everywhere else.
+    """
+    if platform.system() == "Darwin":
+        return OsascriptBackend()
+    return FakeBackend()
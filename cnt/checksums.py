@@ -0,0 +1,262 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional, Dict, List, Tuple, Any, Callable, Iterable, Iterator
+
+CHECKSUMS_NAME = ".cnt_checksums"
+
+# File extension of the checksum file for each supported algorithm; the file
+# uses the coreutils "<digest>  <path>" format, so `b2sum -c` / `shasum -a 256 -c`
+# run from the archive root can check it too
+ALGORITHM_EXTENSIONS = {"blake2b": "b2", "sha256": "sha256"}
+
+# Bookkeeping files the run rewrites, and Finder metadata, aren't checksummed
+_EXCLUDED_NAMES = {".DS_Store"}
+_EXCLUDED_PREFIX = ".cnt_"
+
+
+def _is_excluded(name: str) -> bool:
+    return name in _EXCLUDED_NAMES or name.startswith(_EXCLUDED_PREFIX)
+
+
+class ChecksumEngine:
+    def __init__(self, max_workers: int = 8, algorithm: str = "blake2b", block_size: int = 4 * 1024 * 1024):
+        """
+        Hashes files on a bounded thread pool with large-block reads into a
+        per-thread buffer; hashlib releases the GIL while it digests, so
+        several files are read and hashed at once. At most a few jobs per
+        worker are queued at a time, so memory stays at roughly
+        max_workers × block_size however large the archive is.
+
+        Args:
+            max_workers (int): Number of files hashed concurrently
+            algorithm (str): "blake2b" (fast, default) or "sha256"
+            block_size (int): Read size per call
+        """
+        if algorithm not in ALGORITHM_EXTENSIONS:
+            raise ValueError(f"Unsupported checksum algorithm: {algorithm}")
+        self.max_workers = max_workers
+        self.algorithm = algorithm
+        self.block_size = block_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.files_hashed = 0
+        self.bytes_hashed = 0
+
+    def hash_file(self, path: str) -> str:
+        """
+        Hex digest of *path*'s content.
+        """
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = bytearray(self.block_size)
+        view = memoryview(buffer)
+        digest = hashlib.new(self.algorithm)
+        size = 0
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                digest.update(view[:read])
+                size += read
+        with self._lock:
+            self.files_hashed += 1
+            self.bytes_hashed += size
+        return digest.hexdigest()
+
+    def map(self, func: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[Any]:
+        """
+        Apply *func* to every item on the pool and yield the results in
+        completion order, consuming *items* lazily.
+        """
+        limit = self.max_workers * 4
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hash") as pool:
+            pending = set()
+            for item in items:
+                pending.add(pool.submit(func, item))
+                if len(pending) >= limit:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+
+class ChecksumManifest:
+    def __init__(self, archive_root: str, algorithm: str = "blake2b"):
+        """
+        Content checksums of every file in an archive, stored inside it as
+        .cnt_checksums.<ext>, one "<digest>  <relative path>" line per file.
+        write() hashes the archive (and the sources the files were copied
+        from, to catch truncated or corrupted copies); verify() re-checks an
+        existing archive against the stored checksums.
+
+        Args:
+            archive_root (str): The project's archive directory
+            algorithm (str): Checksum algorithm used by write()
+        """
+        self.archive_root = archive_root
+        self.algorithm = algorithm
+        self.path = os.path.join(archive_root, f"{CHECKSUMS_NAME}.{ALGORITHM_EXTENSIONS[algorithm]}")
+
+    @classmethod
+    def find(cls, archive_root: str) -> Optional["ChecksumManifest"]:
+        """
+        The checksum manifest stored in *archive_root*, whatever its algorithm, or None.
+        """
+        for algorithm, extension in ALGORITHM_EXTENSIONS.items():
+            if os.path.exists(os.path.join(archive_root, f"{CHECKSUMS_NAME}.{extension}")):
+                return cls(archive_root, algorithm)
+        return None
+
+    def relpath(self, path: str) -> str:
+        return os.path.relpath(path, self.archive_root).replace(os.sep, "/")
+
+    def _archive_files(self) -> Iterator[str]:
+        for dirpath, dirnames, filenames in os.walk(self.archive_root):
+            dirnames[:] = sorted(name for name in dirnames if not _is_excluded(name))
+            for name in sorted(filenames):
+                if not _is_excluded(name):
+                    yield os.path.join(dirpath, name)
+
+    def write(self, sources: Optional[Dict[str, str]] = None,
+              engine: Optional[ChecksumEngine] = None) -> Dict[str, Any]:
+        """
+        Hash every archived file and write the checksum manifest. Files under
+        an archive folder listed in *sources* are compared with the file at
+        the same relative path under the matching source folder.
+
+        Args:
+            sources (dict): Archive folder → source folder it was copied from,
+                e.g. {archive/11492_Logs: project/11492_Logs}
+            engine (ChecksumEngine): Engine to hash with; a default one is used if omitted
+
+        Returns:
+            dict: 'success', 'files', 'bytes', 'seconds', 'mismatched' (archive paths
+                  whose content differs from the source) and 'errors' ((path, message) pairs)
+        """
+        engine = engine or ChecksumEngine(algorithm=self.algorithm)
+        roots = [(os.path.normpath(archive_dir) + os.sep, source_dir)
+                 for archive_dir, source_dir in (sources or {}).items()]
+
+        def source_of(archived: str) -> Optional[str]:
+            for archive_prefix, source_dir in roots:
+                if archived.startswith(archive_prefix):
+                    return os.path.join(source_dir, archived[len(archive_prefix):])
+            return None
+
+        def check(archived: str) -> Tuple[str, Optional[str], bool, Optional[str]]:
+            try:
+                digest = engine.hash_file(archived)
+            except OSError as e:
+                return archived, None, False, str(e)
+            source = source_of(archived)
+            try:
+                # A source deleted since the copy (flagged in the manifest) has nothing to compare
+                mismatch = source is not None and os.path.isfile(source) and engine.hash_file(source) != digest
+            except OSError as e:
+                return archived, digest, False, f"source {source}: {e}"
+            return archived, digest, mismatch, None
+
+        mismatched: List[str] = []
+        errors: List[Tuple[str, str]] = []
+        files = 0
+        started = time.perf_counter()
+        bytes_before = engine.bytes_hashed
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for archived, digest, mismatch, error in engine.map(check, self._archive_files()):
+                if error:
+                    errors.append((archived, error))
+                    print(f"⚠️  Could not hash {archived}: {error}")
+                if mismatch:
+                    mismatched.append(archived)
+                    print(f"🚫 CONTENT MISMATCH: {archived} differs from its source")
+                if digest:
+                    f.write(f"{digest}  {self.relpath(archived)}\n")
+                    files += 1
+        os.replace(tmp_path, self.path)
+        # A manifest left by an earlier run with another algorithm would shadow this one in find()
+        for extension in ALGORITHM_EXTENSIONS.values():
+            stale = os.path.join(self.archive_root, f"{CHECKSUMS_NAME}.{extension}")
+            if stale != self.path and os.path.exists(stale):
+                os.remove(stale)
+        seconds = time.perf_counter() - started
+        hashed = engine.bytes_hashed - bytes_before
+
+        print(f"Checksummed {files} archived files ({hashed / 1048576:.1f} MB read, sources included) "
+              f"in {seconds:.1f}s – {hashed / 1048576 / max(seconds, 1e-6):.1f} MB/s, {self.algorithm}")
+        return {
+            "success": not mismatched and not errors,
+            "files": files,
+            "bytes": hashed,
+            "seconds": seconds,
+            "mismatched": mismatched,
+            "errors": errors,
+        }
+
+    def verify(self, engine: Optional[ChecksumEngine] = None) -> Dict[str, Any]:
+        """
+        Re-hash the archive and compare it with the stored checksums.
+
+        Returns:
+            dict: 'success', 'checked', 'seconds', 'mismatched', 'missing' and
+                  'unlisted' (archived files with no checksum) paths, and 'errors'
+        """
+        engine = engine or ChecksumEngine(algorithm=self.algorithm)
+
+        def listed() -> Iterator[Tuple[str, str]]:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    digest, sep, rel = line.rstrip("\n").partition("  ")
+                    if sep:
+                        yield digest, rel
+
+        def check(item: Tuple[str, str]) -> Tuple[str, str, Optional[str]]:
+            digest, rel = item
+            path = os.path.join(self.archive_root, *rel.split("/"))
+            try:
+                return rel, "ok" if engine.hash_file(path) == digest else "mismatched", None
+            except FileNotFoundError:
+                return rel, "missing", None
+            except OSError as e:
+                return rel, "error", str(e)
+
+        # Only the relative paths are kept in memory, to find unlisted files afterwards
+        seen = set()
+        mismatched: List[str] = []
+        missing: List[str] = []
+        errors: List[Tuple[str, str]] = []
+        started = time.perf_counter()
+        for rel, status, error in engine.map(check, listed()):
+            seen.add(rel)
+            if status == "mismatched":
+                mismatched.append(rel)
+                print(f"🚫 CHECKSUM MISMATCH: {rel}")
+            elif status == "missing":
+                missing.append(rel)
+                print(f"🚫 MISSING: {rel}")
+            elif status == "error":
+                errors.append((rel, error))
+                print(f"⚠️  Could not hash {rel}: {error}")
+        unlisted = [rel for rel in map(self.relpath, self._archive_files()) if rel not in seen]
+        seconds = time.perf_counter() - started
+
+        print(f"Verified {len(seen)} files against {os.path.basename(self.path)} in {seconds:.1f}s: "
+              f"{len(mismatched)} mismatched, {len(missing)} missing, {len(unlisted)} not in the manifest")
+        for rel in unlisted:
+            print(f"  + {rel}")
+        return {
+            "success": not mismatched and not missing and not errors,
+            "checked": len(seen),
+            "seconds": seconds,
+            "mismatched": mismatched,
+            "missing": missing,
+            "unlisted": unlisted,
+            "errors": errors,
+        }
@@ -1,13 +1,18 @@
 import glob, tkinter as tk
 from tkinter import filedialog, ttk
 import os
-import shutil
-import time
 import sys
 import platform
 import subprocess
 from pathlib import Path
-from typing import Optional, Dict, List, Union, Any
+from typing import Optional, Dict, List, Union, Any, Callable
+from cnt.bridge import ScriptingBackend, default_backend
+from cnt.waits import Waiter
+from cnt.copying import CopyEngine
+from cnt.manifest import ArchiveManifest
+from cnt.source_index import SourceIndex
+from cnt.scanning import TreeScanner
+from cnt.package_check import parse_package_report
 
 
 class TKFolderSelector:
@@ -61,14 +66,30 @@ class TKFolderSelector:
             print("No folder selected.")
             return None
 
+    def use_folder(self, folder_path):
+        """
+        Use *folder_path* as the project directory without showing a dialog
+        (headless and batch runs).
 
-    def copy_specific_subdirectories(self, destination_path, folder_id):
+        Returns:
+            str: The folder name
+        """
+        self.folder_path = os.path.abspath(folder_path)
+        self.folder_name = os.path.basename(self.folder_path)
+        return self.folder_name
+
+
+    def copy_specific_subdirectories(self, destination_path, folder_id, copy_engine: Optional[CopyEngine] = None,
+                                     manifest: Optional[ArchiveManifest] = None, index: Optional[SourceIndex] = None):
         """
         Copy specific subdirectories from self.folder_path to destination_path.
 
         Args:
             destination_path (str): Path where subdirectories will be copied
             folder_id (str): Folder ID to replace in subdirectory names
+            copy_engine (CopyEngine): Parallel copier to use; a default one is created if omitted
+            manifest (ArchiveManifest): Archive manifest; when given, only new or changed files are copied
+            index (SourceIndex): Index of the project folder; when given, the source isn't listed again
 
         Returns:
             dict: Tracking of copied directories
@@ -86,8 +107,10 @@ class TKFolderSelector:
 
         # Dictionary to track copy status
         copy_status = {}
+        copy_engine = copy_engine or CopyEngine()
 
-        # Iterate through target subdirectories
+        # Collect the subdirectories that exist so they share one copy pool
+        found = []
         for subdir in target_subdirs:
             # Construct full source path
             source_subdir_path = os.path.join(self.folder_path, subdir)
@@ -95,21 +118,36 @@ class TKFolderSelector:
             # Construct full destination path
             dest_subdir_path = os.path.join(destination_path, subdir)
 
-            try:
-                # Check if source subdirectory exists
-                if os.path.exists(source_subdir_path):
-                    # Copy the entire directory
-                    shutil.copytree(source_subdir_path, dest_subdir_path)
-                    copy_status[subdir] = "Copied successfully"
-                    print(f"Copied {subdir} to {dest_subdir_path}")
-                else:
-                    copy_status[subdir] = "Source directory not found"
-                    print(f"Warning: {subdir} not found in source directory")
+            # Check if source subdirectory exists
+            if index.exists(source_subdir_path) if index is not None else os.path.exists(source_subdir_path):
+                found.append((subdir, source_subdir_path, dest_subdir_path))
+            else:
+                copy_status[subdir] = "Source directory not found"
+                print(f"Warning: {subdir} not found in source directory")
+                if manifest is not None:
+                    # Archived by an earlier run, deleted from the source since
+                    CopyEngine.reconcile_deleted(manifest, [dest_subdir_path])
 
-            except Exception as e:
+        try:
+            result = copy_engine.copy_trees([(src, dst) for _subdir, src, dst in found], manifest=manifest,
+                                            index=index)
+        except Exception as e:
+            for subdir, _src, _dst in found:
                 copy_status[subdir] = f"Error during copy: {str(e)}"
                 print(f"Error copying {subdir}: {e}")
+            return copy_status
+
+        for subdir, source_subdir_path, dest_subdir_path in found:
+            failures = [msg for path, msg in result["errors"]
+                        if path == source_subdir_path or path.startswith(source_subdir_path + os.sep)]
+            if failures:
+                copy_status[subdir] = f"Error during copy: {failures[0]}"
+                print(f"Error copying {subdir}: {len(failures)} file(s) failed, first: {failures[0]}")
+            else:
+                copy_status[subdir] = "Copied successfully"
+                print(f"Copied {subdir} to {dest_subdir_path}")
 
+        print(f"Subdirectory copy: {CopyEngine.format_rate(result)}")
         return copy_status
 
     def create_project_subdirectories(self, archived_project_path, folder_id):
@@ -151,27 +189,34 @@ class TKFolderSelector:
 
         return creation_status
 
-    def check_for_missing_print_pdf_files(self, project_layout_path: str, folder_id_print: str) -> bool:
+    def check_for_missing_print_pdf_files(self, project_layout_path: str, folder_id_print: str,
+                                          index: Optional[SourceIndex] = None) -> bool:
         """
         Check whether any PDF files in `project_layout_path` start with `folder_id_print`.
 
         Args:
             project_layout_path (str): Absolute or relative path to the layout folder.
             folder_id_print (str): Filename prefix that identifies the print PDFs (e.g., "11492_Print").
+            index (SourceIndex): Index of the project folder; when given, the layout folder isn't listed again.
 
         Returns:
             bool: True if at least one matching file exists, False otherwise.
         """
         layout_path = Path(project_layout_path)
 
-        if not layout_path.is_dir():
-            raise FileNotFoundError(f"{layout_path} is not a directory or does not exist.")
+        if index is not None and index.covers(project_layout_path):
+            if not index.isdir(project_layout_path):
+                raise FileNotFoundError(f"{layout_path} is not a directory or does not exist.")
+            matches = index.files(project_layout_path, suffix=".pdf", prefix=folder_id_print)
+        else:
+            if not layout_path.is_dir():
+                raise FileNotFoundError(f"{layout_path} is not a directory or does not exist.")
 
-        # Look for PDFs that start with the required prefix
-        matches = [
-            p for p in layout_path.iterdir()
-            if p.is_file() and p.suffix.lower() == ".pdf" and p.name.startswith(folder_id_print)
-        ]
+            # Look for PDFs that start with the required prefix
+            matches = [
+                p for p in layout_path.iterdir()
+                if p.is_file() and p.suffix.lower() == ".pdf" and p.name.startswith(folder_id_print)
+            ]
 
         has_print_pdf = bool(matches)
 
@@ -180,9 +225,11 @@ class TKFolderSelector:
             \nEnsure the Printer_PDF files are spelled and capitalized in this format: {folder_id_print}
             """)
 
-        return
+        return has_print_pdf
 
-    def copy_print_files(self, project_layout_path, archive_printer_pdfs_path, folder_id_print):
+    def copy_print_files(self, project_layout_path, archive_printer_pdfs_path, folder_id_print,
+                         copy_engine: Optional[CopyEngine] = None, manifest: Optional[ArchiveManifest] = None,
+                         index: Optional[SourceIndex] = None):
         """
         Copy print files from project layout path to archive printer PDFs path.
 
@@ -190,6 +237,9 @@ class TKFolderSelector:
         project_layout_path (str): Path to the layout folder
         archive_printer_pdfs_path (str): Destination path for archived print PDFs
         folder_id_print (str): Prefix to identify print files
+        copy_engine (CopyEngine): Parallel copier to use; a default one is created if omitted
+        manifest (ArchiveManifest): Archive manifest; when given, unchanged files are skipped
+        index (SourceIndex): Index of the project folder; when given, the layout folder isn't listed again
 
         Returns:
         dict: Summary of copy operation
@@ -197,12 +247,14 @@ class TKFolderSelector:
         # Ensure the destination directory exists
         os.makedirs(archive_printer_pdfs_path, exist_ok=True)
 
-        # Initialize tracking variables
-        copied_files = []
-        skipped_files = []
+        use_index = index is not None and index.covers(project_layout_path)
 
         # Check if source directory exists
-        if not os.path.exists(project_layout_path):
+        if not (index.exists(project_layout_path) if use_index else os.path.exists(project_layout_path)):
+            if manifest is not None:
+                # Print files archived by an earlier run whose source is gone
+                CopyEngine.reconcile_deleted(manifest, [archive_printer_pdfs_path])
+                manifest.save()
             return {
                 'success': False,
                 'message': f'Source directory does not exist: {project_layout_path}',
@@ -210,24 +262,26 @@ class TKFolderSelector:
                 'skipped_files': []
             }
 
-        # Iterate through files in the layout path
-        for filename in os.listdir(project_layout_path):
-            # Check if filename starts with folder_id_print
-            if filename.startswith(folder_id_print):
-                source_file = os.path.join(project_layout_path, filename)
-                destination_file = os.path.join(archive_printer_pdfs_path, filename)
+        # Files in the layout path whose name starts with folder_id_print
+        filenames = ([entry.name for entry in index.listdir(project_layout_path)] if use_index
+                     else os.listdir(project_layout_path))
+        pairs = [
+            (os.path.join(project_layout_path, filename), os.path.join(archive_printer_pdfs_path, filename))
+            for filename in filenames
+            if filename.startswith(folder_id_print)
+        ]
 
-                try:
-                    # Copy the file (preserving metadata)
-                    shutil.copy2(source_file, destination_file)
-                    copied_files.append(filename)
-                except Exception as e:
-                    skipped_files.append((filename, str(e)))
+        # Copy the files (preserving metadata)
+        result = (copy_engine or CopyEngine()).copy_files(pairs, manifest=manifest, index=index if use_index else None,
+                                                          destination_dir=archive_printer_pdfs_path)
+        copied_files = [os.path.basename(path) for path in result["copied"]]
+        skipped_files = [(os.path.basename(path), msg) for path, msg in result["errors"]]
 
         # Prepare return dictionary
         return {
             'success': len(skipped_files) == 0,
-            'message': f'Copied {len(copied_files)} files. Skipped {len(skipped_files)} files.',
+            'message': f'Copied {len(copied_files)} files. Skipped {len(skipped_files)} files. '
+                       f'({CopyEngine.format_rate(result)})',
             'copied_files': copied_files,
             'skipped_files': skipped_files
         }
@@ -300,8 +354,20 @@ class MakeDirectory:
             return None
 
 class AppleScript:
-    def __init__(self, name="Alpha"):
+    # Extensis Connect is considered idle (done syncing fonts) below this CPU usage
+    FONT_SYNC_IDLE_CPU_PERCENT = 5.0
+
+    def __init__(self, name="Alpha", backend: Optional[ScriptingBackend] = None, waiter: Optional[Waiter] = None):
+        """
+        Args:
+            name (str): Name of the project this agent works on
+            backend (ScriptingBackend): Runs the scripts; defaults to the persistent
+                osascript bridge on macOS and the in-process fake elsewhere
+            waiter (Waiter): Polls readiness conditions and records wait times
+        """
         self.name = name
+        self.backend = backend or default_backend()
+        self.waiter = waiter or Waiter()
 
     # AppleScript to close Finder
 
@@ -315,13 +381,11 @@ class AppleScript:
             end tell
             '''
 
-        result = subprocess.run(
-        ["osascript", "-e", script],
-        capture_output=True, text=True)
+        result = self.backend.run(script)
 
-        if result.returncode != 0:
+        if not result["success"]:
             print("✗ Failed to close Finder:",
-                  result.stderr.strip() or "(no message)")
+                  result["error"].strip() or "(no message)")
             return False
         return True
 
@@ -334,39 +398,44 @@ class AppleScript:
         """
         try:
             open_command = 'tell application "Extensis Connect" to activate'
-            result = subprocess.run(['osascript', '-e', open_command],
-                                    capture_output=True,
-                                    text=True)
+            result = self.backend.run(open_command)
 
-            if result.returncode == 0:
+            if result["success"]:
                 print("Extensis Connect has been opened successfully.")
                 return True
             else:
-                print(f"Error opening Extensis Connect: {result.stderr}")
+                print(f"Error opening Extensis Connect: {result['error']}")
                 return False
         except Exception as e:
             print(f"An unexpected error occurred while opening Extensis Connect: {e}")
             return False
 
-    def refresh_extensis_connect(self):
+    def refresh_extensis_connect(self, timeout=60):
         """
-        Refreshes Extensis Connect using Command+R.
+        Refreshes Extensis Connect using Command+R and waits until font
+        syncing has settled.
+
+        Args:
+        timeout (int): Maximum number of seconds to wait for the sync. Default is 60 seconds.
 
         Returns:
         - True if successful, False otherwise
         """
         try:
-            refresh_command = 'tell application "System Events" to tell process "Extensis Connect" to keystroke "r" using command down'
-            result = subprocess.run(['osascript', '-e', refresh_command],
-                                    capture_output=True,
-                                    text=True)
+            refresh_command = '''
+            tell application "Extensis Connect" to activate
+            tell application "System Events" to tell process "Extensis Connect" to keystroke "r" using command down
+            '''
+            result = self.backend.run(refresh_command)
 
-            if result.returncode == 0:
-                time.sleep(8)
+            if result["success"]:
+                # Give Connect a moment to start syncing, then wait for it to go quiet
+                self.waiter.until("font sync idle", self.is_font_sync_idle,
+                                  timeout=timeout, initial_delay=1, stable_for=1.5)
                 print("Extensis Connect has been refreshed successfully.")
                 return True
             else:
-                print(f"Error refreshing Extensis Connect: {result.stderr}")
+                print(f"Error refreshing Extensis Connect: {result['error']}")
                 return False
         except Exception as e:
             print(f"An unexpected error occurred while refreshing Extensis Connect: {e}")
@@ -399,6 +468,9 @@ class AppleScript:
 
         Args:
         - file_path (str): Path to the InDesign file
+
+        Returns:
+        - True if the document was opened, False otherwise
         """
         try:
             applescript_cmd = f'''
@@ -410,58 +482,83 @@ class AppleScript:
             end tell
             '''
 
-            result = subprocess.run(['osascript', '-e', applescript_cmd],
-                                    capture_output=True,
-                                    text=True)
+            result = self.backend.run(applescript_cmd)
 
-            if result.returncode == 0:
+            if result["success"]:
                 print(f"Successfully opened {os.path.basename(file_path)} with InDesign.")
                 self.press_skip_on_missing_fonts_dialog()
+                return True
             else:
-                print(f"Error opening file with InDesign: {result.stderr}")
+                print(f"Error opening file with InDesign: {result['error']}")
+                return False
         except Exception as e:
             print(f"An unexpected error occurred while opening {os.path.basename(file_path)}: {e}")
+            return False
+
+    def relink_to_folder(self, links_folder: str) -> Optional[int]:
+        """
+        Point every link of the front document that has a file of the same
+        name in *links_folder* at that file, e.g. a local copy of its Links
+        folder. Returns the number of links relinked, or None on error.
+        """
+        folder = links_folder.rstrip("/").replace('"', r'\"')
+        result = self.backend.run(f'''
+        tell application id "com.adobe.InDesign"
+            if (count documents) is 0 then return 0
+            set relinked to 0
+            repeat with l in (links of document 1)
+                set localPath to "{folder}/" & (name of l)
+                try
+                    set localFile to (POSIX file localPath) as alias
+                    relink l to localFile
+                    set relinked to relinked + 1
+                end try
+            end repeat
+            return relinked
+        end tell
+        ''')
+        try:
+            return int(result["output"].strip()) if result["success"] else None
+        except ValueError:
+            return None
 
     def press_skip_on_missing_fonts_dialog(self):
         """
-        Presses the "Esc" key twice to close any dialog in Adobe InDesign.
-        No dialog detection - simply presses Escape keys after a delay.
+        Presses the "Esc" key to close the missing fonts/links dialogs in Adobe InDesign.
+        Waits for InDesign to come to the front, presses Escape, and presses it a
+        second time only if a dialog is still open (or its state can't be read).
 
         Returns:
-            - True if both button presses were executed without errors, False otherwise
+            - True if the button presses were executed without errors, False otherwise
         """
         try:
-            # Initial delay to give InDesign time to fully launch or show any dialogs
             print("Executing Escape key sequence...")
 
-            # Focus on InDesign application first
-            applescript_focus_cmd = '''
+            # Focus InDesign and wait until it is actually frontmost
+            self.backend.run('''
             tell application "Adobe InDesign 2025"
                 activate
             end tell
-            '''
-            subprocess.run(['osascript', '-e', applescript_focus_cmd], check=True)
-
-            # Short pause after focusing
-            time.sleep(1)
+            ''')
+            self.waiter.until("InDesign frontmost", self.is_indesign_frontmost, timeout=10)
 
-            # Define AppleScript to press Escape key
             applescript_escape_cmd = '''
             tell application "System Events"
                 key code 53  # Direct key code for Escape key
             end tell
             '''
 
-            # First Escape press
-            subprocess.run(['osascript', '-e', applescript_escape_cmd], check=True)
-            print("First Escape key sent")
+            for press in ("First", "Second"):
+                result = self.backend.run(applescript_escape_cmd)
+                if not result["success"]:
+                    print(f"Error executing Escape key sequence: {result['error']}")
+                    return False
+                print(f"{press} Escape key sent")
 
-            # Brief pause between key presses
-            time.sleep(0.5)
-
-            # Second Escape press
-            subprocess.run(['osascript', '-e', applescript_escape_cmd], check=True)
-            print("Second Escape key sent")
+                dialogs = self.waiter.until("InDesign dialog dismissed",
+                                            lambda: self.indesign_dialog_count() == 0, timeout=1)
+                if dialogs["success"]:
+                    break
 
             return True
 
@@ -501,12 +598,12 @@ class AppleScript:
             print(f"Error checking if Extensis Connect is running: {e}")
             return False
 
-    def open_and_refresh_extensis_connect(self, load_time=10):
+    def open_and_refresh_extensis_connect(self, load_time=30):
         """
-        Opens Extensis Connect and refreshes it after a specified loading time.
+        Opens Extensis Connect and refreshes it as soon as its window is up.
 
         Args:
-        load_time (int): Number of seconds to wait before refreshing. Default is 10 seconds.
+        load_time (int): Maximum number of seconds to wait for the window. Default is 30 seconds.
 
         Returns:
         - True if both operations were successful, False otherwise
@@ -518,8 +615,8 @@ class AppleScript:
             return False
 
         # Wait for the application to load
-        print(f"Waiting {load_time} seconds for Extensis Connect to load...")
-        time.sleep(load_time)
+        print("Waiting for Extensis Connect to load...")
+        self.waiter.until("Extensis Connect window", self.has_extensis_connect_window, timeout=load_time)
 
         # Refresh the application
         return self.refresh_extensis_connect()
@@ -534,16 +631,14 @@ class AppleScript:
         try:
             # AppleScript command to minimize the Extensis Connect window
             minimize_command = 'tell application "System Events" to tell process "Extensis Connect" to set visible to false'
-            result = subprocess.run(['osascript', '-e', minimize_command],
-                                    capture_output=True,
-                                    text=True)
+            result = self.backend.run(minimize_command)
 
             # Check if the minimize command was successful
-            if result.returncode == 0:
+            if result["success"]:
                 print("Extensis Connect has been minimized.")
                 return True
             else:
-                print(f"Error minimizing Extensis Connect: {result.stderr}")
+                print(f"Error minimizing Extensis Connect: {result['error']}")
                 return False
 
         except Exception as e:
@@ -554,10 +649,21 @@ class AppleScript:
     from typing import Optional, Dict
 
 
+    @staticmethod
+    def archive_layout_dir(folder_id: str, project_name: Optional[str] = None) -> str:
+        """
+        The <folder_id>_Layout folder packages go into by default:
+        ~/Documents/Archived_Projects/<project_name>/<folder_id>_Layout.
+        """
+        root = Path.home() / "Documents" / "Archived_Projects"
+        return str(root / (project_name or "Unnamed") / f"{folder_id}_Layout")
+
     def package_indesign_file(
             self,
             folder_id: str,
-            project_name: Optional[str] = None
+            project_name: Optional[str] = None,
+            refresh_fonts: bool = True,
+            layout_dir: Optional[str] = None
     ) -> Dict[str, str | bool]:
         """
         Package the *currently-open* InDesign document into
@@ -567,42 +673,47 @@ class AppleScript:
         ----
         folder_id     unique numeric / text ID stamped on the Layout folder
         project_name  optional project folder; defaults to "Unnamed"
+        refresh_fonts refresh Extensis Connect before packaging; pass False
+                      when fonts are already tracked as active for the run
+        layout_dir    package into this folder instead (e.g. local scratch
+                      that PackageStager moves to the archive afterwards)
 
         Returns
         -------
-        dict with 'success', 'message' and (on success) 'package_path'
+        dict with 'success', 'message' and (on success) 'package_path' and
+        'report' (PackageReport with font/link counts and phase durations,
+        or None if the script returned a bare path)
         """
         try:
             # ------------------------------------------------------------------ #
             # 1. Build the destination folder on the Mac file‑system
             # ------------------------------------------------------------------ #
-            root = Path.home() / "Documents" / "Archived_Projects"
-            project_dir = root / (project_name or "Unnamed")
-            layout_dir = project_dir / f"{folder_id}_Layout"
+            if layout_dir is None:
+                layout_dir = self.archive_layout_dir(folder_id, project_name)
+            layout_dir = Path(layout_dir)
             layout_dir.mkdir(parents=True, exist_ok=True)
 
             # ------------------------------------------------------------------ #
-            # 2. Build the AppleScript
+            # 2. Ensure Extensis Connect has all fonts active *before* packaging
+            #    (waits for the font sync to settle instead of a fixed delay)
+            # ------------------------------------------------------------------ #
+            if refresh_fonts:
+                self.refresh_extensis_connect()
+
+            # ------------------------------------------------------------------ #
+            # 3. Build the AppleScript
             # ------------------------------------------------------------------ #
             # Escape any quotes in the POSIX path before embedding
             dest_root_posix = str(layout_dir).replace('"', r'\"')
 
             applescript = f'''
 use AppleScript version "2.7"
+use framework "Foundation"
 use scripting additions
 
 set destRootPOSIX to "{dest_root_posix}"
 set destRootAlias to POSIX file destRootPOSIX as alias
 
--------------------------------------------------------------------------------
---  Ensure Extensis Connect has all fonts active **before** packaging
--------------------------------------------------------------------------------
-tell application "Extensis Connect" to activate
-tell application "System Events" to tell process "Extensis Connect" ¬
-    to keystroke "r" using command down
-delay 10 -- wait while Connect re-syncs and enables fonts
--------------------------------------------------------------------------------
-
 -- ⏱  DISABLE THE TIMEOUT FOR THE WHOLE INDESIGN SESSION
 with timeout of 1200 seconds
     tell application id "com.adobe.InDesign"
@@ -615,9 +726,33 @@ with timeout of 1200 seconds
 
         try
             set myDoc to document 1
-            set nm to name of myDoc
+            set docName to name of myDoc
+            set nm to docName
             if nm ends with ".indd" then set nm to text 1 thru -6 of nm
 
+            -- record font and link state for the result, so Python needs no extra calls
+            set inspectStart to current application's NSDate's timeIntervalSinceReferenceDate()
+            set missingFonts to {{}}
+            set allFonts to fonts of myDoc
+            repeat with f in allFonts
+                if status of f is not installed then set end of missingFonts to (name of f as text)
+            end repeat
+            set missingLinks to {{}}
+            set modifiedLinks to {{}}
+            set embeddedCount to 0
+            set allLinks to links of myDoc
+            repeat with l in allLinks
+                set linkStatus to status of l
+                if linkStatus is link missing or linkStatus is link inaccessible then
+                    set end of missingLinks to (name of l as text)
+                else if linkStatus is link out of date then
+                    set end of modifiedLinks to (name of l as text)
+                else if linkStatus is link embedded then
+                    set embeddedCount to embeddedCount + 1
+                end if
+            end repeat
+            set packageStart to current application's NSDate's timeIntervalSinceReferenceDate()
+
             -- create a *_Packaged folder for this document
             set pkgPathPOSIX to destRootPOSIX & "/" & nm & "_Packaged"
             do shell script "mkdir -p " & quoted form of pkgPathPOSIX
@@ -635,40 +770,49 @@ with timeout of 1200 seconds
                 include idml no ¬
                 include pdf no ¬
                 creating report yes
+            set packageEnd to current application's NSDate's timeIntervalSinceReferenceDate()
 
             set user interaction level of script preferences to originalLevel
-            return pkgPathPOSIX
         on error errMsg number errNum
             set user interaction level of script preferences to originalLevel
             error errMsg number errNum
         end try
     end tell
 end timeout
+
+-- one JSON payload with everything Python needs (keys barred so they stay literal)
+set payload to {{|package_path|:pkgPathPOSIX, |document|:docName, |font_count|:(count allFonts), |missing_fonts|:missingFonts, ¬
+    |link_count|:(count allLinks), |missing_links|:missingLinks, |modified_links|:modifiedLinks, ¬
+    |embedded_links|:embeddedCount, |inspect_seconds|:(packageStart - inspectStart), |package_seconds|:(packageEnd - packageStart)}}
+set jsonData to current application's NSJSONSerialization's dataWithJSONObject:payload options:0 |error|:(missing value)
+return (current application's NSString's alloc()'s initWithData:jsonData encoding:(current application's NSUTF8StringEncoding)) as text
 '''
 
 
             # ------------------------------------------------------------------ #
-            # 3. Run the AppleScript (feed via stdin instead of multiple -e flags)
+            # 4. Run the AppleScript through the scripting backend
             # ------------------------------------------------------------------ #
-            result = subprocess.run(
-                ["/usr/bin/osascript", "-"],  # "-" = read script from stdin
-                input=applescript,
-                text=True,
-                capture_output=True,
-                check=False
-            )
-
-            if result.returncode == 0:
-                pkg_path = result.stdout.strip()
+            result = self.backend.run(applescript)
+
+            if result["success"]:
+                # The script returns a JSON report; a bare path is still accepted
+                report = parse_package_report(result["output"])
+                pkg_path = report.package_path if report else result["output"].strip()
+                if not pkg_path:
+                    return {
+                        "success": False,
+                        "error": "The package script returned no package path"
+                    }
                 return {
                     "success": True,
                     "message": f"Package created at {pkg_path}",
-                    "package_path": pkg_path
+                    "package_path": pkg_path,
+                    "report": report
                 }
             else:
                 return {
                     "success": False,
-                    "error": result.stderr.strip()
+                    "error": result["error"].strip()
                 }
 
         except Exception as exc:
@@ -677,11 +821,13 @@ end timeout
                 "error": str(exc)
             }
 
-    def count_indesign_files(self):
+    def count_indesign_files(self, index: Optional[SourceIndex] = None):
         """
         Pops up a folder‑chooser, counts *.indd files inside, and
         returns (paths, integer_count).  If the user cancels, both
         values are empty/zero so callers can bail out gracefully.
+        A folder inside the indexed project is looked up in *index*
+        instead of being listed again.
         """
         root = tk.Tk()
         root.withdraw()
@@ -691,7 +837,10 @@ end timeout
         if not folder:  # user hit Cancel
             return [], 0
 
-        paths = glob.glob(os.path.join(folder, "*.indd"))
+        if index is not None and index.isdir(folder):
+            paths = index.files(folder, suffix=".indd")
+        else:
+            paths = glob.glob(os.path.join(folder, "*.indd"))
         return paths, len(paths)
 
     def count_cover_indesign_files(self):
@@ -727,33 +876,164 @@ end timeout
             quit saving no
         end tell
         '''
-        subprocess.run(["osascript", "-e", script],
-                       capture_output=True, text=True)
+        self.backend.run(script)
+
+    def close_indesign_document(self) -> bool:
+        """
+        Closes the front document (no save) but leaves InDesign running,
+        so the next document can be opened without a cold launch.
+
+        Returns:
+        - True if the document was closed (or none was open), False otherwise
+        """
+        script = '''
+        tell application "Adobe InDesign 2025"
+            if (count documents) > 0 then
+                close document 1 saving no
+            end if
+        end tell
+        '''
+        result = self.backend.run(script)
+
+        if not result["success"]:
+            print("✗ Failed to close InDesign document:",
+                  result["error"].strip() or "(no message)")
+            return False
+        return True
+
+    def _process_stat(self, process_name: str, field: str) -> Optional[float]:
+        """
+        Sum a `ps` column (e.g. "rss" or "%cpu") over every process whose
+        command contains *process_name*. Returns None if none is running.
+        """
+        result = subprocess.run(["ps", "-axo", f"{field}=,comm="],
+                                capture_output=True, text=True)
+        total = None
+        for line in result.stdout.splitlines():
+            value, _, command = line.strip().partition(" ")
+            if process_name in command:
+                try:
+                    total = (total or 0.0) + float(value.replace(",", "."))
+                except ValueError:
+                    continue
+        return total
+
+    def indesign_memory_mb(self) -> Optional[float]:
+        """
+        Returns the resident memory of the running InDesign process in MB,
+        or None if InDesign is not running or the lookup failed.
+        """
+        try:
+            rss_kb = self._process_stat("Adobe InDesign", "rss")
+            return rss_kb / 1024 if rss_kb else None
+        except Exception as e:
+            print(f"Error reading InDesign memory usage: {e}")
+            return None
+
+    # ──────────────────────────────────────────────────────────────
+    # Readiness conditions polled by self.waiter
+    # ──────────────────────────────────────────────────────────────
+    def is_app_running(self, app_name: str) -> bool:
+        """
+        Returns True if the application is running (without launching it).
+        """
+        result = self.backend.run(f'return application "{app_name}" is running')
+        return result["success"] and result["output"].strip() == "true"
+
+    def is_indesign_running(self) -> bool:
+        return self.is_app_running("Adobe InDesign 2025")
+
+    def is_indesign_frontmost(self) -> bool:
+        result = self.backend.run('''
+        tell application "System Events" to return frontmost of process "Adobe InDesign 2025"
+        ''')
+        return result["success"] and result["output"].strip() == "true"
+
+    def indesign_dialog_count(self) -> Optional[int]:
+        """
+        Number of modal dialogs InDesign is showing, or None if it can't be read.
+        """
+        result = self.backend.run('''
+        tell application "System Events" to tell process "Adobe InDesign 2025"
+            return count (windows whose subrole is "AXDialog" or subrole is "AXSystemDialog")
+        end tell
+        ''')
+        try:
+            return int(result["output"].strip()) if result["success"] else None
+        except ValueError:
+            return None
+
+    def indesign_missing_font_count(self) -> Optional[int]:
+        """
+        Number of fonts in the front document that are not installed
+        (missing, substituted or fauxed), or None if it can't be read.
+        """
+        result = self.backend.run('''
+        tell application id "com.adobe.InDesign"
+            if (count documents) is 0 then return 0
+            set missingCount to 0
+            repeat with f in (fonts of document 1)
+                if status of f is not installed then set missingCount to missingCount + 1
+            end repeat
+            return missingCount
+        end tell
+        ''')
+        try:
+            return int(result["output"].strip()) if result["success"] else None
+        except ValueError:
+            return None
+
+    def has_extensis_connect_window(self) -> bool:
+        result = self.backend.run('''
+        if application "Extensis Connect" is running then
+            tell application "System Events" to return (count windows of process "Extensis Connect") > 0
+        end if
+        return false
+        ''')
+        return result["success"] and result["output"].strip() == "true"
+
+    def is_font_sync_idle(self) -> bool:
+        """
+        Extensis Connect is treated as done syncing once its CPU usage drops
+        below FONT_SYNC_IDLE_CPU_PERCENT (or it is not running at all).
+        """
+        cpu = self._process_stat("Extensis Connect", "%cpu")
+        return cpu is None or cpu < self.FONT_SYNC_IDLE_CPU_PERCENT
 
 
 class FileCheck:
     def __init__(self, name="Alpha"):
         self.name = name
 
-    def verify_nonzero_file_sizes(self, root_dir: str) -> Dict[str, Any]:
+    def verify_nonzero_file_sizes(self, root_dir: str, on_empty: Optional[Callable[[str], None]] = None,
+                                  max_workers: int = 8) -> Dict[str, Any]:
         """
         Recursively check every file inside *root_dir* and all its subdirectories
         to ensure each file's size is larger than 0 bytes.
 
+        The tree is scanned once by a TreeScanner (os.scandir, one stat per file,
+        subtrees on a thread pool); empty files are reported as they are found.
+
         Parameters
         ----------
         root_dir : str
             Path to the root directory to search
+        on_empty : callable, optional
+            Called with the path of each empty file as soon as it is found;
+            by default the path is printed
+        max_workers : int
+            Number of directories scanned concurrently
 
         Returns
         -------
         dict with:
-            success        : True if every file passed
-            empty_files    : list of file paths whose size == 0
-            checked_count  : total number of regular files examined
+            success             : True if every file passed
+            empty_files         : list of file paths whose size == 0
+            checked_count       : total number of regular files examined
+            directories_checked : number of directories scanned
+            unreadable_count    : number of entries that could not be read
         """
         empty_files: List[str] = []
-        checked: int = 0
 
         # First, verify the root_dir exists and is actually a directory
         if not os.path.exists(root_dir):
@@ -774,46 +1054,34 @@ class FileCheck:
                 "error": f"Not a directory: {root_dir}"
             }
 
+        if on_empty is None:
+            def on_empty(path):
+                # Print the full absolute path of the empty file for easier identification
+                print(f"🚫 EMPTY FILE DETECTED: {os.path.abspath(path)} (0 KB)")
+
         # Proceed with recursive file checking (including all subdirectories)
         print(f"Starting recursive file size check on directory: {root_dir}")
 
-        for dirpath, _dirs, filenames in os.walk(root_dir):
-            # This will go through the root directory and all subdirectories
-            current_dir = os.path.relpath(dirpath, root_dir)
-            if current_dir == ".":
-                current_dir = "root directory"
+        scanner = TreeScanner(root_dir, max_workers=max_workers)
+        for finding in scanner.scan():
+            if finding.kind == "empty":
+                empty_files.append(finding.path)
+                on_empty(finding.path)
             else:
-                print(f"Checking subdirectory: {current_dir}")
-
-            for fname in filenames:
-                fpath = os.path.join(dirpath, fname)
-                try:
-                    # Check if it's a file (not a symlink or other special file)
-                    if os.path.isfile(fpath):
-                        file_size = os.path.getsize(fpath)
-                        if file_size == 0:
-                            empty_files.append(fpath)
-                            # Print the full absolute path of the empty file for easier identification
-                            print(f"🚫 EMPTY FILE DETECTED: {os.path.abspath(fpath)} (0 KB)")
-                        checked += 1
-                except OSError as exc:
-                    # Something went wrong reading the file size
-                    print(f"⚠️  Could not stat {fpath}: {exc}")
+                # Something went wrong listing the directory or reading the file size
+                print(f"⚠️  Could not stat {finding.path}: {finding.message}")
 
         # Final summary and return results
-        print(f"File check complete: examined {checked} files across all subdirectories")
-        if empty_files:
-            print(f"⚠️ WARNING: Found {len(empty_files)} empty (0 KB) files:")
-            for idx, empty_file in enumerate(empty_files, 1):
-                print(f"  {idx}. {os.path.abspath(empty_file)}")
-        else:
+        print(f"File check complete: examined {scanner.files_checked} files "
+              f"({scanner.bytes_checked / 1048576:.1f} MB) in {scanner.directories_checked} directories "
+              f"in {scanner.seconds:.2f}s")
+        if not empty_files:
             print("✅ No empty files found - all files have content!")
 
         return {
             "success": len(empty_files) == 0,
             "empty_files": empty_files,
-            "checked_count": checked,
-            "directories_checked": sum(1 for _ in os.walk(root_dir))  # Count of directories processed
+            "checked_count": scanner.files_checked,
+            "directories_checked": scanner.directories_checked,
+            "unreadable_count": scanner.error_count,
         }
-
-
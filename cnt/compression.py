@@ -0,0 +1,283 @@
+import collections
+import gzip
+import json
+import os
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, List, Tuple, Any, Deque
+
+INDEX_SUFFIX = ".index.jsonl"
+
+# Formats that are already compressed; they are stored (gzip level 0) instead of recompressed
+STORED_EXTENSIONS = {
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".heic", ".webp",
+    ".otf", ".ttf", ".ttc", ".woff", ".woff2",
+    ".zip", ".gz", ".bz2", ".xz", ".7z", ".idml", ".epub", ".mp3", ".mp4", ".m4a", ".mov",
+}
+
+
+class _Discard:
+    # File object for the TarFile that only builds headers
+    def write(self, data):
+        return len(data)
+
+    def tell(self):
+        return 0
+
+
+class ArchiveCompressor:
+    def __init__(self, output_path: str, root: str, max_workers: Optional[int] = None, level: int = 6,
+                 block_size: int = 4 * 1024 * 1024):
+        """
+        Streams an archive folder into a .tar.gz while the run is still
+        producing it. The tar stream is cut into blocks of about *block_size*
+        that are compressed as independent gzip members on a thread pool
+        (zlib releases the GIL) and written in order, so the result is one
+        ordinary .tar.gz. Members holding already-compressed formats (PDF,
+        JPEG, fonts, ...) are stored at level 0 instead of being recompressed.
+
+        Next to it, <output>.index.jsonl lists every entry with the offset of
+        the gzip member its header starts in and its position inside that
+        member, so a single file can be extracted without decompressing
+        everything before it. Hardlinks (e.g. from package deduplication)
+        are kept as tar hardlinks.
+
+        Args:
+            output_path (str): The .tar.gz to write
+            root (str): Folder being archived; entries are named <basename(root)>/<relative path>
+            max_workers (int): Compression threads (default: CPU count)
+            level (int): gzip level for compressible data
+            block_size (int): Uncompressed bytes per gzip member
+        """
+        self.output_path = output_path
+        self.index_path = output_path + INDEX_SUFFIX
+        self.root = os.path.normpath(root)
+        self.max_workers = max_workers or os.cpu_count() or 4
+        self.level = level
+        self.block_size = block_size
+        self.added = set()
+        self.files_added = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.stored_bytes = 0
+        self.seconds = 0.0
+        self.closed = False
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._tar = tarfile.TarFile(fileobj=_Discard(), mode="w", format=tarfile.PAX_FORMAT)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="compress")
+        # (future of the compressed member, index entries starting in it)
+        self._pending: Deque[Tuple[Future, List[Dict[str, Any]]]] = collections.deque()
+        self._buffer = bytearray()
+        self._buffer_level = level
+        self._buffer_entries: List[Dict[str, Any]] = []
+        self._tar_offset = 0
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        self._out = open(output_path + ".tmp", "wb")
+        self._index = open(self.index_path + ".tmp", "w", encoding="utf-8")
+
+    def arcname(self, path: str) -> str:
+        rel = os.path.relpath(path, self.root)
+        name = os.path.basename(self.root)
+        return name if rel == "." else f"{name}/{rel}".replace(os.sep, "/")
+
+    def add_tree(self, top: str, exclude=None) -> int:
+        """
+        Add every file and folder under *top* that isn't in the archive yet.
+        Safe to call from several pipeline steps, one at a time per tree.
+
+        Args:
+            top (str): Folder inside the root
+            exclude (callable): exclude(path) → True to leave a file or folder out
+
+        Returns:
+            int: Number of files added
+        """
+        added = 0
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames.sort()
+            if exclude is not None:
+                dirnames[:] = [name for name in dirnames if not exclude(os.path.join(dirpath, name))]
+            self.add_path(dirpath)
+            for fname in sorted(filenames):
+                path = os.path.join(dirpath, fname)
+                if (exclude is None or not exclude(path)) and self.add_path(path):
+                    added += 1
+        return added
+
+    def add_path(self, path: str) -> bool:
+        """
+        Add one file, folder or symlink unless it was added before.
+
+        Returns:
+            bool: True if a regular file (not a hardlink to one) was added
+        """
+        with self._lock:
+            name = self.arcname(path)
+            if name in self.added:
+                return False
+            try:
+                info = self._tar.gettarinfo(path, arcname=name)
+            except OSError as e:
+                print(f"⚠️  Could not add {path} to the archive: {e}")
+                return False
+            if info is None:
+                return False  # sockets and other special files
+            self.added.add(name)
+            level = 0 if os.path.splitext(name)[1].lower() in STORED_EXTENSIONS else self.level
+            self._append(info.tobuf(tarfile.PAX_FORMAT, tarfile.ENCODING, "surrogateescape"), level,
+                         {"name": name, "type": info.type.decode(), "size": info.size})
+            if not info.isreg():
+                return False
+            with open(path, "rb") as f:
+                remaining = info.size
+                while remaining > 0:
+                    chunk = f.read(min(self.block_size, remaining))
+                    if not chunk:
+                        raise OSError(f"{path} shrank while it was being archived")
+                    self._append(chunk, level)
+                    remaining -= len(chunk)
+            padding = -info.size % tarfile.BLOCKSIZE
+            if padding:
+                self._append(bytes(padding), level)
+            self.files_added += 1
+            self.bytes_in += info.size
+            return True
+
+    def _append(self, data: bytes, level: int, entry: Optional[Dict[str, Any]] = None):
+        if level != self._buffer_level or len(self._buffer) >= self.block_size:
+            self._flush_buffer()
+            self._buffer_level = level
+        if entry is not None:
+            entry["tar_offset"] = self._tar_offset
+            entry["skip"] = len(self._buffer)
+            entry["stored"] = level == 0
+            self._buffer_entries.append(entry)
+        self._buffer += data
+        self._tar_offset += len(data)
+
+    def _flush_buffer(self):
+        if self._buffer:
+            data = bytes(self._buffer)
+            if self._buffer_level == 0:
+                self.stored_bytes += len(data)
+            self._pending.append((self._pool.submit(gzip.compress, data, self._buffer_level, mtime=0),
+                                  self._buffer_entries))
+            self._buffer = bytearray()
+            self._buffer_entries = []
+        # Keep the compressed blocks in flight bounded, and write those already done
+        while self._pending and (len(self._pending) > self.max_workers * 2 or self._pending[0][0].done()):
+            self._write_member(*self._pending.popleft())
+
+    def _write_member(self, future: Future, entries: List[Dict[str, Any]]):
+        offset = self._out.tell()
+        member = future.result()
+        self._out.write(member)
+        self.bytes_out += len(member)
+        for entry in entries:
+            entry["member_offset"] = offset
+            self._index.write(json.dumps(entry) + "\n")
+
+    def close(self, abort: bool = False) -> Dict[str, Any]:
+        """
+        Finish the tar stream, write the remaining members and move the
+        .tar.gz and its index into place (or discard them with *abort*).
+
+        Returns:
+            dict: 'path', 'index', 'files', 'bytes_in', 'bytes_out', 'stored_bytes' and 'seconds'
+        """
+        with self._lock:
+            if not abort:
+                # End-of-archive marker: two zero blocks, padded to a full record
+                end = tarfile.BLOCKSIZE * 2
+                end += -(self._tar_offset + end) % tarfile.RECORDSIZE
+                self._append(bytes(end), self.level)
+                self._flush_buffer()
+            while self._pending:
+                future, entries = self._pending.popleft()
+                if abort:
+                    future.cancel()
+                else:
+                    self._write_member(future, entries)
+            self._pool.shutdown(wait=True)
+            self._out.close()
+            self._index.close()
+            if abort:
+                for path in (self._out.name, self._index.name):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            else:
+                os.replace(self._out.name, self.output_path)
+                os.replace(self._index.name, self.index_path)
+            self.seconds = time.perf_counter() - self._started
+            self.closed = True
+        return {
+            "path": self.output_path,
+            "index": self.index_path,
+            "files": self.files_added,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "stored_bytes": self.stored_bytes,
+            "seconds": self.seconds,
+        }
+
+    @staticmethod
+    def print_summary(result: Dict[str, Any]):
+        ratio = result["bytes_out"] / result["bytes_in"] if result["bytes_in"] else 1.0
+        print(f"Compressed {result['files']} files, {result['bytes_in'] / 1048576:.1f} MB → "
+              f"{result['bytes_out'] / 1048576:.1f} MB ({ratio:.0%}, {result['stored_bytes'] / 1048576:.1f} MB "
+              f"stored as-is) into {result['path']} in {result['seconds']:.1f}s")
+
+
+def extract_member(archive_path: str, name: str, destination_dir: str, index_path: Optional[str] = None) -> str:
+    """
+    Extract one entry from a .tar.gz written by ArchiveCompressor, seeking
+    straight to it through the index instead of decompressing the archive
+    from the start. A hardlink is extracted as a regular file holding the
+    data of the entry it links to.
+
+    Returns:
+        str: Path of the extracted file
+    """
+    index_path = index_path or archive_path + INDEX_SUFFIX
+    info = _extract_entry(archive_path, index_path, name, name, destination_dir)
+    if info is not None and info.islnk():
+        # The stream starts at the link, so the data it points to is read from its own member
+        _extract_entry(archive_path, index_path, info.linkname, name, destination_dir)
+    return os.path.join(destination_dir, *name.split("/"))
+
+
+def _index_entry(index_path: str, archive_path: str, name: str) -> Dict[str, Any]:
+    with open(index_path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["name"] == name:
+                return entry
+    raise KeyError(f"{name} is not in {archive_path}")
+
+
+def _extract_entry(archive_path: str, index_path: str, name: str, extract_as: str,
+                   destination_dir: str) -> Optional[tarfile.TarInfo]:
+    # Extract entry *name* as *extract_as*; a hardlink is returned without being extracted
+    entry = _index_entry(index_path, archive_path, name)
+    with open(archive_path, "rb") as raw:
+        raw.seek(entry["member_offset"])
+        # gzip reads on across member boundaries, so this is a stream from the member onwards
+        with gzip.GzipFile(fileobj=raw, mode="rb") as stream:
+            stream.read(entry["skip"])
+            with tarfile.open(fileobj=stream, mode="r|") as tar:
+                info = tar.next()
+                if info is None or info.name != name:
+                    raise ValueError(f"Index entry for {name} doesn't match the archive")
+                if info.islnk():
+                    return info
+                info.name = extract_as
+                if hasattr(tarfile, "data_filter"):
+                    tar.extract(info, destination_dir, filter="data")
+                else:
+                    tar.extract(info, destination_dir)
+    return info
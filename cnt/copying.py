@@ -0,0 +1,449 @@
+import contextlib
+import ctypes
+import ctypes.util
+import errno
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Tuple, Any, Iterable
+from cnt.manifest import ArchiveManifest, file_hash
+from cnt.source_index import SourceIndex
+from cnt.io_scheduler import IOScheduler
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+# Linux ioctl that makes the destination share the source's extents (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+# Errors that mean "this mechanism isn't supported here", not "the copy failed"
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.EOPNOTSUPP, errno.ENOSYS,
+                       errno.EBADF, errno.EPERM, getattr(errno, "ENOTSUP", errno.EOPNOTSUPP)}
+
+
+def _load_clonefile():
+    """
+    clonefile(2) from libSystem on macOS (APFS copy-on-write clones), or None.
+    """
+    if sys.platform != "darwin":
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        clonefile = libc.clonefile
+    except (OSError, AttributeError):
+        return None
+    clonefile.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+    clonefile.restype = ctypes.c_int
+    return clonefile
+
+
+_clonefile = _load_clonefile()
+
+
+class CopyEngine:
+    # Files at or above this size are copied with the large buffer
+    LARGE_FILE_THRESHOLD = 8 * 1024 * 1024
+
+    def __init__(self, max_workers: int = 8, buffer_size: int = 1024 * 1024,
+                 large_buffer_size: int = 16 * 1024 * 1024, use_hash: bool = False,
+                 scheduler: Optional[IOScheduler] = None):
+        """
+        Copies files on a bounded thread pool so per-file opens, reads and
+        metadata updates overlap (on a NAS the per-file latency dominates),
+        and reports bytes/s and files/s.
+
+        Each file goes through the cheapest mechanism available: a
+        copy-on-write clone when source and destination share a filesystem
+        (FICLONE on Linux, clonefile on APFS), then in-kernel copy_file_range
+        or sendfile, then a plain buffered copy. Mechanisms that fail as
+        unsupported are not retried for the same pair of devices.
+
+        Given an ArchiveManifest, files whose source size and mtime match the
+        manifest are skipped, so re-archiving only copies what changed.
+
+        Given an IOScheduler, every file copy holds a slot on its source and
+        destination volumes, and data copies to or from a volume with a
+        bandwidth cap are done in throttled buffered chunks.
+
+        Args:
+            max_workers (int): Number of concurrent file copies
+            buffer_size (int): Read/write buffer for ordinary files
+            large_buffer_size (int): Read/write buffer for big assets
+            use_hash (bool): Store content hashes in the manifest, and treat a file whose
+                mtime changed but whose content did not as unchanged
+            scheduler (IOScheduler): Per-volume concurrency and bandwidth limits
+        """
+        self.max_workers = max_workers
+        self.buffer_size = buffer_size
+        self.large_buffer_size = large_buffer_size
+        self.use_hash = use_hash
+        self.scheduler = scheduler
+        self._lock = threading.Lock()
+        self.files_copied = 0
+        self.bytes_copied = 0
+        self.seconds = 0.0
+        self.method_counts: Dict[str, int] = {}
+        self._unsupported: set = set()  # (method, source device, destination device)
+
+    def copy_tree(self, source_dir: str, destination_dir: str, manifest: Optional[ArchiveManifest] = None,
+                  on_deleted: str = "flag", index: Optional[SourceIndex] = None) -> Dict[str, Any]:
+        """
+        Recursively copy *source_dir* into *destination_dir* (like shutil.copytree,
+        but an existing destination is merged into instead of raising).
+
+        Returns:
+            dict: see copy_trees
+        """
+        return self.copy_trees([(source_dir, destination_dir)], manifest=manifest, on_deleted=on_deleted,
+                               index=index)
+
+    def copy_trees(self, pairs: Iterable[Tuple[str, str]], manifest: Optional[ArchiveManifest] = None,
+                   on_deleted: str = "flag", index: Optional[SourceIndex] = None) -> Dict[str, Any]:
+        """
+        Copy several directory trees through one pool, so small folders don't
+        wait behind big ones.
+
+        Args:
+            pairs (iterable): (source_dir, destination_dir) tuples
+            manifest (ArchiveManifest): Skip unchanged files and record copied ones
+            on_deleted (str): What to do with archived files whose source is gone:
+                              "flag" (keep and mark in the manifest) or "remove"
+            index (SourceIndex): Listing and stat results of the source tree, used
+                                 instead of walking and stat'ing it again
+
+        Returns:
+            dict: 'success', 'files', 'bytes', 'skipped' (unchanged files), 'seconds',
+                  'bytes_per_second', 'files_per_second', 'deleted' (archived files
+                  whose source is gone) and 'errors' (list of (path, message))
+        """
+        pairs = list(pairs)
+        file_pairs: List[Tuple[str, str]] = []
+        directories: List[Tuple[str, str]] = []
+        errors: List[Tuple[str, str]] = []
+
+        for source_dir, destination_dir in pairs:
+            for dirpath, filenames in self._walk(source_dir, index, errors):
+                rel = os.path.relpath(dirpath, source_dir)
+                target_dir = os.path.normpath(os.path.join(destination_dir, rel))
+                try:
+                    os.makedirs(target_dir, exist_ok=True)
+                except OSError as e:
+                    errors.append((dirpath, str(e)))
+                    continue
+                directories.append((dirpath, target_dir))
+                for fname in filenames:
+                    file_pairs.append((os.path.join(dirpath, fname), os.path.join(target_dir, fname)))
+
+        result = self._copy_pairs(file_pairs, manifest, index)
+        result["errors"] = errors + result["errors"]
+
+        if manifest is not None:
+            result["deleted"] += self.reconcile_deleted(manifest, [destination_dir for _src, destination_dir in pairs],
+                                                        file_pairs, on_deleted=on_deleted)
+            manifest.save()
+
+        # Directory timestamps last, after their contents stopped changing
+        for source_dir, target_dir in reversed(directories):
+            try:
+                shutil.copystat(source_dir, target_dir)
+            except OSError:
+                pass
+
+        result["success"] = not result["errors"]
+        return result
+
+    def _walk(self, top: str, index: Optional[SourceIndex], errors: List[Tuple[str, str]]):
+        """
+        (dirpath, filenames) for every folder under *top*. Symlinked folders
+        are followed like shutil.copytree does (their contents are copied);
+        one that points back at a folder it is inside of is reported in
+        *errors* instead of being copied forever.
+        """
+        if index is not None and index.isdir(top) and not os.path.islink(top):
+            walker = index.walk(top)
+        else:
+            walker = os.walk(top, onerror=lambda e: errors.append((e.filename, str(e))))
+        for dirpath, dirnames, filenames in walker:
+            yield dirpath, filenames
+            for name in dirnames:
+                path = os.path.join(dirpath, name)
+                if not os.path.islink(path):
+                    continue
+                target = os.path.realpath(path)
+                inside = os.path.realpath(dirpath)
+                if inside == target or inside.startswith(target + os.sep):
+                    errors.append((path, f"symlinked folder loops back to {target}; not copied"))
+                    continue
+                # The index and os.walk list symlinked folders but don't descend into them
+                yield from self._walk(path, None, errors)
+
+    def copy_files(self, pairs: Iterable[Tuple[str, str]], manifest: Optional[ArchiveManifest] = None,
+                   index: Optional[SourceIndex] = None, destination_dir: Optional[str] = None,
+                   on_deleted: str = "flag") -> Dict[str, Any]:
+        """
+        Copy individual files, preserving metadata like shutil.copy2.
+
+        Args:
+            pairs (iterable): (source_file, destination_file) tuples
+            manifest (ArchiveManifest): Skip unchanged files and record copied ones
+            index (SourceIndex): Source stat results to reuse
+            destination_dir (str): With a manifest, the folder these files are archived in;
+                archived files under it that aren't among *pairs* are handled as deleted
+            on_deleted (str): See copy_trees
+
+        Returns:
+            dict: see copy_trees, plus 'copied' (list of source paths, including skipped unchanged ones)
+        """
+        pairs = list(pairs)
+        result = self._copy_pairs(pairs, manifest, index)
+        if manifest is not None:
+            if destination_dir is not None:
+                result["deleted"] += self.reconcile_deleted(manifest, [destination_dir], pairs,
+                                                            on_deleted=on_deleted)
+            manifest.save()
+        return result
+
+    @staticmethod
+    def reconcile_deleted(manifest: ArchiveManifest, destination_dirs: Iterable[str],
+                          pairs: Iterable[Tuple[str, str]] = (), on_deleted: str = "flag") -> List[str]:
+        """
+        Flag or remove the manifest entries under *destination_dirs* that no
+        pair of this run copied or skipped, i.e. whose source is gone. With no
+        pairs, everything archived under the folders is handled as deleted
+        (their source folder no longer exists). The caller saves the manifest.
+
+        Returns:
+            list: Archive paths of files whose source was deleted
+        """
+        seen = {manifest.relpath(destination_file) for _source_file, destination_file in pairs}
+        deleted = []
+        for destination_dir in destination_dirs:
+            deleted += manifest.reconcile_deleted(destination_dir, seen, on_deleted=on_deleted)
+        if deleted:
+            action = "Removed" if on_deleted == "remove" else "Kept"
+            print(f"⚠️  {action} {len(deleted)} archived file(s) whose source was deleted:")
+            for path in deleted:
+                print(f"  - {path}")
+        return deleted
+
+    def _copy_pairs(self, pairs: Iterable[Tuple[str, str]], manifest: Optional[ArchiveManifest],
+                    index: Optional[SourceIndex] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        errors: List[Tuple[str, str]] = []
+        copied: List[str] = []
+        totals = {"files": 0, "bytes": 0, "skipped": 0}
+        methods: Dict[str, int] = {}
+        in_flight = threading.BoundedSemaphore(self.max_workers * 4)
+
+        def work(source_file: str, destination_file: str):
+            try:
+                source_stat = (index.stat(source_file) if index is not None else None) or os.stat(source_file)
+                if manifest is not None and manifest.is_unchanged(source_file, destination_file, source_stat,
+                                                                  use_hash=self.use_hash):
+                    with self._lock:
+                        totals["skipped"] += 1
+                        copied.append(source_file)
+                    return
+
+                size, method = self._copy_file(source_file, destination_file, source_stat)
+                if manifest is not None:
+                    manifest.record(destination_file, source_stat,
+                                    digest=file_hash(destination_file) if self.use_hash else None)
+                with self._lock:
+                    totals["files"] += 1
+                    totals["bytes"] += size
+                    methods[method] = methods.get(method, 0) + 1
+                    self.method_counts[method] = self.method_counts.get(method, 0) + 1
+                    copied.append(source_file)
+            except Exception as e:
+                # Anything raised here would otherwise stay in the discarded future
+                with self._lock:
+                    errors.append((source_file, str(e) or type(e).__name__))
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="copy") as pool:
+            for source_file, destination_file in pairs:
+                in_flight.acquire()  # keep the queue bounded on huge trees
+                pool.submit(work, source_file, destination_file)
+
+        seconds = time.perf_counter() - started
+        with self._lock:
+            self.files_copied += totals["files"]
+            self.bytes_copied += totals["bytes"]
+            self.seconds += seconds
+
+        return {
+            "success": not errors,
+            "files": totals["files"],
+            "bytes": totals["bytes"],
+            "skipped": totals["skipped"],
+            "seconds": seconds,
+            "bytes_per_second": totals["bytes"] / seconds if seconds else 0.0,
+            "files_per_second": totals["files"] / seconds if seconds else 0.0,
+            "copied": copied,
+            "errors": errors,
+            "methods": methods,
+            "deleted": [],
+        }
+
+    def copy_file(self, source_file: str, destination_file: str) -> int:
+        """
+        Copy one file's data and metadata. Returns the number of bytes copied.
+        """
+        return self._copy_file(source_file, destination_file)[0]
+
+    def clone_file(self, source_file: str, destination_file: str) -> Optional[str]:
+        """
+        Copy-on-write clone of one file to the new path *destination_file*,
+        without falling back to a data copy. Returns the method used, or None
+        if the filesystem can't clone.
+        """
+        devices = (os.stat(source_file).st_dev, os.stat(os.path.dirname(destination_file) or ".").st_dev)
+        if devices[0] != devices[1]:
+            return None
+        method = self._clone(source_file, destination_file, devices)
+        if method is None and os.path.lexists(destination_file):
+            os.unlink(destination_file)  # the FICLONE attempt leaves an empty file behind
+        return method
+
+    def _copy_file(self, source_file: str, destination_file: str,
+                   source_stat: Optional[os.stat_result] = None) -> Tuple[int, str]:
+        source_stat = source_stat or os.stat(source_file)
+        size = source_stat.st_size
+        devices = (source_stat.st_dev, os.stat(os.path.dirname(destination_file) or ".").st_dev)
+
+        method = None
+        with self.scheduler.transfer(source_file, destination_file) if self.scheduler else contextlib.nullcontext() \
+                as volumes:
+            if devices[0] == devices[1]:
+                method = self._clone(source_file, destination_file, devices)
+            if method is None:
+                if volumes and self.scheduler.is_capped(volumes):
+                    method = self._copy_throttled(source_file, destination_file, size, volumes)
+                else:
+                    method = self._copy_data(source_file, destination_file, size, devices)
+                    if volumes:
+                        self.scheduler.consume(size, volumes)
+
+        # Preserve permission bits, timestamps and flags the way shutil.copy2 does
+        shutil.copystat(source_file, destination_file)
+        return size, method
+
+    def _supported(self, method: str, devices: Tuple[int, int]) -> bool:
+        return (method, *devices) not in self._unsupported
+
+    def _mark_unsupported(self, method: str, devices: Tuple[int, int], error: OSError) -> bool:
+        """
+        Remember that *method* doesn't work between these devices. Returns
+        False if the error is a real failure that should propagate.
+        """
+        if error.errno not in _UNSUPPORTED_ERRNOS:
+            return False
+        self._unsupported.add((method, *devices))
+        return True
+
+    def _clone(self, source_file: str, destination_file: str, devices: Tuple[int, int]) -> Optional[str]:
+        """
+        Copy-on-write clone; near-instant on btrfs/xfs/APFS. Returns the method
+        name, or None if cloning isn't possible here.
+        """
+        if _clonefile is not None and self._supported("clonefile", devices):
+            # clonefile() refuses to overwrite, so clear a previous copy first
+            if os.path.lexists(destination_file):
+                os.unlink(destination_file)
+            if _clonefile(os.fsencode(source_file), os.fsencode(destination_file), 0) == 0:
+                return "clonefile"
+            err = ctypes.get_errno()
+            if not self._mark_unsupported("clonefile", devices, OSError(err, os.strerror(err))):
+                raise OSError(err, os.strerror(err), source_file)
+            return None
+
+        if fcntl is not None and sys.platform.startswith("linux") and self._supported("ficlone", devices):
+            with open(source_file, "rb") as fsrc, open(destination_file, "wb") as fdst:
+                try:
+                    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                    return "reflink"
+                except OSError as e:
+                    if not self._mark_unsupported("ficlone", devices, e):
+                        raise
+        return None
+
+    def _copy_data(self, source_file: str, destination_file: str, size: int, devices: Tuple[int, int]) -> str:
+        """
+        In-kernel copy (copy_file_range, then sendfile) with a buffered fallback.
+        """
+        with open(source_file, "rb") as fsrc, open(destination_file, "wb") as fdst:
+            infd, outfd = fsrc.fileno(), fdst.fileno()
+
+            if hasattr(os, "copy_file_range") and self._supported("copy_file_range", devices):
+                try:
+                    self._kernel_copy(lambda n: os.copy_file_range(infd, outfd, n), size)
+                    return "copy_file_range"
+                except OSError as e:
+                    if not self._mark_unsupported("copy_file_range", devices, e):
+                        raise
+                    self._rewind(fsrc, fdst)
+
+            # sendfile() to a regular file only works on Linux
+            if sys.platform.startswith("linux") and self._supported("sendfile", devices):
+                try:
+                    offset = [0]
+
+                    def send(n):
+                        sent = os.sendfile(outfd, infd, offset[0], n)
+                        offset[0] += sent
+                        return sent
+
+                    self._kernel_copy(send, size)
+                    return "sendfile"
+                except OSError as e:
+                    if not self._mark_unsupported("sendfile", devices, e):
+                        raise
+                    self._rewind(fsrc, fdst)
+
+            length = self.large_buffer_size if size >= self.LARGE_FILE_THRESHOLD else self.buffer_size
+            shutil.copyfileobj(fsrc, fdst, length)
+            return "buffered"
+
+    def _copy_throttled(self, source_file: str, destination_file: str, size: int, volumes) -> str:
+        """
+        Buffered copy that lets the scheduler pace every chunk.
+        """
+        length = self.large_buffer_size if size >= self.LARGE_FILE_THRESHOLD else self.buffer_size
+        with open(source_file, "rb") as fsrc, open(destination_file, "wb") as fdst:
+            for chunk in iter(lambda: fsrc.read(length), b""):
+                self.scheduler.consume(len(chunk), volumes)
+                fdst.write(chunk)
+        return "throttled"
+
+    @staticmethod
+    def _kernel_copy(copy_chunk, size: int):
+        # Loop until EOF; the file may have grown or shrunk since it was stat'ed
+        chunk = max(min(size, 1 << 30), 1 << 20)
+        while copy_chunk(chunk) > 0:
+            pass
+
+    @staticmethod
+    def _rewind(fsrc, fdst):
+        fsrc.seek(0)
+        fdst.seek(0)
+        fdst.truncate()
+
+    @staticmethod
+    def format_rate(result: Dict[str, Any]) -> str:
+        """
+        One-line throughput summary for a copy result.
+        """
+        line = (f"{result['files']} files, {result['bytes'] / 1048576:.1f} MB in {result['seconds']:.1f}s "
+                f"({result['bytes_per_second'] / 1048576:.1f} MB/s, {result['files_per_second']:.0f} files/s)")
+        if result.get("skipped"):
+            line += f", {result['skipped']} unchanged skipped"
+        if result.get("methods"):
+            line += " via " + ", ".join(f"{name} ×{count}" for name, count in sorted(result["methods"].items()))
+        return line
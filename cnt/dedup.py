@@ -0,0 +1,164 @@
+import os
+import stat
+import time
+from typing import Optional, Dict, List, Tuple, Any
+from cnt.checksums import ChecksumEngine
+from cnt.copying import CopyEngine
+
+PACKAGE_SUFFIX = "_Packaged"
+
+
+class PackageDeduplicator:
+    # Smaller files aren't worth a hash and a link
+    MIN_SIZE = 64 * 1024
+
+    def __init__(self, layout_dir: str, mode: str = "hardlink", min_size: int = MIN_SIZE,
+                 engine: Optional[ChecksumEngine] = None):
+        """
+        Replaces identical files across the <name>_Packaged folders of an
+        archive's Layout directory (the same fonts, color profiles and shared
+        links packaged with every chapter) by links to one copy. Every
+        package folder still holds all its files under the same names.
+
+        Only files whose size occurs more than once are hashed. With
+        mode="hardlink" the copies share one inode, which saves disk space and,
+        with `rsync -H` or tar, transfer volume; editing one copy in place
+        changes them all, so InDesignSession unshares a package before
+        packaging into it again. With mode="reflink" the copies become
+        copy-on-write clones (APFS, btrfs, xfs): disk space only, but copies
+        stay independent.
+
+        Args:
+            layout_dir (str): The archive's <folder_id>_Layout directory
+            mode (str): "hardlink" or "reflink"
+            min_size (int): Files smaller than this are left alone
+            engine (ChecksumEngine): Engine to hash with; a default one is used if omitted
+        """
+        if mode not in ("hardlink", "reflink"):
+            raise ValueError(f"Unknown dedup mode: {mode}")
+        self.layout_dir = layout_dir
+        self.mode = mode
+        self.min_size = min_size
+        self.engine = engine or ChecksumEngine()
+        self.copy_engine = CopyEngine()
+
+    def _package_files(self) -> Dict[int, List[Tuple[str, os.stat_result]]]:
+        by_size: Dict[int, List[Tuple[str, os.stat_result]]] = {}
+        try:
+            packages = [entry.path for entry in os.scandir(self.layout_dir)
+                        if entry.is_dir(follow_symlinks=False) and entry.name.endswith(PACKAGE_SUFFIX)]
+        except FileNotFoundError:
+            return by_size
+        for package in sorted(packages):
+            for dirpath, _dirs, filenames in os.walk(package):
+                for fname in sorted(filenames):
+                    path = os.path.join(dirpath, fname)
+                    try:
+                        st = os.lstat(path)
+                    except OSError:
+                        continue
+                    if stat.S_ISREG(st.st_mode) and st.st_size >= self.min_size:
+                        by_size.setdefault(st.st_size, []).append((path, st))
+        return by_size
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Hash the candidate files and link the duplicates.
+
+        Returns:
+            dict: 'files_linked', 'bytes_reclaimed', 'unclonable' (duplicates left because
+                  the filesystem can't clone), 'files_hashed', 'seconds' and
+                  'errors' ((path, message) pairs)
+        """
+        started = time.perf_counter()
+        candidates = [(path, st) for group in self._package_files().values() if len(group) > 1
+                      for path, st in group]
+
+        def digest(item: Tuple[str, os.stat_result]) -> Tuple[str, os.stat_result, Optional[str], Optional[str]]:
+            path, st = item
+            try:
+                return path, st, self.engine.hash_file(path), None
+            except OSError as e:
+                return path, st, None, str(e)
+
+        groups: Dict[Tuple[int, str], List[Tuple[str, os.stat_result]]] = {}
+        errors: List[Tuple[str, str]] = []
+        for path, st, hexdigest, error in self.engine.map(digest, candidates):
+            if error:
+                errors.append((path, error))
+            else:
+                groups.setdefault((st.st_size, hexdigest), []).append((path, st))
+
+        linked = 0
+        reclaimed = 0
+        unclonable = 0
+        for (size, _hexdigest), files in groups.items():
+            # The first package (by path) keeps the original
+            files.sort()
+            original, original_stat = files[0]
+            for path, st in files[1:]:
+                if (st.st_dev, st.st_ino) == (original_stat.st_dev, original_stat.st_ino):
+                    continue  # already linked by an earlier run
+                if st.st_dev != original_stat.st_dev:
+                    continue
+                try:
+                    if self._replace(original, path, st):
+                        linked += 1
+                        reclaimed += size
+                    else:
+                        unclonable += 1
+                except OSError as e:
+                    errors.append((path, str(e)))
+
+        seconds = time.perf_counter() - started
+        return {
+            "files_linked": linked,
+            "bytes_reclaimed": reclaimed,
+            "unclonable": unclonable,
+            "files_hashed": len(candidates),
+            "seconds": seconds,
+            "errors": errors,
+        }
+
+    def _replace(self, original: str, path: str, st: os.stat_result) -> bool:
+        tmp_path = f"{path}.cnt_dedup"
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
+        if self.mode == "hardlink":
+            os.link(original, tmp_path)
+        elif self.copy_engine.clone_file(original, tmp_path) is None:
+            return False
+        else:
+            # A clone is a new file; keep the duplicate's own timestamps
+            os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp_path, path)
+        return True
+
+    def print_summary(self, result: Dict[str, Any]):
+        print(f"Deduplicated packages: {result['files_linked']} duplicate file(s) {self.mode}ed, "
+              f"{result['bytes_reclaimed'] / 1048576:.1f} MB reclaimed "
+              f"({result['files_hashed']} candidate(s) hashed in {result['seconds']:.1f}s)")
+        if result["unclonable"]:
+            print(f"   {result['unclonable']} duplicate(s) kept: this filesystem can't clone files")
+        if result["errors"]:
+            print(f"⚠️  {len(result['errors'])} file(s) could not be deduplicated, first: "
+                  f"{result['errors'][0][0]}: {result['errors'][0][1]}")
+
+
+def unshare_package(package_path: str) -> int:
+    """
+    Remove the hardlinked files of a package folder before InDesign packages
+    into it again, so rewriting them can't change the other packages sharing
+    them. Returns the number of files removed.
+    """
+    removed = 0
+    for dirpath, _dirs, filenames in os.walk(package_path):
+        for fname in filenames:
+            path = os.path.join(dirpath, fname)
+            try:
+                if os.lstat(path).st_nlink > 1:
+                    os.unlink(path)
+                    removed += 1
+            except OSError:
+                continue
+    return removed
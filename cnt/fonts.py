@@ -0,0 +1,61 @@
+import time
+from typing import Optional
+
+
+class FontActivation:
+    def __init__(self, apple_script_agent):
+        """
+        Run-level record of whether Extensis Connect has activated the fonts.
+        Connect is refreshed once up front, and again only when a document
+        reports missing fonts after it has been opened.
+
+        Args:
+            apple_script_agent (AppleScript): Agent used to drive Extensis Connect and InDesign
+        """
+        self.agent = apple_script_agent
+        self.active = False
+        self.refresh_count = 0
+        self.last_refreshed: Optional[float] = None
+
+    def ensure_active(self) -> bool:
+        """
+        Refresh Extensis Connect unless fonts are already active for this run.
+
+        Returns:
+            bool: True if fonts are (now) active
+        """
+        if self.active:
+            return True
+        return self.refresh()
+
+    def refresh(self) -> bool:
+        """
+        Make sure Extensis Connect is running and refresh it.
+
+        Returns:
+            bool: True if the refresh succeeded
+        """
+        if self.agent.is_extensis_connect_running():
+            self.active = self.agent.refresh_extensis_connect()
+        else:
+            self.active = self.agent.open_and_refresh_extensis_connect()
+            self.agent.minimize_extensis_connect()
+
+        self.refresh_count += 1
+        self.last_refreshed = time.time()
+        return self.active
+
+    def check_document(self) -> Optional[int]:
+        """
+        Ask InDesign whether the open document is missing fonts and, if so,
+        refresh Extensis Connect again before it is packaged.
+
+        Returns:
+            int or None: Number of missing fonts reported, None if unknown
+        """
+        missing = self.agent.indesign_missing_font_count()
+        if missing:
+            print(f"⚠️  {missing} font(s) missing after opening – refreshing Extensis Connect")
+            self.active = False
+            self.refresh()
+        return missing
@@ -0,0 +1,253 @@
+import contextlib
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Dict, List, Tuple, Iterator
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+
+class VolumeLimits:
+    def __init__(self, max_concurrency: int = 8, bytes_per_second: Optional[float] = None):
+        """
+        Limits applied to one volume.
+
+        Args:
+            max_concurrency (int): Transfers touching the volume at the same time
+                (default: CopyEngine's pool size, so copies aren't slowed down by default)
+            bytes_per_second (float or None): Bandwidth cap; None means uncapped
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.bytes_per_second = bytes_per_second
+
+
+class _Volume:
+    def __init__(self, device: int, mount: str, limits: VolumeLimits, lock_dir: Optional[str]):
+        self.device = device
+        self.mount = mount
+        self.limits = limits
+        self.semaphore = threading.BoundedSemaphore(limits.max_concurrency)
+        # Slot lock files, opened once and flock'd per transfer
+        self.slot_fds: List[int] = []
+        if lock_dir:
+            for slot in range(limits.max_concurrency):
+                path = os.path.join(lock_dir, f"{device}.{slot}.lock")
+                self.slot_fds.append(os.open(path, os.O_RDWR | os.O_CREAT, 0o666))
+        self.free_fds = list(self.slot_fds)
+        # Token bucket for the bandwidth cap; may go negative (debt) after a big chunk
+        self.tokens = 0.0
+        self.refilled = time.monotonic()
+        self.bucket_lock = threading.Lock()
+        self.active = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.bytes = 0
+
+
+class IOScheduler:
+    def __init__(self, default_limits: Optional[VolumeLimits] = None,
+                 volume_limits: Optional[Dict[str, VolumeLimits]] = None,
+                 throttle_hours: Optional[Tuple[int, int]] = None, lock_dir: Optional[str] = None):
+        """
+        Coordinates file transfers by volume. Every transfer holds a slot on
+        the volume it reads from and the volume it writes to, so each volume
+        has its own concurrency limit and reads from one volume overlap with
+        writes to another. Volumes can also have a bandwidth cap, enforced
+        with a token bucket per volume.
+
+        Slots are also taken from lock files in *lock_dir*, so several
+        run_cnt.py processes (e.g. parallel --drain workers) share the
+        concurrency limit of a NAS share instead of each using all of it.
+
+        The device of each folder is looked up once, so scheduling a copy
+        adds no stat calls for files in a folder already seen.
+
+        Args:
+            default_limits (VolumeLimits): Limits for volumes not listed in *volume_limits*
+            volume_limits (dict): Path on a volume (e.g. "/Volumes/Production") → its limits
+            throttle_hours (tuple): (start, end) hours of the day during which bandwidth caps
+                apply, e.g. (8, 18) for production hours; None applies them all day
+            lock_dir (str): Folder of the cross-process slot lock files
+                (default: a folder in the system temp dir; "" disables them)
+        """
+        self.default_limits = default_limits or VolumeLimits()
+        self.throttle_hours = throttle_hours
+        if lock_dir is None:
+            lock_dir = os.path.join(tempfile.gettempdir(), "cnt_io_slots")
+        self.lock_dir = lock_dir if lock_dir and fcntl is not None else None
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        self._volumes: Dict[int, _Volume] = {}
+        self._devices: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.volume_limits = {self._device_of(path, is_dir=True): limits
+                              for path, limits in (volume_limits or {}).items()}
+
+    def _device_of(self, path: str, is_dir: bool = False) -> int:
+        # Cached per folder; a folder that doesn't exist yet (a destination)
+        # is on the device of its nearest existing ancestor
+        folder = os.path.abspath(path if is_dir else os.path.dirname(path) or ".")
+        device = self._devices.get(folder)
+        if device is not None:
+            return device
+        probe = folder
+        while True:
+            try:
+                device = os.stat(probe).st_dev
+                break
+            except FileNotFoundError:
+                parent = os.path.dirname(probe)
+                if parent == probe:
+                    raise
+                probe = parent
+        if probe == folder:
+            self._devices[folder] = device
+        return device
+
+    def volume(self, path: str) -> _Volume:
+        """
+        The scheduler's record of the volume holding *path*.
+        """
+        device = self._device_of(path)
+        volume = self._volumes.get(device)
+        if volume is not None:
+            return volume
+        with self._lock:
+            volume = self._volumes.get(device)
+            if volume is None:
+                mount = os.path.abspath(os.path.dirname(path) or ".")
+                while not os.path.ismount(mount) and os.path.dirname(mount) != mount:
+                    mount = os.path.dirname(mount)
+                limits = self.volume_limits.get(device, self.default_limits)
+                volume = self._volumes[device] = _Volume(device, mount, limits, self.lock_dir)
+            return volume
+
+    def volumes(self, *paths: str) -> List[_Volume]:
+        """
+        The distinct volumes of *paths*, in device order.
+        """
+        by_device = {}
+        for path in paths:
+            volume = self.volume(path)
+            by_device[volume.device] = volume
+        return [by_device[device] for device in sorted(by_device)]
+
+    def throttling(self) -> bool:
+        """
+        True if bandwidth caps apply right now.
+        """
+        if self.throttle_hours is None:
+            return True
+        start, end = self.throttle_hours
+        hour = datetime.now().hour
+        return start <= hour < end if start <= end else (hour >= start or hour < end)
+
+    def is_capped(self, volumes: List[_Volume]) -> bool:
+        """
+        True if a bandwidth cap currently applies to any of *volumes*.
+        """
+        return any(volume.limits.bytes_per_second for volume in volumes) and self.throttling()
+
+    @contextlib.contextmanager
+    def transfer(self, *paths: str) -> Iterator[List[_Volume]]:
+        """
+        Hold a slot on every distinct volume of *paths* (e.g. source and
+        destination) for the duration of the block, and yield those volumes
+        for is_capped() and consume(). Slots are always taken in device
+        order, so transfers in opposite directions can't deadlock.
+        """
+        volumes = self.volumes(*paths)
+        held: List[Tuple[_Volume, Optional[int]]] = []
+        try:
+            for volume in volumes:
+                held.append((volume, self._acquire(volume)))
+            yield volumes
+        finally:
+            for volume, fd in reversed(held):
+                self._release(volume, fd)
+
+    def _acquire(self, volume: _Volume) -> Optional[int]:
+        started = time.perf_counter()
+        volume.semaphore.acquire()
+        fd = self._acquire_file_slot(volume) if volume.slot_fds else None
+        waited = time.perf_counter() - started
+        with self._lock:
+            volume.active += 1
+            if waited > 0.001:
+                volume.waits += 1
+                volume.wait_seconds += waited
+        return fd
+
+    def _acquire_file_slot(self, volume: _Volume) -> int:
+        # The semaphore guarantees a free descriptor in this process; another
+        # process may hold its file, so try them all. flock is released by the
+        # OS if a process dies.
+        while True:
+            with self._lock:
+                for fd in volume.free_fds:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue
+                    volume.free_fds.remove(fd)
+                    return fd
+            time.sleep(0.05)
+
+    def _release(self, volume: _Volume, fd: Optional[int]):
+        with self._lock:
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                volume.free_fds.append(fd)
+            volume.active -= 1
+        volume.semaphore.release()
+
+    def consume(self, nbytes: int, volumes: List[_Volume]):
+        """
+        Account *nbytes* moved on *volumes* (as yielded by transfer()),
+        sleeping as long as their bandwidth caps require.
+        """
+        throttling = None
+        for volume in volumes:
+            with self._lock:
+                volume.bytes += nbytes
+            rate = volume.limits.bytes_per_second
+            if not rate:
+                continue
+            if throttling is None:
+                throttling = self.throttling()
+            if not throttling:
+                continue
+            with volume.bucket_lock:
+                now = time.monotonic()
+                # Allow at most one second of burst
+                volume.tokens = min(rate, volume.tokens + (now - volume.refilled) * rate) - nbytes
+                volume.refilled = now
+                delay = -volume.tokens / rate if volume.tokens < 0 else 0.0
+            if delay > 0:
+                time.sleep(delay)
+
+    def close(self):
+        """
+        Close the slot lock files.
+        """
+        with self._lock:
+            for volume in self._volumes.values():
+                for fd in volume.slot_fds:
+                    os.close(fd)
+                volume.slot_fds = []
+                volume.free_fds = []
+
+    def print_summary(self):
+        """
+        Print per-volume traffic and how long transfers waited for a slot.
+        """
+        for volume in sorted(self._volumes.values(), key=lambda volume: volume.mount):
+            cap = (f", capped at {volume.limits.bytes_per_second / 1048576:.0f} MB/s"
+                   if volume.limits.bytes_per_second else "")
+            print(f"  {volume.mount}: {volume.bytes / 1048576:.1f} MB, up to {volume.limits.max_concurrency} "
+                  f"transfer(s){cap}; {volume.waits} wait(s) for a slot, {volume.wait_seconds:.1f}s")
@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, Iterable
+
+JOURNAL_NAME = ".cnt_journal.jsonl"
+
+
+class RunJournal:
+    def __init__(self, archive_root: str):
+        """
+        Append-only, on-disk log of a run: every completed pipeline step and
+        every packaged document with its output path. Each record is flushed
+        and fsync'ed, so after a crash (InDesign hang, Mac asleep) a resumed
+        run can replay it and continue from the first unfinished item.
+
+        Args:
+            archive_root (str): The project's archive directory; the journal is stored inside it
+        """
+        self.archive_root = archive_root
+        self.path = os.path.join(archive_root, JOURNAL_NAME)
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.documents: Dict[str, str] = {}
+        self.run_info: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def start(self, resume: bool = False, **run_info):
+        """
+        Begin a run. With *resume* the existing journal is replayed and kept;
+        otherwise it is discarded and a fresh one is started.
+
+        Returns:
+            bool: True if an earlier journal was replayed
+        """
+        replayed = False
+        if resume:
+            replayed = self.replay()
+            if not replayed:
+                print("No run journal found – starting from the beginning.")
+        else:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+        self._append({"event": "run_started", "resume": replayed, **run_info})
+        self.run_info.update(run_info)
+        return replayed
+
+    def replay(self) -> bool:
+        """
+        Load the records of earlier runs. Returns False if there is no journal.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return False
+        if lines and not lines[-1].endswith("\n"):
+            # End the torn line, so the records this run appends stay readable
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n")
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a torn last line from the crash
+            event = record.get("event")
+            if event == "step_done":
+                self.steps[record["step"]] = record
+            elif event == "document_done":
+                self.documents[record["source"]] = record["package_path"]
+            elif event == "document_rejected":
+                self.documents.pop(record["source"], None)
+            elif event == "run_started":
+                self.run_info.update({k: v for k, v in record.items() if k not in ("event", "time", "resume")})
+
+        print(f"Replayed run journal: {len(self.steps)} step(s) and {len(self.documents)} document(s) done")
+        return True
+
+    def step_done(self, step: str, result: Any = None, outputs: Iterable[str] = ()):
+        """
+        Record that *step* completed, with its result and the paths it produced.
+        """
+        record = {"event": "step_done", "step": step, "result": result, "outputs": list(outputs)}
+        try:
+            json.dumps(result)
+        except (TypeError, ValueError):
+            record["result"] = None
+        self._append(record)
+        self.steps[step] = record
+
+    def completed_step(self, step: str) -> Optional[Dict[str, Any]]:
+        """
+        The record of *step* if an earlier run completed it and its outputs
+        still exist, otherwise None.
+        """
+        record = self.steps.get(step)
+        if record is None:
+            return None
+        missing = [path for path in record.get("outputs", []) if not os.path.exists(path)]
+        if missing:
+            print(f"⚠️  '{step}' was done before, but {missing[0]} is gone – running it again")
+            return None
+        return record
+
+    def document_done(self, source_path: str, package_path: str):
+        """
+        Record that *source_path* was packaged into *package_path*.
+        """
+        self._append({"event": "document_done", "source": source_path, "package_path": package_path})
+        self.documents[source_path] = package_path
+
+    def document_rejected(self, source_path: str):
+        """
+        Record that the package of *source_path* failed verification, so a
+        resumed run packages it again.
+        """
+        self._append({"event": "document_rejected", "source": source_path})
+        self.documents.pop(source_path, None)
+
+    def packaged_document(self, source_path: str) -> Optional[str]:
+        """
+        The package path of *source_path* if an earlier run packaged it and the
+        package folder still exists and is not empty, otherwise None.
+        """
+        package_path = self.documents.get(source_path)
+        if package_path and os.path.isdir(package_path) and os.listdir(package_path):
+            return package_path
+        return None
+
+    def finish(self):
+        self._append({"event": "run_finished"})
+
+    def _append(self, record: Dict[str, Any]):
+        record["time"] = time.time()
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            os.makedirs(self.archive_root, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
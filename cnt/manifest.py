@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, List, Any
+
+MANIFEST_NAME = ".cnt_manifest.json"
+
+
+class ArchiveManifest:
+    def __init__(self, archive_root: str):
+        """
+        Per-project record of what has been copied into an archive: for every
+        archived file its path relative to *archive_root*, and the size, mtime
+        and (optionally) hash of the source it was copied from. Later runs use
+        it to copy only new or changed files.
+
+        Args:
+            archive_root (str): The project's archive directory; the manifest is stored inside it
+        """
+        self.archive_root = archive_root
+        self.path = os.path.join(archive_root, MANIFEST_NAME)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, archive_root: str) -> "ArchiveManifest":
+        """
+        Load the manifest stored in *archive_root*, or start an empty one.
+        """
+        manifest = cls(archive_root)
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            manifest.entries = data.get("files", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable manifest {manifest.path}: {e}")
+        return manifest
+
+    def save(self):
+        """
+        Write the manifest atomically, so a crash never leaves it half-written.
+        """
+        with self._lock:
+            data = {"version": 1, "saved_at": time.time(), "files": self.entries}
+            os.makedirs(self.archive_root, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def relpath(self, destination_file: str) -> str:
+        return os.path.relpath(destination_file, self.archive_root).replace(os.sep, "/")
+
+    def is_unchanged(self, source_file: str, destination_file: str, source_stat: os.stat_result,
+                     use_hash: bool = False) -> bool:
+        """
+        True if *destination_file* is still an up-to-date copy of *source_file*.
+        With *use_hash*, a file whose mtime changed but whose content hash did not
+        (e.g. it was only touched) also counts as unchanged.
+        """
+        with self._lock:
+            entry = self.entries.get(self.relpath(destination_file))
+        if not entry or entry.get("deleted_from_source") or not os.path.exists(destination_file):
+            return False
+        if entry["size"] != source_stat.st_size:
+            return False
+        if entry["mtime_ns"] == source_stat.st_mtime_ns:
+            return True
+        if use_hash and entry.get("hash"):
+            return entry["hash"] == file_hash(source_file)
+        return False
+
+    def record(self, destination_file: str, source_stat: os.stat_result, digest: Optional[str] = None):
+        """
+        Record that *destination_file* now holds the source described by *source_stat*.
+        """
+        entry = {"size": source_stat.st_size, "mtime_ns": source_stat.st_mtime_ns}
+        if digest:
+            entry["hash"] = digest
+        with self._lock:
+            self.entries[self.relpath(destination_file)] = entry
+
+    def reconcile_deleted(self, destination_dir: str, seen: set, on_deleted: str = "flag") -> List[str]:
+        """
+        Handle manifest entries under *destination_dir* whose source no longer exists.
+
+        Args:
+            destination_dir (str): Archive subtree that was just synced
+            seen (set): Manifest keys (see relpath) that were present in the source this run
+            on_deleted (str): "flag" keeps the archived file and marks the entry,
+                              "remove" deletes the archived file and the entry
+
+        Returns:
+            list: Archive paths of files whose source was deleted; with "flag",
+                  only those not already flagged by an earlier run
+        """
+        prefix = self.relpath(destination_dir).rstrip("/") + "/"
+        deleted = []
+        with self._lock:
+            for rel in list(self.entries):
+                if not rel.startswith(prefix) or rel in seen:
+                    continue
+                if on_deleted != "remove" and self.entries[rel].get("deleted_from_source"):
+                    continue
+                archived = os.path.join(self.archive_root, *rel.split("/"))
+                deleted.append(archived)
+                if on_deleted == "remove":
+                    try:
+                        os.remove(archived)
+                    except FileNotFoundError:
+                        pass
+                    del self.entries[rel]
+                else:
+                    self.entries[rel]["deleted_from_source"] = True
+        return deleted
+
+
+def file_hash(path: str, algorithm: str = "blake2b", block_size: int = 1024 * 1024) -> str:
+    """
+    Hex digest of a file's content, read in fixed-size blocks.
+    """
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, Any
+from cnt.source_index import SourceIndex
+
+CACHE_NAME = ".cnt_package_cache.json"
+
+# Folders next to the .indd whose contents end up in the package
+ASSET_FOLDERS = ("Links", "Document fonts")
+
+
+class PackageCache:
+    def __init__(self, layout_dir: str, hash_document: bool = True, index: Optional[SourceIndex] = None):
+        """
+        Remembers which fingerprint each document had when it was packaged
+        into *layout_dir*, so a document whose .indd, links and fonts have not
+        changed since is skipped without being opened in InDesign.
+
+        The fingerprint covers the .indd itself (content hash, or size and
+        mtime with hash_document=False) plus the names, sizes and mtimes of
+        everything in the Links and Document fonts folders next to it. Chapters
+        sharing one Links folder are therefore all repackaged when any link
+        changes, which errs on the safe side.
+
+        Args:
+            layout_dir (str): The archive's <folder_id>_Layout directory; the cache is stored inside it
+            hash_document (bool): Hash the .indd content instead of trusting its mtime
+            index (SourceIndex): Index of the source project; asset sizes and mtimes
+                are read from it instead of walking the folders again
+        """
+        self.layout_dir = layout_dir
+        self.path = os.path.join(layout_dir, CACHE_NAME)
+        self.hash_document = hash_document
+        self.index = index
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("documents", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable package cache {self.path}: {e}")
+
+    def save(self):
+        with self._lock:
+            os.makedirs(self.layout_dir, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "documents": self.entries}, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def fingerprint(self, indd_path: str) -> str:
+        """
+        Fingerprint of the document and the assets it will package.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        stat = os.stat(indd_path)
+        digest.update(f"indd:{stat.st_size}".encode())
+        if self.hash_document:
+            with open(indd_path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        else:
+            digest.update(f":{stat.st_mtime_ns}".encode())
+
+        source_dir = os.path.dirname(indd_path)
+        for folder in ASSET_FOLDERS:
+            root = os.path.join(source_dir, folder)
+            for rel, size, mtime_ns in sorted(self._walk(root, "")):
+                digest.update(f"\n{folder}/{rel}:{size}:{mtime_ns}".encode())
+        return digest.hexdigest()
+
+    def _walk(self, root: str, prefix: str):
+        if self.index is not None and self.index.covers(root):
+            for dirpath, _dirs, filenames in self.index.walk(root):
+                rel_dir = os.path.relpath(dirpath, os.path.abspath(root))
+                for fname in filenames:
+                    entry = self.index.get(os.path.join(dirpath, fname))
+                    rel = fname if rel_dir == "." else f"{rel_dir}/{fname}".replace(os.sep, "/")
+                    yield f"{prefix}{rel}", entry.size, entry.mtime_ns
+            return
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    rel = f"{prefix}{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from self._walk(entry.path, rel + "/")
+                    else:
+                        stat = entry.stat()
+                        yield rel, stat.st_size, stat.st_mtime_ns
+        except FileNotFoundError:
+            return
+
+    def package_path_for(self, indd_path: str) -> str:
+        name = os.path.basename(indd_path)
+        if name.endswith(".indd"):
+            name = name[:-5]
+        return os.path.join(self.layout_dir, f"{name}_Packaged")
+
+    def lookup(self, indd_path: str, fingerprint: str) -> Optional[str]:
+        """
+        The existing package path if *indd_path* was packaged with this
+        fingerprint and the package still verifies, otherwise None.
+        """
+        with self._lock:
+            entry = self.entries.get(indd_path)
+        if not entry or entry["fingerprint"] != fingerprint:
+            self.misses += 1
+            return None
+        if not self.verify_package(entry["package_path"], indd_path):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["package_path"]
+
+    def store(self, indd_path: str, fingerprint: str, package_path: str):
+        """
+        Record a freshly packaged document and persist the cache.
+        """
+        with self._lock:
+            self.entries[indd_path] = {
+                "fingerprint": fingerprint,
+                "package_path": package_path,
+                "packaged_at": time.time(),
+            }
+        self.save()
+
+    def forget(self, indd_path: str):
+        """
+        Drop *indd_path* from the cache, e.g. because its package failed verification.
+        """
+        with self._lock:
+            removed = self.entries.pop(indd_path, None)
+        if removed is not None:
+            self.save()
+
+    @staticmethod
+    def verify_package(package_path: str, indd_path: str) -> bool:
+        """
+        A package is usable if its folder holds the packaged .indd and no empty files.
+        """
+        if not package_path or not os.path.isfile(os.path.join(package_path, os.path.basename(indd_path))):
+            return False
+        for dirpath, _dirs, filenames in os.walk(package_path):
+            for fname in filenames:
+                try:
+                    if os.path.getsize(os.path.join(dirpath, fname)) == 0:
+                        return False
+                except OSError:
+                    return False
+        return True
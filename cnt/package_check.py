@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+import threading
+from typing import Optional, Dict, List, Any, Tuple, NamedTuple
+from cnt.journal import RunJournal
+from cnt.package_cache import PackageCache, ASSET_FOLDERS
+from cnt.source_index import SourceIndex
+
+# Written by InDesign's package command when "creating report" is on
+PACKAGE_REPORT = "Instructions.txt"
+
+
+class PackageReport(NamedTuple):
+    """
+    What the package AppleScript saw while packaging a document, returned by
+    it as one JSON payload so no further scripting calls are needed.
+    """
+    package_path: str
+    document: str
+    font_count: int
+    missing_fonts: Tuple[str, ...]  # names of fonts that were not installed
+    link_count: int
+    missing_links: Tuple[str, ...]  # names of links missing or inaccessible
+    modified_links: Tuple[str, ...]  # names of links that were out of date
+    embedded_links: int
+    inspect_seconds: float
+    package_seconds: float
+
+
+def parse_package_report(output: str) -> Optional[PackageReport]:
+    """
+    Parse the package AppleScript's JSON result, or None if *output* isn't one.
+    """
+    try:
+        data = json.loads(output)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or "package_path" not in data:
+        return None
+    return PackageReport(
+        package_path=data["package_path"],
+        document=data.get("document", ""),
+        font_count=int(data.get("font_count", 0)),
+        missing_fonts=tuple(data.get("missing_fonts", ())),
+        link_count=int(data.get("link_count", 0)),
+        missing_links=tuple(data.get("missing_links", ())),
+        modified_links=tuple(data.get("modified_links", ())),
+        embedded_links=int(data.get("embedded_links", 0)),
+        inspect_seconds=float(data.get("inspect_seconds", 0.0)),
+        package_seconds=float(data.get("package_seconds", 0.0)),
+    )
+
+
+def package_problems(package_path: str, indd_path: str, index: Optional[SourceIndex] = None) -> List[str]:
+    """
+    What is wrong with the package of *indd_path* in *package_path*: the
+    package folder, the packaged .indd and the package report must exist,
+    no file may be empty, and every asset folder (Links, Document fonts)
+    the source document has must have been packaged too.
+
+    Args:
+        package_path (str): The document's <name>_Packaged folder
+        indd_path (str): The source .indd
+        index (SourceIndex): Index of the source project, used to look up its asset folders
+
+    Returns:
+        list: Problem descriptions; empty if the package is complete
+    """
+    if not package_path or not os.path.isdir(package_path):
+        return [f"package folder {package_path or '(none)'} is missing"]
+
+    problems = []
+    if not os.path.isfile(os.path.join(package_path, os.path.basename(indd_path))):
+        problems.append(f"{os.path.basename(indd_path)} is missing from the package")
+    if not os.path.isfile(os.path.join(package_path, PACKAGE_REPORT)):
+        problems.append(f"package report {PACKAGE_REPORT} is missing")
+
+    source_dir = os.path.dirname(indd_path)
+    for folder in ASSET_FOLDERS:
+        source_folder = os.path.join(source_dir, folder)
+        has_folder = (index.isdir(source_folder) if index is not None and index.covers(source_folder)
+                      else os.path.isdir(source_folder))
+        if has_folder and not os.path.isdir(os.path.join(package_path, folder)):
+            problems.append(f"'{folder}' folder is missing from the package")
+
+    for dirpath, _dirs, filenames in os.walk(package_path):
+        for fname in filenames:
+            fpath = os.path.join(dirpath, fname)
+            try:
+                if os.stat(fpath).st_size == 0:
+                    problems.append(f"{os.path.relpath(fpath, package_path)} is empty")
+            except OSError as e:
+                problems.append(f"could not stat {os.path.relpath(fpath, package_path)}: {e}")
+    return problems
+
+
+class PackageVerifier:
+    def __init__(self, journal: Optional[RunJournal] = None, package_cache: Optional[PackageCache] = None,
+                 index: Optional[SourceIndex] = None):
+        """
+        Checks each package as soon as its document finishes (WorkerPool runs
+        it on a background thread while InDesign moves on to the next
+        document), and undoes the journal and package-cache records of a
+        package that fails, so the retried document is really repackaged.
+
+        Args:
+            journal (RunJournal): Journal the packaged documents were recorded in
+            package_cache (PackageCache): Cache the packaged documents were stored in
+            index (SourceIndex): Index of the source project
+        """
+        self.journal = journal
+        self.package_cache = package_cache
+        self.index = index
+        self.checked = 0
+        self.rejected = 0
+        # Document → fonts reported missing while packaging; a warning, not a
+        # failure (a protected or unavailable font can never be packaged)
+        self.missing_fonts: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def verify(self, job, result: Dict[str, Any]) -> List[str]:
+        """
+        Problems with the package *result* reports for *job* (empty if it is complete).
+        Fonts the package script reported missing are recorded for print_summary().
+        """
+        with self._lock:
+            self.checked += 1
+        # A package staged on scratch is checked once it has reached the archive
+        move = result.get("move")
+        if move is not None:
+            moved = move.result()
+            if not moved["success"]:
+                return [moved["error"]]
+        problems = package_problems(result.get("package_path", ""), job.path, index=self.index)
+        report = result.get("report")
+        with self._lock:
+            if report is not None and report.missing_fonts:
+                self.missing_fonts[job.path] = report.missing_fonts
+            else:
+                self.missing_fonts.pop(job.path, None)
+        return problems
+
+    def reject(self, job, result: Dict[str, Any], retry: bool):
+        """
+        Forget a package that failed verification. When the document is
+        retried, the broken package folder is removed so InDesign starts
+        clean; otherwise it is kept for inspection.
+        """
+        with self._lock:
+            self.rejected += 1
+        if self.journal is not None:
+            self.journal.document_rejected(job.path)
+        if self.package_cache is not None:
+            self.package_cache.forget(job.path)
+        package_path = result.get("package_path")
+        if retry and package_path and os.path.isdir(package_path):
+            shutil.rmtree(package_path, ignore_errors=True)
+
+    def print_summary(self):
+        """
+        Print the packages that were made without some of their fonts.
+        """
+        if not self.missing_fonts:
+            return
+        print(f"⚠️  {len(self.missing_fonts)} package(s) made with missing fonts (not packaged):")
+        for path, fonts in sorted(self.missing_fonts.items()):
+            print(f"  {os.path.basename(path)}: {', '.join(fonts[:5])}{' …' if len(fonts) > 5 else ''}")
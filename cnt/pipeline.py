@@ -0,0 +1,175 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import Optional, Dict, Any, Callable, Iterable
+from cnt.journal import RunJournal
+
+
+class PipelineStep:
+    def __init__(self, name: str, func: Callable[[], Any], depends_on: Iterable[str] = (), background: bool = False,
+                 resumable: bool = False, outputs: Iterable[str] = ()):
+        """
+        One node of the pipeline's dependency graph.
+
+        Args:
+            name (str): Unique step name
+            func (callable): Zero-argument callable doing the work; its return value is the step result.
+                A dict result with "success": False marks the step incomplete: it isn't journaled,
+                so --resume runs it again
+            depends_on (iterable): Names of steps that must finish first
+            background (bool): Run on a worker thread instead of the calling (main) thread
+            resumable (bool): When resuming, skip the step if the journal says it completed
+            outputs (iterable): Paths the step produces; a resumed step is re-run if any is missing
+        """
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+        self.background = background
+        self.resumable = resumable
+        self.outputs = list(outputs)
+        self.resumed = False
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        self.skipped = False
+        self.incomplete = False
+
+
+class Pipeline:
+    def __init__(self, max_workers: int = 4, journal: Optional[RunJournal] = None):
+        """
+        Runs steps as a dependency graph. Foreground steps run on the calling
+        thread in the order they were added (Tk dialogs and InDesign scripting
+        stay on the main thread); background steps are handed to a worker pool
+        as soon as their dependencies have finished, so independent work
+        overlaps and no worker sits blocked waiting for another step.
+
+        Steps must be added after the steps they depend on.
+
+        Args:
+            max_workers (int): Size of the background worker pool
+            journal (RunJournal): Records completed steps; resumable steps found
+                completed in it (with their outputs present) are not run again
+        """
+        self.max_workers = max_workers
+        self.journal = journal
+        self.steps: Dict[str, PipelineStep] = {}
+        self.futures: Dict[str, Future] = {}
+        self.results: Dict[str, Any] = {}
+        self._t0 = 0.0
+
+    def add_step(self, name: str, func: Callable[[], Any], depends_on: Iterable[str] = (), background: bool = False,
+                 resumable: bool = False, outputs: Iterable[str] = ()):
+        """
+        Add a step to the graph. See PipelineStep for the arguments.
+        """
+        if name in self.steps:
+            raise ValueError(f"Duplicate pipeline step: {name}")
+        step = PipelineStep(name, func, depends_on=depends_on, background=background,
+                            resumable=resumable, outputs=outputs)
+        for dep in step.depends_on:
+            if dep not in self.steps:
+                raise ValueError(f"Step '{name}' depends on unknown or later step '{dep}'")
+        self.steps[name] = step
+        return step
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Execute every step. A step whose dependency failed is skipped.
+
+        Returns:
+            dict: step name → result (the exception for failed steps, None for skipped ones)
+        """
+        self._t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as pool:
+            for step in self.steps.values():
+                future: Future = Future()
+                self.futures[step.name] = future
+                if step.background:
+                    self._submit_when_ready(step, future, pool)
+                else:
+                    future.set_result(self._execute(step))
+
+            wait(list(self.futures.values()))
+
+        return self.results
+
+    def _submit_when_ready(self, step: PipelineStep, future: Future, pool: ThreadPoolExecutor):
+        # Submit the step once the last of its dependencies is done (right away
+        # if they already are); *future* resolves with the step's result
+        remaining = [len(step.depends_on)]
+        lock = threading.Lock()
+
+        def forward(done: Future):
+            if done.exception() is not None:
+                future.set_exception(done.exception())
+            else:
+                future.set_result(done.result())
+
+        def dependency_done(_dependency: Future):
+            with lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                pool.submit(self._execute, step).add_done_callback(forward)
+
+        if not step.depends_on:
+            pool.submit(self._execute, step).add_done_callback(forward)
+        for dep in step.depends_on:
+            self.futures[dep].add_done_callback(dependency_done)
+
+    def _execute(self, step: PipelineStep) -> Any:
+        # Only foreground steps can still have dependencies running
+        wait([self.futures[dep] for dep in step.depends_on])
+
+        failed = [dep for dep in step.depends_on if self.steps[dep].error is not None or self.steps[dep].skipped]
+        if failed:
+            print(f"⚠️  Skipping '{step.name}': dependency {', '.join(failed)} did not complete")
+            step.skipped = True
+            self.results[step.name] = None
+            return None
+
+        if step.resumable and self.journal is not None:
+            record = self.journal.completed_step(step.name)
+            if record is not None:
+                print(f"↻ '{step.name}' already completed in an earlier run – skipping")
+                step.resumed = True
+                self.results[step.name] = record.get("result")
+                return self.results[step.name]
+
+        step.started = time.perf_counter() - self._t0
+        try:
+            result = step.func()
+        except Exception as e:
+            print(f"✗ Step '{step.name}' failed: {e}")
+            step.error = e
+            result = e
+        step.finished = time.perf_counter() - self._t0
+
+        # Steps such as the copies report partial failures in their result instead of raising
+        if step.error is None and isinstance(result, dict) and result.get("success") is False:
+            step.incomplete = True
+            if step.resumable and self.journal is not None:
+                print(f"⚠️  '{step.name}' did not fully succeed – it will run again on --resume")
+
+        if step.error is None and not step.incomplete and self.journal is not None:
+            self.journal.step_done(step.name, result=result, outputs=step.outputs)
+
+        self.results[step.name] = result
+        return result
+
+    def print_timeline(self):
+        """
+        Print when each step started and finished, so overlap is visible.
+        """
+        print("\nPipeline timeline:")
+        for step in self.steps.values():
+            where = "bg" if step.background else "fg"
+            if step.skipped:
+                print(f"  [{where}] {step.name}: skipped")
+            elif step.resumed:
+                print(f"  [{where}] {step.name}: done in an earlier run")
+            elif step.started is not None:
+                status = "✗" if step.error else "⚠" if step.incomplete else "✓"
+                print(f"  [{where}] {status} {step.name}: {step.started:7.1f}s → {step.finished:7.1f}s "
+                      f"({step.finished - step.started:.1f}s)")
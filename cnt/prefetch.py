@@ -0,0 +1,240 @@
+import collections
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Optional, Dict, List, Iterable
+from cnt.copying import CopyEngine
+from cnt.package_cache import ASSET_FOLDERS
+from cnt.source_index import SourceIndex
+from cnt.io_scheduler import IOScheduler
+
+
+class _CacheEntry:
+    def __init__(self, local_path: str):
+        self.local_path = local_path
+        self.size = 0
+        self.pins = 0
+        self.ready = threading.Event()
+        self.ok = False
+
+
+class LinkPrefetcher:
+    def __init__(self, cache_root: Optional[str] = None, max_bytes: int = 10 * 1024 ** 3, lookahead: int = 1,
+                 index: Optional[SourceIndex] = None, io_scheduler: Optional[IOScheduler] = None):
+        """
+        Copies upcoming documents (the .indd and the Links and Document fonts
+        folders next to it) from the source project to a local cache while
+        the current document packages, so InDesign opens and packages them
+        from local disk instead of reading every link over the network.
+
+        Documents are fetched in packaging order, at most *lookahead*
+        documents ahead of the ones taken. Folders shared by several
+        documents (one Links folder for a whole book) are fetched once. The
+        cache is capped at *max_bytes*; least recently used entries that no
+        document is using are evicted first, and a document that doesn't fit
+        is simply opened from the source.
+
+        Args:
+            cache_root (str): Local folder the cache is created in, one private folder per
+                run so concurrent runs don't share it (default: the system temp dir)
+            max_bytes (int): Size cap of the cache
+            lookahead (int): Documents fetched ahead of the ones being packaged
+            index (SourceIndex): Index of the source project, for sizes without extra stat calls
+            io_scheduler (IOScheduler): Limits the fetches' load on the source volume
+        """
+        if cache_root:
+            os.makedirs(cache_root, exist_ok=True)
+        self.cache_root = tempfile.mkdtemp(prefix="cnt_link_cache_", dir=cache_root)
+        self.max_bytes = max_bytes
+        self.lookahead = max(1, lookahead)
+        self.index = index
+        self.copy_engine = CopyEngine(scheduler=io_scheduler)
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.fetch_seconds = 0.0
+        self.fetched_bytes = 0
+        self._entries: "collections.OrderedDict[str, _CacheEntry]" = collections.OrderedDict()
+        self._cond = threading.Condition()
+        self._taken = 0
+        self._pinned: Dict[str, List[List[_CacheEntry]]] = {}
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def local_dir(self, source_dir: str) -> str:
+        # Mirrors a source folder, so the .indd still finds Links next to it
+        key = hashlib.blake2b(os.path.abspath(source_dir).encode(), digest_size=8).hexdigest()
+        return os.path.join(self.cache_root, key)
+
+    def _parts(self, indd_path: str) -> List[str]:
+        source_dir = os.path.dirname(indd_path)
+        parts = [indd_path]
+        for folder in ASSET_FOLDERS:
+            path = os.path.join(source_dir, folder)
+            exists = (self.index.isdir(path) if self.index is not None and self.index.covers(path)
+                      else os.path.isdir(path))
+            if exists:
+                parts.append(path)
+        return parts
+
+    def _size(self, path: str) -> int:
+        if self.index is not None and self.index.covers(path):
+            entry = self.index.get(path)
+            return self.index.tree_size(path) if self.index.isdir(path) else (entry.size if entry else 0)
+        if os.path.isfile(path):
+            return os.path.getsize(path)
+        return sum(os.path.getsize(os.path.join(dirpath, name))
+                   for dirpath, _dirs, names in os.walk(path) for name in names)
+
+    def schedule(self, paths: Iterable[str]):
+        """
+        Start fetching *paths* in the background, in the order they will be packaged.
+        """
+        paths = list(paths)
+        self._thread = threading.Thread(target=self._run, args=(paths,), name="prefetch", daemon=True)
+        self._thread.start()
+
+    def _run(self, paths: List[str]):
+        for position, indd_path in enumerate(paths):
+            with self._cond:
+                while not self._stopped and position >= self._taken + self.lookahead:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+            self._fetch_document(indd_path)
+
+    def _fetch_document(self, indd_path: str) -> bool:
+        parts = self._parts(indd_path)
+        with self._cond:
+            # Room for the whole document first, so none of its parts is evicted for another
+            missing = [part for part in parts if part not in self._entries]
+            if not self._make_room(sum(self._size(part) for part in missing), keep=parts):
+                print(f"   prefetch: no room in the cache for {os.path.basename(indd_path)}")
+                return False
+        return all(self._fetch(part, keep=parts) for part in parts)
+
+    def _fetch(self, source_path: str, keep: Iterable[str] = ()) -> bool:
+        local_path = os.path.join(self.local_dir(os.path.dirname(source_path)), os.path.basename(source_path))
+        with self._cond:
+            entry = self._entries.get(source_path)
+            if entry is not None:
+                self._entries.move_to_end(source_path)
+                return entry.ok or not entry.ready.is_set()
+            size = self._size(source_path)
+            if not self._make_room(size, keep):
+                print(f"   prefetch: no room in the cache for {os.path.basename(source_path)}")
+                return False
+            entry = self._entries[source_path] = _CacheEntry(local_path)
+            entry.size = size
+            self.used_bytes += size
+
+        started = time.perf_counter()
+        try:
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            if os.path.isdir(source_path):
+                result = self.copy_engine.copy_tree(source_path, local_path, index=self.index)
+                entry.ok = not result["errors"]
+            else:
+                self.copy_engine.copy_file(source_path, local_path)
+                entry.ok = True
+        except OSError as e:
+            print(f"   prefetch of {os.path.basename(source_path)} failed: {e}")
+            entry.ok = False
+        with self._cond:
+            self.fetch_seconds += time.perf_counter() - started
+            if entry.ok:
+                self.fetched_bytes += entry.size
+        entry.ready.set()
+        return entry.ok
+
+    def _make_room(self, size: int, keep: Iterable[str] = ()) -> bool:
+        # Caller holds self._cond; entries in *keep* are never evicted
+        keep = set(keep)
+        for source_path in list(self._entries):
+            if self.used_bytes + size <= self.max_bytes:
+                break
+            entry = self._entries[source_path]
+            if entry.pins or not entry.ready.is_set() or source_path in keep:
+                continue
+            del self._entries[source_path]
+            self.used_bytes -= entry.size
+            self.evictions += 1
+            if os.path.isdir(entry.local_path):
+                shutil.rmtree(entry.local_path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(entry.local_path)
+                except FileNotFoundError:
+                    pass
+        return self.used_bytes + size <= self.max_bytes
+
+    def take(self, indd_path: str) -> Optional[str]:
+        """
+        The local copy of *indd_path* to open, waiting for a fetch in progress,
+        or None if it isn't cached (open it from the source). The document's
+        cache entries stay pinned until release().
+        """
+        parts = self._parts(indd_path)
+        with self._cond:
+            self._taken += 1
+            self._cond.notify_all()
+            entries = [self._entries.get(part) for part in parts]
+            if any(entry is None for entry in entries):
+                self.misses += 1
+                return None
+            for entry in entries:
+                entry.pins += 1
+
+        for entry in entries:
+            entry.ready.wait()
+        with self._cond:
+            if not all(entry.ok for entry in entries):
+                for entry in entries:
+                    entry.pins -= 1
+                self.misses += 1
+                return None
+            for part in parts:
+                self._entries.move_to_end(part)
+            self._pinned.setdefault(indd_path, []).append(entries)
+            self.hits += 1
+        return entries[0].local_path
+
+    def skip(self, indd_path: str):
+        """
+        *indd_path* won't be opened (e.g. its package is up to date); let the
+        prefetcher move on to the documents after it.
+        """
+        with self._cond:
+            self._taken += 1
+            self._cond.notify_all()
+
+    def release(self, indd_path: str):
+        """
+        Unpin the cache entries taken for *indd_path*; they may be evicted from now on.
+        """
+        with self._cond:
+            taken = self._pinned.get(indd_path)
+            if not taken:
+                return
+            for entry in taken.pop():
+                entry.pins -= 1
+
+    def close(self):
+        """
+        Stop fetching and remove this run's cache folder.
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        shutil.rmtree(self.cache_root, ignore_errors=True)
+
+    def print_summary(self):
+        rate = self.fetched_bytes / 1048576 / self.fetch_seconds if self.fetch_seconds else 0.0
+        print(f"Prefetch: {self.hits} document(s) opened from the local cache, {self.misses} from the source; "
+              f"{self.fetched_bytes / 1048576:.1f} MB fetched at {rate:.1f} MB/s, {self.evictions} eviction(s)")
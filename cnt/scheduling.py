@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+from typing import Optional, Dict, List, Any, Iterable
+from cnt.source_index import SourceIndex
+
+HISTORY_NAME = ".cnt_package_timings.json"
+
+# Used until there is history to calibrate against
+DEFAULT_SECONDS_PER_MB = 0.5
+DEFAULT_BASE_SECONDS = 15.0
+
+# Weight of the newest measurement in the running average of a document's duration
+SMOOTHING = 0.5
+
+
+class CostEstimator:
+    def __init__(self, history_path: Optional[str] = None, index: Optional[SourceIndex] = None):
+        """
+        Estimates how long each document will take to package, so the job list
+        can be ordered largest-first: long jobs start early and the tail of the
+        run isn't stretched by a huge cover landing last.
+
+        Documents seen before are estimated from their measured durations;
+        new ones from the size of the .indd plus its Links folder, at a
+        seconds-per-MB rate calibrated from past runs.
+
+        Args:
+            history_path (str): Timing history file; defaults to one shared by
+                every project under ~/Documents/Archived_Projects
+            index (SourceIndex): Index of the project folder; sizes are read from it
+                instead of walking the Links folders again
+        """
+        self.history_path = history_path or os.path.join(
+            os.path.expanduser("~/Documents/Archived_Projects"), HISTORY_NAME)
+        self.history: Dict[str, Dict[str, Any]] = {}
+        self.index = index
+        self._link_sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.history_path, "r", encoding="utf-8") as f:
+                self.history = json.load(f).get("documents", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable timing history {self.history_path}: {e}")
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.history_path), exist_ok=True)
+            tmp_path = f"{self.history_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "documents": self.history}, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.history_path)
+
+    def document_bytes(self, indd_path: str) -> int:
+        """
+        Size of the .indd plus everything in the Links folder next to it.
+        """
+        links = os.path.join(os.path.dirname(indd_path), "Links")
+        if self.index is not None and self.index.covers(indd_path):
+            entry = self.index.get(indd_path)
+            return (entry.size if entry else 0) + self.index.tree_size(links)
+
+        try:
+            size = os.path.getsize(indd_path)
+        except OSError:
+            size = 0
+        if links not in self._link_sizes:
+            self._link_sizes[links] = _tree_size(links)
+        return size + self._link_sizes[links]
+
+    def seconds_per_mb(self) -> float:
+        """
+        Packaging rate calibrated from every document in the history.
+        """
+        seconds = sum(max(0.0, e["seconds"] - DEFAULT_BASE_SECONDS) for e in self.history.values())
+        megabytes = sum(e.get("bytes", 0) for e in self.history.values()) / 1048576
+        if seconds and megabytes:
+            return seconds / megabytes
+        return DEFAULT_SECONDS_PER_MB
+
+    def estimate(self, indd_path: str) -> float:
+        """
+        Estimated packaging time of *indd_path* in seconds.
+        """
+        entry = self.history.get(indd_path)
+        if entry:
+            return entry["seconds"]
+        return DEFAULT_BASE_SECONDS + self.document_bytes(indd_path) / 1048576 * self.seconds_per_mb()
+
+    def order(self, paths: Iterable[str]) -> List[str]:
+        """
+        *paths* sorted by estimated cost, most expensive first.
+        """
+        paths = list(paths)
+        estimates = {path: self.estimate(path) for path in paths}
+        ordered = sorted(paths, key=lambda path: estimates[path], reverse=True)
+
+        total = sum(estimates.values())
+        print(f"Packaging plan: {len(ordered)} document(s), about {total / 60:.1f} min of InDesign time")
+        for path in ordered:
+            source = "history" if path in self.history else "size"
+            print(f"  ~{estimates[path]:6.0f}s  {os.path.basename(path)} ({source})")
+        return ordered
+
+    def record(self, indd_path: str, seconds: float):
+        """
+        Fold a measured packaging duration into the document's history.
+        """
+        with self._lock:
+            entry = self.history.get(indd_path)
+            if entry:
+                entry["seconds"] = SMOOTHING * seconds + (1 - SMOOTHING) * entry["seconds"]
+                entry["runs"] = entry.get("runs", 1) + 1
+            else:
+                entry = {"seconds": seconds, "runs": 1}
+                self.history[indd_path] = entry
+            entry["bytes"] = self.document_bytes(indd_path)
+
+
+def _tree_size(root: str) -> int:
+    total = 0
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    total += _tree_size(entry.path)
+                elif entry.is_file():
+                    total += entry.stat().st_size
+    except OSError:
+        pass
+    return total
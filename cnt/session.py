@@ -0,0 +1,280 @@
+import os
+import time
+from datetime import datetime
+from typing import Optional, Dict, List, Any
+from cnt.fonts import FontActivation
+from cnt.journal import RunJournal
+from cnt.package_cache import PackageCache
+from cnt.dedup import unshare_package
+from cnt.staging import PackageStager
+from cnt.prefetch import LinkPrefetcher
+
+
+class RecyclePolicy:
+    def __init__(self, max_documents=20, max_memory_mb=8192, recycle_on_error=True):
+        """
+        Decide when a warm InDesign session should be quit and relaunched.
+
+        Args:
+            max_documents (int or None): Relaunch after this many documents. None disables the limit.
+            max_memory_mb (float or None): Relaunch once InDesign's resident memory exceeds this. None disables the check.
+            recycle_on_error (bool): Relaunch after any document that failed to open or package.
+        """
+        self.max_documents = max_documents
+        self.max_memory_mb = max_memory_mb
+        self.recycle_on_error = recycle_on_error
+
+    def recycle_reason(self, documents_since_launch: int, memory_mb: Optional[float], had_error: bool) -> Optional[str]:
+        """
+        Returns a short reason string if the session should be recycled, None otherwise.
+        """
+        if had_error and self.recycle_on_error:
+            return "error"
+        if self.max_documents and documents_since_launch >= self.max_documents:
+            return f"{documents_since_launch} documents"
+        if self.max_memory_mb and memory_mb and memory_mb >= self.max_memory_mb:
+            return f"{memory_mb:.0f} MB resident"
+        return None
+
+
+class InDesignSession:
+    def __init__(self, apple_script_agent, policy: Optional[RecyclePolicy] = None,
+                 font_activation: Optional[FontActivation] = None, journal: Optional[RunJournal] = None,
+                 package_cache: Optional[PackageCache] = None, stager: Optional[PackageStager] = None,
+                 prefetcher: Optional[LinkPrefetcher] = None):
+        """
+        Keeps one InDesign session open across many documents, closing only the
+        packaged document and relaunching the app only when the policy says so.
+
+        Args:
+            apple_script_agent (AppleScript): Agent used to drive InDesign
+            policy (RecyclePolicy): When to quit and relaunch InDesign
+            font_activation (FontActivation): Run-level font state; Connect is only
+                refreshed again when an opened document reports missing fonts
+            journal (RunJournal): Records packaged documents; documents it already
+                holds a package for are skipped
+            package_cache (PackageCache): Documents whose fingerprint matches a verified
+                existing package are skipped without being opened
+            stager (PackageStager): Package onto local scratch and move the package
+                to the archive in the background; waits for scratch space first
+            prefetcher (LinkPrefetcher): Open documents from a local copy of the .indd
+                and its Links, fetched while the previous document packaged
+        """
+        self.agent = apple_script_agent
+        self.policy = policy or RecyclePolicy()
+        self.font_activation = font_activation or FontActivation(apple_script_agent)
+        self.journal = journal
+        self.package_cache = package_cache
+        self.stager = stager
+        self.prefetcher = prefetcher
+        self.documents_since_launch = 0
+        self.cold = True  # the first open of a session pays the app launch
+        self.recycle_count = 0
+        self.timings: List[Dict[str, Any]] = []
+
+    def package_if_needed(self, path: str, folder_id: str, project_name: str,
+                          layout_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Package *path* unless the journal or the package cache shows an
+        existing package for it.
+
+        Returns:
+            dict: The package result (existing packages report success)
+        """
+        package_path = self.journal.packaged_document(path) if self.journal else None
+        if package_path:
+            print(f"↻ already packaged in an earlier run → {package_path}")
+            if self.prefetcher is not None:
+                self.prefetcher.skip(path)
+            return {"success": True, "message": f"Package exists at {package_path}",
+                    "package_path": package_path}
+
+        fingerprint = self._fingerprint(path)
+        package_path = self.package_cache.lookup(path, fingerprint) if fingerprint else None
+        if package_path:
+            print(f"↻ unchanged since it was last packaged → {package_path}")
+            if self.prefetcher is not None:
+                self.prefetcher.skip(path)
+            if self.journal is not None:
+                self.journal.document_done(path, package_path)
+            return {"success": True, "message": f"Package up to date at {package_path}",
+                    "package_path": package_path, "cached": True}
+
+        return self.package_document(path, folder_id=folder_id, project_name=project_name,
+                                     fingerprint=fingerprint, layout_dir=layout_dir)
+
+    def _fingerprint(self, path: str) -> Optional[str]:
+        if self.package_cache is None:
+            return None
+        try:
+            return self.package_cache.fingerprint(path)
+        except OSError as e:
+            print(f"⚠️  Could not fingerprint {os.path.basename(path)}: {e}")
+            return None
+
+    def package_document(self, path: str, folder_id: str, project_name: str,
+                         fingerprint: Optional[str] = None, layout_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Package a single document into *layout_dir* (by default the archive's
+        Layout folder for *project_name*) and apply the recycle policy afterwards.
+        With a *fingerprint*, a successful package is recorded in the package cache.
+
+        Returns:
+            dict: The package result from AppleScript.package_indesign_file
+        """
+        timing = {
+            "document": os.path.basename(path),
+            "path": path,
+            "cold_start": self.cold,
+            "open_seconds": 0.0,
+            "package_seconds": 0.0,
+            "close_seconds": 0.0,
+            "success": False,
+            "recycled": None,
+        }
+        started = time.perf_counter()
+        layout_dir = layout_dir or self.agent.archive_layout_dir(folder_id, project_name)
+        # Wait for scratch space before InDesign starts on the document
+        slot = self.stager.reserve(path) if self.stager is not None else None
+        handed_off = False
+        try:
+            local_path = self.prefetcher.take(path) if self.prefetcher is not None else None
+            opened = self.agent.open_indesign_file(local_path or path)
+            if opened and local_path:
+                # The copied document still links to the source; point it at the local Links
+                self.agent.relink_to_folder(os.path.join(os.path.dirname(local_path), "Links"))
+            timing["open_seconds"] = time.perf_counter() - started
+            timing["prefetched"] = bool(local_path)
+            self.cold = False
+
+            if opened:
+                self.font_activation.ensure_active()
+                self.font_activation.check_document()
+                # Files deduplicated into hardlinks by an earlier run are shared
+                # with other packages; InDesign must not overwrite them in place
+                name = os.path.basename(path)[:-5] if path.endswith(".indd") else os.path.basename(path)
+                package_path = os.path.join(layout_dir, f"{name}_Packaged")
+                if os.path.isdir(package_path):
+                    unshare_package(package_path)
+                phase = time.perf_counter()
+                pkg = self.agent.package_indesign_file(folder_id=folder_id, project_name=project_name,
+                                                       refresh_fonts=False,
+                                                       layout_dir=slot.layout_dir if slot is not None else layout_dir)
+                timing["package_seconds"] = time.perf_counter() - phase
+            else:
+                pkg = {"success": False, "error": f"Could not open {path}"}
+
+            if slot is not None and pkg["success"]:
+                # The verifier waits on "move" before checking the package in the archive;
+                # the document is only recorded as packaged once the move succeeded
+                move = self.stager.hand_off(slot, pkg["package_path"], layout_dir,
+                                            on_moved=lambda moved_path: self._record_package(path, fingerprint,
+                                                                                             moved_path))
+                handed_off = True
+                pkg["package_path"] = self.stager.final_path(pkg["package_path"], layout_dir)
+                pkg["message"] = f"Package staged, moving to {pkg['package_path']}"
+                pkg["move"] = move
+
+            if pkg["success"]:
+                print(f"{datetime.now():%Y-%m-%d %H:%M:%S} ✓ packaged → {pkg['message']}")
+                report = pkg.get("report")
+                if report is not None:
+                    timing["missing_fonts"] = len(report.missing_fonts)
+                    timing["missing_links"] = len(report.missing_links)
+                    if report.missing_fonts:
+                        print(f"⚠️  {len(report.missing_fonts)} missing font(s) not packaged: "
+                              f"{', '.join(report.missing_fonts[:5])}")
+                    if report.missing_links:
+                        print(f"⚠️  {len(report.missing_links)} missing link(s) not packaged: "
+                              f"{', '.join(report.missing_links[:5])}")
+                    if report.modified_links:
+                        print(f"   {len(report.modified_links)} out-of-date link(s) updated while packaging")
+            else:
+                print(f"{datetime.now():%Y-%m-%d %H:%M:%S}  ✗ packaging failed:", pkg.get("error"))
+
+            phase = time.perf_counter()
+            closed = self.agent.close_indesign_document()
+            timing["close_seconds"] = time.perf_counter() - phase
+        finally:
+            # An error anywhere above must not leak the scratch reservation
+            # (reserve() would block forever once the budget is used up) or
+            # keep the prefetched files pinned
+            if slot is not None and not handed_off:
+                self.stager.release(slot)
+            if self.prefetcher is not None:
+                self.prefetcher.release(path)
+
+        self.documents_since_launch += 1
+        had_error = not (opened and pkg["success"] and closed)
+        reason = self.policy.recycle_reason(
+            documents_since_launch=self.documents_since_launch,
+            memory_mb=self.agent.indesign_memory_mb() if self.policy.max_memory_mb else None,
+            had_error=had_error
+        )
+        if reason:
+            print(f"Recycling InDesign ({reason})...")
+            self.restart()
+            timing["recycled"] = reason
+
+        if pkg["success"] and not handed_off:
+            self._record_package(path, fingerprint, pkg.get("package_path", ""))
+
+        timing["success"] = bool(pkg["success"])
+        timing["total_seconds"] = time.perf_counter() - started
+        self.timings.append(timing)
+        return pkg
+
+    def _record_package(self, path: str, fingerprint: Optional[str], package_path: str):
+        # Journal and cache the package only once it is in its final place,
+        # so --resume never skips a document whose package didn't arrive
+        if self.journal is not None:
+            self.journal.document_done(path, package_path)
+        if fingerprint and self.package_cache is not None:
+            self.package_cache.store(path, fingerprint, package_path)
+
+    def restart(self):
+        """
+        Quit InDesign so the next document opens in a fresh app.
+        """
+        self.agent.close_indesign()
+        self.agent.waiter.until("InDesign exited", lambda: not self.agent.is_indesign_running(), timeout=60)
+        self.documents_since_launch = 0
+        self.cold = True
+        self.recycle_count += 1
+
+    def shutdown(self):
+        """
+        Quit InDesign at the end of the batch (if this session launched it at all).
+        """
+        if not self.cold:
+            self.agent.close_indesign()
+        self.documents_since_launch = 0
+        self.cold = True
+
+    def print_timings(self):
+        """
+        Print per-document timings and a short summary of the batch.
+        """
+        if not self.timings:
+            return
+
+        print("\nPer-document packaging times:")
+        for idx, t in enumerate(self.timings, 1):
+            start = "cold" if t["cold_start"] else "warm"
+            status = "✓" if t["success"] else "✗"
+            line = (f"  {idx}. {status} {t['document']} [{start}] "
+                    f"open {t['open_seconds']:.1f}s, package {t['package_seconds']:.1f}s, "
+                    f"close {t['close_seconds']:.1f}s, total {t['total_seconds']:.1f}s")
+            if t["recycled"]:
+                line += f" → recycled ({t['recycled']})"
+            print(line)
+
+        total = sum(t["total_seconds"] for t in self.timings)
+        cold = [t["open_seconds"] for t in self.timings if t["cold_start"]]
+        warm = [t["open_seconds"] for t in self.timings if not t["cold_start"]]
+        print(f"Packaged {len(self.timings)} documents in {total:.1f}s "
+              f"({total / len(self.timings):.1f}s avg), {self.recycle_count} recycle(s).")
+        if cold and warm:
+            print(f"Average open: cold {sum(cold) / len(cold):.1f}s, warm {sum(warm) / len(warm):.1f}s")
+        if self.package_cache is not None and self.package_cache.hits:
+            print(f"Skipped {self.package_cache.hits} unchanged document(s) via the package cache")
@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional, Dict, List, Tuple, NamedTuple, Iterator
+
+
+class IndexEntry(NamedTuple):
+    path: str
+    name: str
+    size: int
+    mtime_ns: int
+    is_dir: bool
+    stat: Optional[os.stat_result]
+
+
+class SourceIndex:
+    def __init__(self, root: str):
+        """
+        In-memory listing of a source project (path, size, mtime, type and the
+        stat result of every entry), built by one os.scandir pass so the copy,
+        print-PDF, document discovery and planning steps don't list the same
+        folders again – on a NAS every listing is a network round trip.
+
+        The index is a snapshot: build it once the project folder has stopped
+        changing. Paths outside the indexed root fall back to the filesystem
+        in the callers.
+
+        Args:
+            root (str): Project folder to index
+        """
+        self.root = os.path.normpath(os.path.abspath(root))
+        self.entries: Dict[str, IndexEntry] = {}
+        self.children: Dict[str, List[IndexEntry]] = {}
+        self.errors: List[Tuple[str, str]] = []
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, root: str, max_workers: int = 8) -> "SourceIndex":
+        """
+        Index *root*, scanning directories concurrently so NAS latency overlaps.
+
+        Returns:
+            SourceIndex: The populated index
+        """
+        index = cls(root)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="index") as pool:
+            pending = {pool.submit(index._scan, index.root)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.update(pool.submit(index._scan, subdir) for subdir in future.result())
+        index.seconds = time.perf_counter() - started
+        return index
+
+    def _scan(self, directory: str) -> List[str]:
+        listing: List[IndexEntry] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                        stat = entry.stat()
+                    except OSError as e:
+                        # Dangling symlink or vanished file
+                        with self._lock:
+                            self.errors.append((entry.path, str(e)))
+                        continue
+                    listing.append(IndexEntry(entry.path, entry.name, 0 if is_dir else stat.st_size,
+                                              stat.st_mtime_ns, is_dir, stat))
+                    # Like os.walk, symlinked folders are listed but not descended into
+                    if is_dir and not entry.is_symlink():
+                        subdirs.append(entry.path)
+        except OSError as e:
+            with self._lock:
+                self.errors.append((directory, str(e)))
+            return []
+
+        with self._lock:
+            self.children[directory] = listing
+            for item in listing:
+                self.entries[item.path] = item
+        return subdirs
+
+    def _norm(self, path: str) -> str:
+        return os.path.normpath(os.path.abspath(path))
+
+    def covers(self, path: str) -> bool:
+        """
+        True if *path* lies inside the indexed tree.
+        """
+        path = self._norm(path)
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def get(self, path: str) -> Optional[IndexEntry]:
+        return self.entries.get(self._norm(path))
+
+    def exists(self, path: str) -> bool:
+        path = self._norm(path)
+        return path == self.root or path in self.entries
+
+    def isdir(self, path: str) -> bool:
+        path = self._norm(path)
+        return path in self.children
+
+    def stat(self, path: str) -> Optional[os.stat_result]:
+        entry = self.entries.get(self._norm(path))
+        return entry.stat if entry else None
+
+    def listdir(self, path: str) -> List[IndexEntry]:
+        """
+        Entries directly inside *path* (empty if it isn't an indexed folder).
+        """
+        return list(self.children.get(self._norm(path), []))
+
+    def files(self, path: str, suffix: str = "", prefix: str = "") -> List[str]:
+        """
+        Sorted paths of the files directly inside *path* whose name has the given
+        prefix and (case-insensitive) suffix, e.g. files(layout, suffix=".indd").
+        """
+        return sorted(entry.path for entry in self.listdir(path)
+                      if not entry.is_dir and entry.name.startswith(prefix)
+                      and entry.name.lower().endswith(suffix.lower()))
+
+    def walk(self, top: str) -> Iterator[Tuple[str, List[str], List[str]]]:
+        """
+        os.walk over the index: yields (dirpath, dirnames, filenames), top-down.
+        """
+        top = self._norm(top)
+        listing = self.children.get(top)
+        if listing is None:
+            return
+        dirnames = [entry.name for entry in listing if entry.is_dir]
+        filenames = [entry.name for entry in listing if not entry.is_dir]
+        yield top, dirnames, filenames
+        for name in dirnames:
+            yield from self.walk(os.path.join(top, name))
+
+    def tree_size(self, path: str) -> int:
+        """
+        Total bytes of the files under *path*.
+        """
+        return sum(self.entries[os.path.join(dirpath, name)].size
+                   for dirpath, _dirs, filenames in self.walk(path) for name in filenames)
+
+    def print_summary(self):
+        """
+        Print how much was indexed and how long the pass took.
+        """
+        files = [entry for entry in self.entries.values() if not entry.is_dir]
+        total = sum(entry.size for entry in files)
+        print(f"Indexed {len(files)} files in {len(self.children)} folders ({total / 1048576:.1f} MB) "
+              f"of {self.root} in {self.seconds:.2f}s")
+        if self.errors:
+            print(f"⚠️  {len(self.errors)} entries could not be read while indexing, first: "
+                  f"{self.errors[0][0]}: {self.errors[0][1]}")
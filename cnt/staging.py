@@ -0,0 +1,200 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, List, Any, Callable
+from cnt.copying import CopyEngine
+from cnt.scheduling import CostEstimator
+from cnt.io_scheduler import IOScheduler
+
+
+class StagingSlot:
+    def __init__(self, indd_path: str, layout_dir: str, reserved: int):
+        """
+        Scratch space reserved for packaging one document.
+
+        Args:
+            indd_path (str): The document being packaged
+            layout_dir (str): Scratch folder InDesign packages into
+            reserved (int): Bytes of the scratch budget held by this slot
+        """
+        self.indd_path = indd_path
+        self.layout_dir = layout_dir
+        self.reserved = reserved
+
+
+class PackageStager:
+    def __init__(self, scratch_root: Optional[str] = None, budget_bytes: int = 20 * 1024 ** 3,
+                 max_movers: int = 2, estimator: Optional[CostEstimator] = None,
+                 io_scheduler: Optional[IOScheduler] = None):
+        """
+        Lets InDesign package onto fast local scratch instead of the (possibly
+        network) archive volume, and moves each finished package to its
+        <folder_id>_Layout folder on background threads while InDesign works
+        on the next document.
+
+        Scratch use is bounded by *budget_bytes*: reserve() blocks until the
+        moves in flight have freed enough space for the next package, so a
+        slow archive volume slows packaging down instead of filling the disk.
+        A single package larger than the budget is still let through once
+        nothing else is staged.
+
+        Args:
+            scratch_root (str): Local scratch folder (default: a folder in the system temp dir)
+            budget_bytes (int): Most scratch space staged packages may use at once
+            max_movers (int): Packages moved to the archive at the same time
+            estimator (CostEstimator): Estimates a package's size from its .indd and Links
+            io_scheduler (IOScheduler): Limits the moves' load on the archive volume
+        """
+        self.scratch_root = scratch_root or os.path.join(tempfile.gettempdir(), "cnt_scratch")
+        self.budget_bytes = budget_bytes
+        self.estimator = estimator or CostEstimator()
+        self.copy_engine = CopyEngine(scheduler=io_scheduler)
+        self.used_bytes = 0
+        self.peak_bytes = 0
+        self.wait_seconds = 0.0
+        self.moved: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+        self._movers = ThreadPoolExecutor(max_workers=max_movers, thread_name_prefix="mover")
+
+    def reserve(self, indd_path: str) -> StagingSlot:
+        """
+        Reserve scratch space for packaging *indd_path*, waiting while the budget is used up.
+        """
+        # Fonts and profiles add a little to the .indd and its links
+        estimate = int(self.estimator.document_bytes(indd_path) * 1.1) + 1024 * 1024
+        started = time.perf_counter()
+        with self._cond:
+            while self.used_bytes and self.used_bytes + estimate > self.budget_bytes:
+                self._cond.wait()
+            self.used_bytes += estimate
+            self.peak_bytes = max(self.peak_bytes, self.used_bytes)
+        waited = time.perf_counter() - started
+        self.wait_seconds += waited
+        if waited >= 1.0:
+            print(f"   waited {waited:.1f}s for scratch space")
+
+        layout_dir = os.path.join(self.scratch_root, uuid.uuid4().hex)
+        os.makedirs(layout_dir)
+        return StagingSlot(indd_path, layout_dir, estimate)
+
+    def release(self, slot: StagingSlot):
+        """
+        Give the slot's space back and remove its scratch folder.
+        """
+        shutil.rmtree(slot.layout_dir, ignore_errors=True)
+        with self._cond:
+            self.used_bytes -= slot.reserved
+            slot.reserved = 0
+            self._cond.notify_all()
+
+    def hand_off(self, slot: StagingSlot, package_path: str, final_layout_dir: str,
+                 on_moved: Optional[Callable[[str], None]] = None) -> Future:
+        """
+        Move a package written into *slot* to *final_layout_dir* in the
+        background. The reservation is corrected to the package's real size.
+        *on_moved* is called with the final package path once the package is
+        in place, before the future resolves.
+
+        Returns:
+            Future: Resolves to {'success', 'package_path', 'bytes', 'seconds'} and, on failure, 'error'
+        """
+        actual = _tree_size(package_path)
+        with self._cond:
+            self.used_bytes += actual - slot.reserved
+            slot.reserved = actual
+            self.peak_bytes = max(self.peak_bytes, self.used_bytes)
+            self._cond.notify_all()
+        return self._movers.submit(self._move, slot, package_path, final_layout_dir, on_moved)
+
+    def final_path(self, package_path: str, final_layout_dir: str) -> str:
+        return os.path.join(final_layout_dir, os.path.basename(package_path))
+
+    def _move(self, slot: StagingSlot, package_path: str, final_layout_dir: str,
+              on_moved: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        destination = self.final_path(package_path, final_layout_dir)
+        # Copy next to the destination first, so a half-moved package is never
+        # mistaken for a finished one (e.g. by --resume)
+        incoming = f"{destination}.incoming"
+        result = {"success": False, "package_path": destination, "bytes": slot.reserved}
+        try:
+            os.makedirs(final_layout_dir, exist_ok=True)
+            shutil.rmtree(incoming, ignore_errors=True)
+            if os.stat(package_path).st_dev == os.stat(final_layout_dir).st_dev:
+                os.rename(package_path, incoming)
+            else:
+                copied = self.copy_engine.copy_tree(package_path, incoming)
+                if copied["errors"]:
+                    raise OSError(f"{len(copied['errors'])} file(s) failed to copy, first: "
+                                  f"{copied['errors'][0][0]}: {copied['errors'][0][1]}")
+                mismatched = _compare_trees(package_path, incoming)
+                if mismatched:
+                    raise OSError(f"{len(mismatched)} file(s) differ after the copy, first: {mismatched[0]}")
+            if os.path.isdir(destination):
+                shutil.rmtree(destination)
+            os.rename(incoming, destination)
+            result["success"] = True
+            if on_moved is not None:
+                on_moved(destination)
+        except OSError as e:
+            result["error"] = f"Moving {os.path.basename(package_path)} to the archive failed: {e}"
+            print(f"✗ {result['error']}")
+        finally:
+            self.release(slot)
+        result["seconds"] = time.perf_counter() - started
+        with self._cond:
+            self.moved.append(result)
+        return result
+
+    def close(self):
+        """
+        Wait for every move in flight and remove the scratch root if it is empty.
+        """
+        self._movers.shutdown(wait=True)
+        try:
+            os.rmdir(self.scratch_root)
+        except OSError:
+            pass
+
+    def print_summary(self):
+        if not self.moved:
+            return
+        ok = [move for move in self.moved if move["success"]]
+        total = sum(move["bytes"] for move in ok)
+        seconds = sum(move["seconds"] for move in ok)
+        rate = total / 1048576 / seconds if seconds else 0.0
+        print(f"Moved {len(ok)}/{len(self.moved)} package(s) from scratch to the archive: "
+              f"{total / 1048576:.1f} MB at {rate:.1f} MB/s; peak scratch use {self.peak_bytes / 1048576:.0f} MB "
+              f"of {self.budget_bytes / 1048576:.0f} MB, {self.wait_seconds:.1f}s waiting for space")
+
+
+def _tree_size(root: str) -> int:
+    total = 0
+    for dirpath, _dirs, filenames in os.walk(root):
+        for fname in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, fname)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _compare_trees(source: str, destination: str) -> List[str]:
+    """
+    Relative paths of files under *source* that are missing under *destination* or differ in size.
+    """
+    mismatched = []
+    for dirpath, _dirs, filenames in os.walk(source):
+        for fname in filenames:
+            path = os.path.join(dirpath, fname)
+            rel = os.path.relpath(path, source)
+            try:
+                if os.path.getsize(os.path.join(destination, rel)) != os.path.getsize(path):
+                    mismatched.append(rel)
+            except OSError:
+                mismatched.append(rel)
+    return mismatched
@@ -0,0 +1,122 @@
+import time
+from typing import Optional, Dict, List, Any, Callable
+
+
+class Waiter:
+    def __init__(self, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        Polls readiness conditions with exponential backoff and a deadline,
+        and records how long every wait actually took so deadlines can be
+        tuned from data instead of guessed.
+
+        Args:
+            clock (callable): Monotonic clock, replaceable for dry runs
+            sleep (callable): Sleep function, replaceable for dry runs
+        """
+        self.clock = clock
+        self.sleep = sleep
+        self.history: List[Dict[str, Any]] = []
+
+    def until(self, name: str, condition: Callable[[], Any], timeout: float = 30.0,
+              interval: float = 0.1, max_interval: float = 2.0, backoff: float = 1.5,
+              initial_delay: float = 0.0, stable_for: float = 0.0) -> Dict[str, Any]:
+        """
+        Wait until *condition()* is truthy, or *timeout* seconds have passed.
+
+        Args:
+            name (str): Label used in the wait history, e.g. "InDesign exited"
+            condition (callable): Zero-argument readiness check
+            timeout (float): Deadline in seconds
+            interval (float): First poll interval in seconds
+            max_interval (float): Upper bound for the poll interval
+            backoff (float): Factor applied to the interval after every failed poll
+            initial_delay (float): Time to wait before the first poll
+            stable_for (float): The condition must hold continuously for this long
+
+        Returns:
+            dict: 'success', 'name', 'seconds' waited and number of 'attempts'
+        """
+        started = self.clock()
+        deadline = started + timeout
+        attempts = 0
+        true_since: Optional[float] = None
+
+        if initial_delay:
+            self.sleep(min(initial_delay, timeout))
+
+        while True:
+            attempts += 1
+            try:
+                ready = bool(condition())
+            except Exception as e:
+                print(f"⚠️  Wait '{name}': condition raised {e}")
+                ready = False
+
+            now = self.clock()
+            if ready:
+                if true_since is None:
+                    true_since = now
+                if now - true_since >= stable_for:
+                    return self._record(name, True, now - started, attempts, timeout)
+            else:
+                true_since = None
+
+            if now >= deadline:
+                print(f"⚠️  Wait '{name}' timed out after {now - started:.1f}s")
+                return self._record(name, False, now - started, attempts, timeout)
+
+            self.sleep(max(0.0, min(interval, deadline - now)))
+            interval = min(interval * backoff, max_interval)
+
+    def _record(self, name: str, success: bool, seconds: float, attempts: int, timeout: float) -> Dict[str, Any]:
+        entry = {
+            "success": success,
+            "name": name,
+            "seconds": seconds,
+            "attempts": attempts,
+            "timeout": timeout,
+        }
+        self.history.append(entry)
+        return entry
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate the wait history per name.
+
+        Returns:
+            dict: name → count, timeouts, min/avg/max seconds and the configured timeout
+        """
+        summary: Dict[str, Dict[str, Any]] = {}
+        for entry in self.history:
+            stats = summary.setdefault(entry["name"], {
+                "count": 0, "timeouts": 0, "total_seconds": 0.0,
+                "min_seconds": entry["seconds"], "max_seconds": entry["seconds"],
+                "timeout": entry["timeout"],
+            })
+            stats["count"] += 1
+            stats["timeouts"] += 0 if entry["success"] else 1
+            stats["total_seconds"] += entry["seconds"]
+            stats["min_seconds"] = min(stats["min_seconds"], entry["seconds"])
+            stats["max_seconds"] = max(stats["max_seconds"], entry["seconds"])
+            stats["timeout"] = max(stats["timeout"], entry["timeout"])
+
+        for stats in summary.values():
+            stats["avg_seconds"] = stats["total_seconds"] / stats["count"]
+        return summary
+
+    def print_summary(self):
+        """
+        Print how long each kind of wait took, to help tune the deadlines.
+        """
+        summary = self.summary()
+        if not summary:
+            return
+
+        print("\nReadiness waits:")
+        for name, stats in summary.items():
+            line = (f"  {name}: {stats['count']}× avg {stats['avg_seconds']:.1f}s, "
+                    f"min {stats['min_seconds']:.1f}s, max {stats['max_seconds']:.1f}s "
+                    f"(deadline {stats['timeout']:.0f}s)")
+            if stats["timeouts"]:
+                line += f", {stats['timeouts']} timed out"
+            print(line)
@@ -0,0 +1,311 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Any, Callable, Tuple
+from cnt.batch import parse_project_folder_name
+
+STATE_NAME = ".cnt_watch_state.json"
+
+# inotify event bits (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# open() flag for "watch only" descriptors on macOS
+O_EVTONLY = 0x8000
+
+
+class PollingNotifier:
+    def __init__(self, path: str):
+        """
+        Fallback change notifier: never reports events, so the watcher simply
+        rescans the drop folder every poll interval.
+        """
+        self.path = path
+        self.kind = "polling"
+
+    def wait(self, timeout: float) -> bool:
+        time.sleep(timeout)
+        return False
+
+    def close(self):
+        pass
+
+
+class InotifyNotifier:
+    def __init__(self, path: str):
+        """
+        Wakes the watcher as soon as anything is created, moved or written
+        in the drop folder (Linux inotify, through libc).
+
+        Raises:
+            OSError: if inotify is unavailable
+        """
+        self.path = path
+        self.kind = "inotify"
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), IN_WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+
+    def wait(self, timeout: float) -> bool:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        # Drain the queued events; the watcher rescans rather than parsing them
+        while True:
+            try:
+                if not os.read(self.fd, 65536):
+                    break
+            except BlockingIOError:
+                break
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class KqueueNotifier:
+    def __init__(self, path: str):
+        """
+        Wakes the watcher when the drop folder's entries change (macOS and
+        BSD kqueue vnode events).
+
+        Raises:
+            OSError: if kqueue is unavailable
+        """
+        if not hasattr(select, "kqueue"):
+            raise OSError("kqueue is not available on this platform")
+        self.path = path
+        self.kind = "kqueue"
+        self.fd = os.open(path, O_EVTONLY if sys.platform == "darwin" else os.O_RDONLY)
+        self.kq = select.kqueue()
+        event = select.kevent(
+            self.fd, filter=select.KQ_FILTER_VNODE, flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+            fflags=select.KQ_NOTE_WRITE | select.KQ_NOTE_EXTEND | select.KQ_NOTE_ATTRIB
+            | select.KQ_NOTE_RENAME | select.KQ_NOTE_DELETE)
+        self.kq.control([event], 0)
+
+    def wait(self, timeout: float) -> bool:
+        return bool(self.kq.control(None, 8, timeout))
+
+    def close(self):
+        self.kq.close()
+        os.close(self.fd)
+
+
+def default_notifier(path: str):
+    """
+    The native change notifier for this platform, or polling if there is none.
+    """
+    candidates = [InotifyNotifier] if sys.platform.startswith("linux") else [KqueueNotifier]
+    for notifier_class in candidates:
+        try:
+            return notifier_class(path)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️  {notifier_class.__name__} unavailable ({e}) – falling back to polling")
+    return PollingNotifier(path)
+
+
+def tree_signature(path: str) -> Tuple[int, int, int]:
+    """
+    (file count, total bytes, newest mtime in ns) of everything under *path*,
+    so a folder still being copied in is seen to change between scans.
+    """
+    files = size = newest = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                newest = max(newest, stat.st_mtime_ns)
+                if entry.is_dir(follow_symlinks=False):
+                    sub_files, sub_size, sub_newest = tree_signature(entry.path)
+                    files += sub_files
+                    size += sub_size
+                    newest = max(newest, sub_newest)
+                else:
+                    files += 1
+                    size += stat.st_size
+    except OSError:
+        pass
+    return files, size, newest
+
+
+class DropFolderWatcher:
+    def __init__(self, drop_folder: str, archive: Callable[[str], bool], settle_seconds: float = 60.0,
+                 poll_interval: float = 5.0, max_jobs: int = 1, notifier=None, state_path: Optional[str] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Watches a drop folder and archives every project folder that lands in
+        it, once the folder has stopped changing for *settle_seconds* (so a
+        copy from the shared volume is finished before archiving starts).
+
+        A project is archived again only if it changes after it was archived
+        (or after it failed). To keep polling cheap on a network volume, only
+        new and settling projects are walked on every poll; an archived one is
+        walked again only once its folder's own entries change (e.g. it is
+        dropped again or a subfolder is replaced), so files edited in place
+        deep inside it are not noticed. Project folders that don't follow the
+        <id>_<semester>_<name>_<type> convention are reported once and ignored.
+
+        Args:
+            drop_folder (str): Folder to watch
+            archive (callable): archive(project_folder) → True on success; runs on a job thread
+            settle_seconds (float): Quiet period before a project is queued
+            poll_interval (float): Longest time between scans, events or not
+            max_jobs (int): Projects archived at the same time
+            notifier: Change notifier with wait(timeout) and close(); the platform default if omitted
+            state_path (str): Where archived signatures are kept; defaults to a file in the drop folder
+            clock (callable): Monotonic clock, replaceable for dry runs
+        """
+        self.drop_folder = os.path.abspath(drop_folder)
+        self.archive = archive
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.max_jobs = max(1, max_jobs)
+        self.notifier = notifier or default_notifier(self.drop_folder)
+        self.state_path = state_path or os.path.join(self.drop_folder, STATE_NAME)
+        self.clock = clock
+        self.state: Dict[str, Dict[str, Any]] = {}
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.running: Dict[str, Tuple[int, int, int]] = {}
+        self.ignored = set()
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f).get("projects", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable watch state {self.state_path}: {e}")
+
+    def save(self):
+        with self._lock:
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "projects": self.state}, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.state_path)
+
+    def run(self):
+        """
+        Watch until stop() is called or Ctrl-C; running jobs are allowed to finish.
+        """
+        print(f"Watching {self.drop_folder} ({self.notifier.kind}); projects are archived "
+              f"after {self.settle_seconds:.0f}s without changes, {self.max_jobs} at a time")
+        self._pool = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="archive-job")
+        try:
+            while not self.stop_event.is_set():
+                self.scan()
+                # Wake early on events, but keep rescanning while folders are settling
+                self.notifier.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            print("\nStopping – waiting for running jobs to finish")
+        finally:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self.notifier.close()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def scan(self):
+        """
+        Look at every project folder once: track ones that are still changing
+        and queue the ones that have settled.
+        """
+        now = self.clock()
+        seen = set()
+        try:
+            with os.scandir(self.drop_folder) as it:
+                entries = [entry for entry in it if entry.is_dir() and not entry.name.startswith(".")]
+        except OSError as e:
+            print(f"⚠️  Cannot read drop folder {self.drop_folder}: {e}")
+            return
+
+        for entry in entries:
+            name = entry.name
+            try:
+                parse_project_folder_name(name)
+            except ValueError as e:
+                if name not in self.ignored:
+                    print(f"⚠️  Ignoring {name}: {e}")
+                    self.ignored.add(name)
+                continue
+
+            seen.add(name)
+            with self._lock:
+                if name in self.running:
+                    continue
+                recorded = self.state.get(name)
+            try:
+                folder_stat = entry.stat()
+            except OSError:
+                continue
+            marker = [folder_stat.st_ino, folder_stat.st_mtime_ns]
+            if recorded and recorded.get("marker") == marker and name not in self.pending:
+                continue  # archived and untouched since: no need to walk it
+            signature = tree_signature(entry.path)
+            with self._lock:
+                if recorded and tuple(recorded["signature"]) == signature:
+                    self.pending.pop(name, None)
+                    if recorded.get("marker") != marker:
+                        recorded["marker"] = marker
+                    continue
+
+                candidate = self.pending.get(name)
+                if candidate is None or candidate["signature"] != signature:
+                    if candidate is None:
+                        print(f"↓ {name} {'changed' if recorded else 'arrived'} – waiting for it to settle")
+                    self.pending[name] = {"signature": signature, "since": now}
+                    continue
+                if now - candidate["since"] < self.settle_seconds:
+                    continue
+
+                del self.pending[name]
+                self.running[name] = signature
+            print(f"➜ Queuing {name} ({signature[0]} files, {signature[1] / 1048576:.1f} MB)")
+            self._pool.submit(self._archive_job, name, entry.path, signature, marker)
+
+        with self._lock:
+            for name in list(self.pending):
+                if name not in seen:
+                    del self.pending[name]
+
+    def _archive_job(self, name: str, path: str, signature: Tuple[int, int, int], marker: List[int]):
+        started = time.perf_counter()
+        try:
+            success = bool(self.archive(path))
+        except Exception as e:
+            print(f"✗ {name}: {e}")
+            success = False
+        seconds = time.perf_counter() - started
+
+        with self._lock:
+            del self.running[name]
+            # A failed project is retried only once its contents change
+            self.state[name] = {"signature": list(signature), "marker": marker, "success": success,
+                                "seconds": round(seconds, 1), "finished_at": time.time()}
+        self.save()
+        print(f"{'✅' if success else '✗'} {name} {'archived' if success else 'failed'} in {seconds:.0f}s")
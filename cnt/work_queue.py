@@ -0,0 +1,278 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, Iterable
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    enqueued_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    error TEXT,
+    result TEXT
+)
+"""
+
+
+class QueueJob:
+    def __init__(self, job_id: int, project: str, attempts: int):
+        """
+        A project leased from the shared queue.
+
+        Args:
+            job_id (int): Row id in the queue
+            project (str): Project folder to archive
+            attempts (int): Attempts so far, including this one
+        """
+        self.id = job_id
+        self.project = project
+        self.attempts = attempts
+
+
+class WorkQueue:
+    def __init__(self, path: str, lease_seconds: float = 300.0, max_attempts: int = 3,
+                 worker_id: Optional[str] = None):
+        """
+        Durable archive queue in a SQLite file on the shared volume, so several
+        packaging Macs can drain one backlog without archiving the same book
+        twice.
+
+        A worker claims a job with a lease and keeps it alive with heartbeats;
+        if the worker dies or loses the volume, the lease expires and the job
+        goes back to the queue for another machine, until it has been tried
+        *max_attempts* times. Every change runs in an immediate transaction,
+        which takes SQLite's file lock, so claims from different machines never
+        overlap. The rollback journal is used rather than WAL, which needs
+        shared memory that network volumes don't provide. Lease times are wall
+        clock, so the Macs' clocks should be kept in sync (NTP).
+
+        Args:
+            path (str): Queue database, e.g. /Volumes/Production/archive_queue.db
+            lease_seconds (float): How long a claim stays valid without a heartbeat
+            max_attempts (int): Attempts per project before it is marked failed
+            worker_id (str): Name recorded on claimed jobs; defaults to host:pid
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        with self._transaction() as db:
+            db.execute(QUEUE_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread: the heartbeat thread writes alongside the worker
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # Only used by this thread, but close() may close it from another one
+            db = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=DELETE")
+            self._local.db = db
+            with self._connections_lock:
+                self._connections.append(db)
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def enqueue(self, project_folders: Iterable[str], requeue: bool = False) -> int:
+        """
+        Add project folders to the queue. A project already queued or being
+        worked on is left alone; a finished or failed one is queued again
+        only with requeue=True.
+
+        Returns:
+            int: Number of projects added or re-queued
+        """
+        added = 0
+        now = time.time()
+        with self._transaction() as db:
+            for project in project_folders:
+                row = db.execute("SELECT status FROM jobs WHERE project = ?", (project,)).fetchone()
+                if row is None:
+                    db.execute("INSERT INTO jobs (project, enqueued_at, updated_at) VALUES (?, ?, ?)",
+                               (project, now, now))
+                    added += 1
+                elif requeue and row[0] in ("done", "failed"):
+                    db.execute("UPDATE jobs SET status = 'queued', attempts = 0, worker = NULL, error = NULL, "
+                               "result = NULL, enqueued_at = ?, updated_at = ? WHERE project = ?",
+                               (now, now, project))
+                    added += 1
+        return added
+
+    def claim(self) -> Optional[QueueJob]:
+        """
+        Lease the oldest queued project to this worker, first returning jobs
+        whose lease has expired to the queue.
+
+        Returns:
+            QueueJob or None: The claimed job, or None if nothing is queued
+        """
+        now = time.time()
+        with self._transaction() as db:
+            expired = db.execute("SELECT id, project, attempts, worker FROM jobs "
+                                 "WHERE status = 'leased' AND lease_expires < ?", (now,)).fetchall()
+            for job_id, project, attempts, worker in expired:
+                status = "queued" if attempts < self.max_attempts else "failed"
+                print(f"↻ Lease on {os.path.basename(project)} held by {worker} expired – {status}")
+                db.execute("UPDATE jobs SET status = ?, worker = NULL, lease_expires = NULL, error = ?, "
+                           "enqueued_at = ?, updated_at = ? WHERE id = ?",
+                           (status, f"lease expired on {worker}", now, now, job_id))
+
+            row = db.execute("SELECT id, project, attempts FROM jobs WHERE status = 'queued' "
+                             "ORDER BY enqueued_at, id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            job_id, project, attempts = row
+            db.execute("UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, attempts = ?, "
+                       "updated_at = ? WHERE id = ?",
+                       (self.worker_id, now + self.lease_seconds, attempts + 1, now, job_id))
+        return QueueJob(job_id, project, attempts + 1)
+
+    def heartbeat(self, job: QueueJob) -> bool:
+        """
+        Extend this worker's lease on *job*.
+
+        Returns:
+            bool: False if the lease was lost (expired and taken by another worker)
+        """
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute("UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                                "WHERE id = ? AND status = 'leased' AND worker = ?",
+                                (now + self.lease_seconds, now, job.id, self.worker_id))
+            return cursor.rowcount == 1
+
+    def complete(self, job: QueueJob, success: bool, error: Optional[str] = None,
+                 result: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Record the outcome of *job*. A failure is re-queued until the job has
+        used up its attempts.
+
+        Returns:
+            bool: False if the lease had already been lost, so the outcome was discarded
+        """
+        if success:
+            status = "done"
+        else:
+            status = "queued" if job.attempts < self.max_attempts else "failed"
+        with self._transaction() as db:
+            now = time.time()
+            cursor = db.execute("UPDATE jobs SET status = ?, lease_expires = NULL, error = ?, result = ?, "
+                                "updated_at = ? WHERE id = ? AND status = 'leased' AND worker = ?",
+                                (status, error, json.dumps(result) if result is not None else None,
+                                 now, job.id, self.worker_id))
+            if cursor.rowcount != 1:
+                return False
+            if status == "queued":
+                # Retries go to the back of the queue, so one bad project can't block the rest
+                db.execute("UPDATE jobs SET enqueued_at = ? WHERE id = ? AND worker = ?",
+                           (now, job.id, self.worker_id))
+            return True
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Number of jobs per status: queued, leased, done and failed.
+        """
+        counts = {"queued": 0, "leased": 0, "done": 0, "failed": 0}
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts.update(dict(rows))
+        return counts
+
+    def print_status(self):
+        counts = self.counts()
+        print(f"Queue {self.path}: {counts['queued']} queued, {counts['leased']} in progress, "
+              f"{counts['done']} done, {counts['failed']} failed")
+        for project, worker, attempts, error in self._connection().execute(
+                "SELECT project, worker, attempts, error FROM jobs WHERE status IN ('leased', 'failed') "
+                "ORDER BY updated_at"):
+            detail = f"failed after {attempts} attempt(s): {error}" if error else f"on {worker}"
+            print(f"  {os.path.basename(project)}: {detail}")
+
+    def close(self):
+        """
+        Close the connections of every thread that used the queue.
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for db in connections:
+            db.close()
+        self._local = threading.local()
+
+
+class QueueWorker:
+    def __init__(self, work_queue: WorkQueue, archive: Callable[[str], Dict[str, Any]],
+                 heartbeat_interval: Optional[float] = None):
+        """
+        Drains a WorkQueue: claims a project, archives it while a background
+        thread renews the lease, records the outcome, and repeats.
+
+        Args:
+            work_queue (WorkQueue): The shared queue
+            archive (callable): archive(project_folder) → summary dict with 'success'
+            heartbeat_interval (float): Seconds between heartbeats; a third of the lease by default
+        """
+        self.queue = work_queue
+        self.archive = archive
+        self.heartbeat_interval = heartbeat_interval or work_queue.lease_seconds / 3
+        self.processed = 0
+
+    def run(self, max_jobs: Optional[int] = None) -> int:
+        """
+        Process jobs until the queue has nothing left to claim (or *max_jobs* are done).
+
+        Returns:
+            int: Number of jobs this worker processed
+        """
+        while max_jobs is None or self.processed < max_jobs:
+            job = self.queue.claim()
+            if job is None:
+                break
+            self.processed += 1
+            print(f"\n===== {self.queue.worker_id}: {job.project} (attempt {job.attempts}) =====")
+
+            stop_heartbeat = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat_loop, args=(job, stop_heartbeat),
+                                         name="queue-heartbeat", daemon=True)
+            heartbeat.start()
+            try:
+                summary = self.archive(job.project)
+                error = None if summary.get("success") else summary.get("error", "archive incomplete")
+            except Exception as e:
+                summary, error = {"success": False}, str(e)
+            finally:
+                stop_heartbeat.set()
+                heartbeat.join()
+
+            if not self.queue.complete(job, bool(summary.get("success")), error=error, result=summary):
+                print(f"⚠️  Lease on {os.path.basename(job.project)} was lost; its result was not recorded")
+        return self.processed
+
+    def _heartbeat_loop(self, job: QueueJob, stop: threading.Event):
+        while not stop.wait(self.heartbeat_interval):
+            try:
+                if not self.queue.heartbeat(job):
+                    print(f"⚠️  Lost the lease on {os.path.basename(job.project)}")
+                    return
+            except sqlite3.Error as e:
+                # The volume may be briefly unreachable; the next beat tries again
+                print(f"⚠️  Heartbeat for {os.path.basename(job.project)} failed: {e}")
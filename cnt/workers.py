@@ -0,0 +1,277 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Any, Callable, Iterable
+
+
+class PackagingJob:
+    def __init__(self, path: str, folder_id: str, project_name: str, layout_dir: Optional[str] = None):
+        """
+        One document to package.
+
+        Args:
+            path (str): Path to the .indd file
+            folder_id (str): Folder ID stamped on the Layout folder
+            project_name (str): Archive project folder the package goes into
+            layout_dir (str): The archive's <folder_id>_Layout folder; derived from
+                *project_name* and *folder_id* if omitted
+        """
+        self.path = path
+        self.folder_id = folder_id
+        self.project_name = project_name
+        self.layout_dir = layout_dir
+        self.attempts = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.worker: Optional[str] = None
+
+
+class SessionWorker:
+    def __init__(self, name: str, session):
+        """
+        Worker backed by its own InDesign session (and so its own scripting
+        backend and InDesign or InDesign Server instance).
+
+        Args:
+            name (str): Worker label used in logs
+            session (InDesignSession): The session this worker drives
+        """
+        self.name = name
+        self.session = session
+
+    def package(self, job: PackagingJob) -> Dict[str, Any]:
+        # package_if_needed applies the journal and package-cache skips
+        return self.session.package_if_needed(job.path, folder_id=job.folder_id, project_name=job.project_name,
+                                              layout_dir=job.layout_dir)
+
+    def close(self):
+        self.session.shutdown()
+
+
+class FakeWorker:
+    def __init__(self, name: str, seconds_per_mb: float = 0.01, min_seconds: float = 0.05,
+                 fail: Optional[Callable[[PackagingJob], bool]] = None):
+        """
+        Stand-in for an InDesign instance, so scheduling and throughput
+        scaling can be exercised on Linux. "Packaging" sleeps for a time
+        proportional to the document size.
+
+        Args:
+            name (str): Worker label used in logs
+            seconds_per_mb (float): Simulated packaging time per MB of .indd
+            min_seconds (float): Simulated minimum packaging time
+            fail (callable): Optional predicate; jobs it returns True for fail
+        """
+        self.name = name
+        self.seconds_per_mb = seconds_per_mb
+        self.min_seconds = min_seconds
+        self.fail = fail
+
+    def package(self, job: PackagingJob) -> Dict[str, Any]:
+        try:
+            size_mb = os.path.getsize(job.path) / 1048576
+        except OSError:
+            size_mb = 0.0
+        time.sleep(max(self.min_seconds, size_mb * self.seconds_per_mb))
+        if self.fail and self.fail(job):
+            return {"success": False, "error": f"{self.name}: simulated failure"}
+        name = os.path.basename(job.path)[:-5] if job.path.endswith(".indd") else os.path.basename(job.path)
+        package_path = os.path.join(job.project_name, f"{job.folder_id}_Layout", f"{name}_Packaged")
+        return {"success": True, "message": f"Package created at {package_path}", "package_path": package_path}
+
+    def close(self):
+        pass
+
+
+class WorkerPool:
+    def __init__(self, worker_factory: Callable[[int], Any], concurrency: int = 1,
+                 max_attempts: int = 2, max_worker_failures: int = 3, verifier=None, verify_workers: int = 2):
+        """
+        Runs packaging jobs across several independent workers, each with its
+        own session. A failed job is retried (on whichever worker is free)
+        until it reaches *max_attempts*; a worker that fails too often is
+        closed and replaced by a fresh one from the factory, so one wedged
+        InDesign instance can't take down the run.
+
+        With a *verifier*, every successful package is checked on a background
+        thread while its worker moves on to the next job; a package that fails
+        the check is rejected and its job re-queued like any other failure.
+
+        Args:
+            worker_factory (callable): worker_factory(index) → worker with package(job) and close()
+            concurrency (int): Number of workers packaging at the same time
+            max_attempts (int): Attempts per job before it is reported as failed
+            max_worker_failures (int): Consecutive failures before a worker is replaced
+            verifier (PackageVerifier): Object with verify(job, result) → problem list and
+                reject(job, result, retry); None disables verification
+            verify_workers (int): Number of packages verified at the same time
+        """
+        self.worker_factory = worker_factory
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max_attempts
+        self.max_worker_failures = max_worker_failures
+        self.verifier = verifier
+        self.verify_workers = verify_workers
+        self._verify_pool: Optional[ThreadPoolExecutor] = None
+        self.worker_stats: Dict[str, Dict[str, Any]] = {}
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def run(self, jobs: Iterable[PackagingJob]) -> List[PackagingJob]:
+        """
+        Package every job. Jobs are handed out in the given order.
+
+        Returns:
+            list: The jobs, in the given order, each with its final `result`
+        """
+        jobs = list(jobs)
+        pending: "queue.Queue[PackagingJob]" = queue.Queue()
+        for job in jobs:
+            pending.put(job)
+        state = {"outstanding": len(jobs), "started": 0, "total": len(jobs)}
+
+        started = time.perf_counter()
+        if self.verifier is not None:
+            self._verify_pool = ThreadPoolExecutor(max_workers=self.verify_workers, thread_name_prefix="verify")
+        threads = [threading.Thread(target=self._worker_loop, args=(index, pending, state),
+                                    name=f"package-worker-{index}", daemon=True)
+                   for index in range(min(self.concurrency, len(jobs)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self._verify_pool is not None:
+            self._verify_pool.shutdown(wait=True)
+            self._verify_pool = None
+        self.seconds = time.perf_counter() - started
+
+        # Every worker gave up: whatever is left never ran
+        for job in jobs:
+            if job.result is None:
+                job.result = {"success": False, "error": "No packaging worker available"}
+        return jobs
+
+    def _new_worker(self, index: int):
+        try:
+            return self.worker_factory(index)
+        except Exception as e:
+            print(f"✗ Could not start packaging worker {index}: {e}")
+            return None
+
+    def _worker_loop(self, index: int, pending: "queue.Queue[PackagingJob]", state: Dict[str, int]):
+        worker = self._new_worker(index)
+        consecutive_failures = 0
+
+        while worker is not None:
+            try:
+                job = pending.get(timeout=0.2)
+            except queue.Empty:
+                with self._lock:
+                    if state["outstanding"] == 0:
+                        break
+                continue
+
+            job.attempts += 1
+            job.worker = worker.name
+            with self._lock:
+                if job.attempts == 1:
+                    state["started"] += 1
+                    print(f"[{state['started']}/{state['total']}]  {os.path.basename(job.path)} → {worker.name}")
+                else:
+                    print(f"[retry {job.attempts}]  {os.path.basename(job.path)} → {worker.name}")
+            phase = time.perf_counter()
+            try:
+                result = worker.package(job)
+            except Exception as e:
+                result = {"success": False, "error": f"{worker.name}: {e}"}
+            elapsed = time.perf_counter() - phase
+
+            with self._lock:
+                stats = self.worker_stats.setdefault(worker.name, {"jobs": 0, "failures": 0, "seconds": 0.0})
+                stats["jobs"] += 1
+                stats["seconds"] += elapsed
+                if not result.get("success"):
+                    stats["failures"] += 1
+
+            if result.get("success"):
+                consecutive_failures = 0
+                if self._verify_pool is not None:
+                    # The job only counts as finished once its package passes the check
+                    self._verify_pool.submit(self._verify, job, result, pending, state)
+                else:
+                    job.result = result
+                    self._job_finished(state)
+                continue
+
+            consecutive_failures += 1
+            if job.attempts < self.max_attempts:
+                print(f"↻ Re-queuing {os.path.basename(job.path)} after failure on {worker.name}")
+                pending.put(job)
+            else:
+                job.result = result
+                self._job_finished(state)
+
+            if consecutive_failures >= self.max_worker_failures:
+                print(f"⚠️  Replacing {worker.name} after {consecutive_failures} consecutive failures")
+                try:
+                    worker.close()
+                except Exception as e:
+                    print(f"⚠️  Error closing {worker.name}: {e}")
+                worker = self._new_worker(index)
+                consecutive_failures = 0
+
+        if worker is not None:
+            try:
+                worker.close()
+            except Exception as e:
+                print(f"⚠️  Error closing {worker.name}: {e}")
+
+    def _verify(self, job: PackagingJob, result: Dict[str, Any], pending: "queue.Queue[PackagingJob]",
+                state: Dict[str, int]):
+        try:
+            problems = self.verifier.verify(job, result)
+        except Exception as e:
+            problems = [f"verification error: {e}"]
+        if not problems:
+            job.result = result
+            self._job_finished(state)
+            return
+
+        retry = job.attempts < self.max_attempts
+        with self._lock:
+            self.worker_stats[job.worker]["rejected"] = self.worker_stats[job.worker].get("rejected", 0) + 1
+            print(f"✗ Package of {os.path.basename(job.path)} failed verification: {'; '.join(problems)}")
+        try:
+            self.verifier.reject(job, result, retry=retry)
+        except Exception as e:
+            print(f"⚠️  Could not reject the package of {os.path.basename(job.path)}: {e}")
+        if retry:
+            print(f"↻ Re-queuing {os.path.basename(job.path)} after a failed package check")
+            pending.put(job)
+        else:
+            job.result = {"success": False, "error": f"Package failed verification: {'; '.join(problems)}",
+                          "package_path": result.get("package_path")}
+            self._job_finished(state)
+
+    def _job_finished(self, state: Dict[str, int]):
+        with self._lock:
+            state["outstanding"] -= 1
+
+    def print_summary(self, jobs: List[PackagingJob]):
+        """
+        Print per-worker load and overall throughput.
+        """
+        if not jobs:
+            return
+        done = sum(1 for job in jobs if job.result and job.result.get("success"))
+        rate = done / self.seconds * 60 if self.seconds else 0.0
+        print(f"\nPackaged {done}/{len(jobs)} documents on {self.concurrency} worker(s) "
+              f"in {self.seconds:.1f}s ({rate:.1f} documents/min)")
+        for name, stats in sorted(self.worker_stats.items()):
+            rejected = f", {stats['rejected']} rejected package(s)" if stats.get("rejected") else ""
+            print(f"  {name}: {stats['jobs']} job(s), {stats['failures']} failure(s){rejected}, "
+                  f"busy {stats['seconds']:.1f}s")
+        for job in jobs:
+            if not (job.result and job.result.get("success")):
+                print(f"  ✗ {os.path.basename(job.path)}: {job.result.get('error') if job.result else 'not run'}")
@@ -1,52 +1,202 @@
+import argparse
+import subprocess
 import sys
 import os
-import time
 from cnt.cnt import TKFolderSelector, MakeDirectory, AppleScript, FileCheck
-from datetime import datetime
+from cnt.bridge import default_backend
+from cnt.session import InDesignSession, RecyclePolicy
+from cnt.workers import WorkerPool, PackagingJob, SessionWorker
+from cnt.scheduling import CostEstimator
+from cnt.fonts import FontActivation
+from cnt.pipeline import Pipeline
+from cnt.copying import CopyEngine
+from cnt.manifest import ArchiveManifest
+from cnt.journal import RunJournal, JOURNAL_NAME
+from cnt.package_cache import PackageCache
+from cnt.package_check import PackageVerifier
+from cnt.dedup import PackageDeduplicator
+from cnt.compression import ArchiveCompressor
+from cnt.staging import PackageStager
+from cnt.prefetch import LinkPrefetcher
+from cnt.source_index import SourceIndex
+from cnt.io_scheduler import IOScheduler, VolumeLimits
+from cnt.checksums import ChecksumManifest, ALGORITHM_EXTENSIONS
+from cnt.batch import parse_project_folder_name, discover_documents, load_project_list
+from cnt.watcher import DropFolderWatcher
+from cnt.work_queue import WorkQueue, QueueWorker
 
 
-def main():
-    # Create an instance of the folder selector
-    folder_selector = TKFolderSelector()
+def parse_volume_limits(value):
+    """
+    Parse a --io-volume value, PATH=CONCURRENCY[:MBPS], e.g. /Volumes/Production=2:50.
+    """
+    path, sep, limits = value.rpartition("=")
+    if not sep or not path:
+        raise argparse.ArgumentTypeError(f"expected PATH=CONCURRENCY[:MBPS], got {value!r}")
+    concurrency, _, mbps = limits.partition(":")
+    try:
+        return path, VolumeLimits(int(concurrency), float(mbps) * 1024 ** 2 if mbps else None)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected PATH=CONCURRENCY[:MBPS], got {value!r}")
 
-    # Call the select_folder method
-    selected_folder_name = folder_selector.select_folder()
 
-    # Use the selected folder name if needed
-    if selected_folder_name:
-        # Perform operations with the folder name
-        # Tokenize selected directory
-        folder_tokens = selected_folder_name.split("_")
-        folder_id = folder_tokens[0]  # 11492
-        folder_semester = folder_tokens[1]  # S24
-        folder_last_name = folder_tokens[2]  # Monroe
-        folder_print_type = folder_tokens[3]  # Color
-
-        output_directory_name = f"{folder_id}_{folder_last_name}"  # 11492_Monroe
-    else:
-        sys.exit()  # Close the program if no project directory is selected.
+def parse_hours(value):
+    """
+    Parse a --throttle-hours value, START-END in hours of the day, e.g. 8-18.
+    """
+    try:
+        start, end = (int(hour) for hour in value.split("-"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected START-END, got {value!r}")
+    if not (0 <= start <= 24 and 0 <= end <= 24):
+        raise argparse.ArgumentTypeError(f"hours must be between 0 and 24, got {value!r}")
+    return start, end
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Archive and package an InDesign project. With no project folders, "
+                    "the project is chosen in a dialog; with folders or --batch, every "
+                    "project is processed unattended.")
+    parser.add_argument("projects", nargs="*",
+                        help="Project folders to archive headless, e.g. 11492_S24_Monroe_Color")
+    parser.add_argument("--batch", metavar="LIST",
+                        help="CSV or text file listing project folders to archive headless")
+    parser.add_argument("--watch", metavar="DROP_FOLDER",
+                        help="Run as a service: archive every project folder that lands in DROP_FOLDER")
+    parser.add_argument("--settle", type=float, default=60.0,
+                        help="With --watch, seconds a project folder must stay unchanged before it "
+                             "is archived (default: 60)")
+    parser.add_argument("--max-jobs", type=int, default=1,
+                        help="With --watch, number of projects archived at the same time (default: 1); "
+                             "only 1 is supported while every job scripts the same local InDesign")
+    parser.add_argument("--queue", metavar="DB",
+                        help="Shared work queue (SQLite file on the shared volume): project folders "
+                             "given with it are queued instead of archived; without any, its status is shown")
+    parser.add_argument("--drain", action="store_true",
+                        help="With --queue, claim and archive queued projects until the queue is empty")
+    parser.add_argument("--verify", metavar="ARCHIVE",
+                        help="Re-check an existing archive against its checksum manifest and exit")
+    parser.add_argument("--checksum", choices=sorted(ALGORITHM_EXTENSIONS), default="blake2b",
+                        help="Algorithm for the archive's checksum manifest (default: blake2b)")
+    parser.add_argument("--dedup", choices=["hardlink", "reflink", "off"], default="off",
+                        help="Link identical fonts and links across the archive's packages: reflinks save "
+                             "disk and keep the copies independent; hardlinks also save transfer volume, but "
+                             "editing a linked file in place changes it in every package (default: off)")
+    parser.add_argument("--compress", action="store_true",
+                        help="Also write the archive as <archive>.tar.gz (with an index for single-file "
+                             "extraction), compressed on all cores while the run produces it")
+    parser.add_argument("--scratch", metavar="DIR",
+                        help="Package onto this local folder and move each package to the archive in the "
+                             "background (for archives on a network volume)")
+    parser.add_argument("--scratch-budget", type=float, default=20.0, metavar="GB",
+                        help="With --scratch, most local space staged packages may use (default: 20)")
+    parser.add_argument("--prefetch", action="store_true",
+                        help="Copy each next document and its Links to a local cache while the current one "
+                             "packages, and open it from there (for projects on a network volume)")
+    parser.add_argument("--prefetch-budget", type=float, default=10.0, metavar="GB",
+                        help="With --prefetch, size cap of the local link cache (default: 10)")
+    parser.add_argument("--io-concurrency", type=int, metavar="N",
+                        help="Most file transfers reading from or writing to one volume at a time, "
+                             "shared by all run_cnt.py processes on this Mac (default: no limit; 8 "
+                             "when another --io option is given)")
+    parser.add_argument("--io-limit", type=float, metavar="MBPS",
+                        help="Bandwidth cap per volume in MB/s (default: none)")
+    parser.add_argument("--io-volume", type=parse_volume_limits, action="append", default=[],
+                        metavar="PATH=N[:MBPS]",
+                        help="Concurrency and bandwidth cap for the volume holding PATH, "
+                             "e.g. /Volumes/Production=2:50; repeatable")
+    parser.add_argument("--throttle-hours", type=parse_hours, metavar="START-END",
+                        help="Apply bandwidth caps only between these hours, e.g. 8-18 (default: always)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its journal instead of starting over")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of documents to package concurrently (default: 1); only 1 is "
+                             "supported until a backend can target separate InDesign Server instances")
+    args = parser.parse_args(argv)
+    if args.max_jobs != 1:
+        # Each job is a run_cnt.py process packaging in the one local InDesign
+        parser.error("--max-jobs must be 1: parallel jobs would package in the same InDesign")
+    if args.workers != 1:
+        # Every worker would script the same local InDesign, and the package
+        # script always packages its front document
+        parser.error("--workers must be 1: there is no backend yet that gives each worker its own InDesign")
+    return args
+
+
+def archive_project(folder_selector, args, backend=None, headless=False):
+    """
+    Archive and package the project in folder_selector.folder_path.
+
+    Args:
+        folder_selector (TKFolderSelector): Selector holding the project folder
+        args (argparse.Namespace): Parsed command line options
+        backend (ScriptingBackend): Scripting bridge to reuse; one is created (and closed) if omitted
+        headless (bool): Find the layout and cover files from the folder naming
+            convention instead of asking for them
+
+    Returns:
+        dict: 'success', 'project', 'archive', 'packaged', 'failed' (document names)
+              and 'failed_steps'
+    """
+    # Tokenize selected directory: 11492_S24_Monroe_Color
+    folder_info = parse_project_folder_name(folder_selector.folder_name)
+    folder_id = folder_info["folder_id"]  # 11492
+    output_directory_name = folder_info["output_directory_name"]  # 11492_Monroe
 
     # Initialize MakeDirectory instance
     directory_handler = MakeDirectory()
 
-    # Step 1: Create Archived_Projects directory inside Documents directory
-    archived_projects_path = directory_handler.create_archived_projects_directory()
+    # List the source project once; every step below queries this index
+    # instead of listing the (possibly remote) project folders again
+    source_index = SourceIndex.build(folder_selector.folder_path)
+    source_index.print_summary()
+
+    # With --io-* options, every copy, fetch and move holds a slot on the
+    # volumes it touches, so a busy NAS share isn't flooded by parallel copies
+    io_scheduler = make_io_scheduler(args)
 
-    # Step 2: Create the project directory inside Archived_Projects
-    directory_handler.create_project_directory(project_name=output_directory_name)
+    # One parallel copy engine shared by the subdirectory and print-PDF copies
+    copy_engine = CopyEngine(scheduler=io_scheduler)
 
-    # Step 3: Move specific subdirectories into the new Project Archive directory
     documents_path = os.path.expanduser("~/Documents")
     archived_project_path = os.path.join(documents_path, "Archived_Projects", output_directory_name)
 
-    # Move subdirectories: Digital_Content, Logs, Manuscript, Office
-    folder_selector.copy_specific_subdirectories(destination_path=archived_project_path, folder_id=folder_id)
+    # Manifest of what is already archived, so a re-run only copies new or changed files
+    manifest = ArchiveManifest.load(archived_project_path)
 
-    # Step 4: Create the following subdirectories in the new Project Archive directory
-    folder_selector.create_project_subdirectories(archived_project_path=archived_project_path, folder_id=folder_id)
+    # Journal of completed steps and packaged documents, replayed by --resume
+    journal = RunJournal(archived_project_path)
+    journal.start(resume=args.resume, project_folder=folder_selector.folder_path)
 
     # Step 5: Make AppleScript command to handle font software
-    apple_script_agent = AppleScript(name=output_directory_name)
+    apple_script_agent = AppleScript(name=output_directory_name, backend=backend)
+    font_activation = FontActivation(apple_script_agent)
+
+    # Documents unchanged since their last package are skipped without opening them
+    package_cache = PackageCache(os.path.join(archived_project_path, f"{folder_id}_Layout"), index=source_index)
+
+    # With --scratch, InDesign packages onto local disk and finished packages
+    # are moved to the archive volume while the next document packages
+    stager = PackageStager(os.path.abspath(args.scratch), budget_bytes=int(args.scratch_budget * 1024 ** 3),
+                           estimator=CostEstimator(index=source_index),
+                           io_scheduler=io_scheduler) if args.scratch else None
+
+    # With --prefetch, the next documents and their links are copied to local
+    # disk while the current one packages
+    prefetcher = LinkPrefetcher(max_bytes=int(args.prefetch_budget * 1024 ** 3), lookahead=args.workers,
+                                index=source_index, io_scheduler=io_scheduler) if args.prefetch else None
+
+    # Each packaging worker keeps its own InDesign session warm across documents;
+    # a session is only relaunched when the recycle policy asks for it.
+    sessions = []
+
+    def make_worker(index):
+        session = InDesignSession(apple_script_agent, policy=RecyclePolicy(), font_activation=font_activation,
+                                  journal=journal, package_cache=package_cache, stager=stager,
+                                  prefetcher=prefetcher)
+        sessions.append(session)
+        return SessionWorker(f"InDesign-{index + 1}", session)
 
     # Step 5.5: Declare the full project directory path
     # Check file size > 0
@@ -54,101 +204,392 @@ def main():
     project_directory_path = os.path.join(documents_root, archived_project_path)
     print(archived_project_path)
     print(output_directory_name)
-    # Step 6: Ensure Extensis Connect is running and refreshed
-    if apple_script_agent.is_extensis_connect_running():
-        apple_script_agent.refresh_extensis_connect()
-    else:
-        apple_script_agent.open_and_refresh_extensis_connect()
-        apple_script_agent.minimize_extensis_connect()
-
-    # Step 7: Move Print PDF files to /11492_Printer_PDFs from /11492_Layout
+
+    # Step 7 paths: Print PDF files go to /11492_Printer_PDFs from /11492_Layout
     printer_pdfs_endpoint = f"{folder_id}_Printer_PDFs"
     archive_printer_pdfs_path = os.path.join(archived_project_path, printer_pdfs_endpoint)
     folder_id_print = f"{folder_id}_Print"
     layout_endpoint = f"{folder_id}_Layout"
     project_layout_path = os.path.join(folder_selector.folder_path, layout_endpoint)
 
-    # Copy print files from the layout folder to the Printer PDFs folder
-    folder_selector.copy_print_files(
-        project_layout_path=project_layout_path,
-        archive_printer_pdfs_path=archive_printer_pdfs_path,
-        folder_id_print=folder_id_print
-    )
+    def create_archive_directories():
+        # Step 1: Create Archived_Projects directory inside Documents directory
+        directory_handler.create_archived_projects_directory()
+        # Step 2: Create the project directory inside Archived_Projects
+        return directory_handler.create_project_directory(project_name=output_directory_name)
 
-    apple_script_agent.close_finder()
+    def copy_subdirectories():
+        # Step 3: Copy subdirectories: Digital_Content, Logs, Manuscript, Office
+        copy_status = folder_selector.copy_specific_subdirectories(destination_path=archived_project_path,
+                                                                   folder_id=folder_id, copy_engine=copy_engine,
+                                                                   manifest=manifest, index=source_index)
+        # A subdirectory that failed to copy keeps the step from being journaled as done
+        return {"success": not any(status.startswith("Error") for status in copy_status.values()),
+                "subdirectories": copy_status}
 
-    # STEP 1 – Get all .indd paths first
-    paths, total = apple_script_agent.count_indesign_files()
-    if total == 0:
-        print("Nothing to process – exiting.")
-        sys.exit(0)
+    def create_subdirectories():
+        # Step 4: Create the Printer_PDFs and Layout subdirectories in the new Project Archive directory
+        return folder_selector.create_project_subdirectories(archived_project_path=archived_project_path,
+                                                             folder_id=folder_id)
 
-    # STEP 2 – Iterate once per file
-    for idx, path in enumerate(paths, start=1):
-        print(f"[{idx}/{total}]  {os.path.basename(path)}")
-        print(repr(path))
-        apple_script_agent.open_indesign_file(path)
+    def copy_print_pdfs():
+        # Step 7: Copy print files from the layout folder to the Printer PDFs folder
+        result = folder_selector.copy_print_files(
+            project_layout_path=project_layout_path,
+            archive_printer_pdfs_path=archive_printer_pdfs_path,
+            folder_id_print=folder_id_print,
+            copy_engine=copy_engine,
+            manifest=manifest,
+            index=source_index
+        )
+        print(f"Print PDFs: {result['message']}")
+        return result
 
+    def activate_fonts():
+        # Step 6: Ensure Extensis Connect is running and refreshed – once per run;
+        # documents only trigger another refresh if they open with missing fonts
+        font_activation.ensure_active()
+        apple_script_agent.close_finder()
 
-        pkg = apple_script_agent.package_indesign_file(
-            folder_id=folder_id,
-            project_name=archived_project_path
-        )
-        if pkg["success"]:
-            print(f"{datetime.now():%Y-%m-%d %H:%M:%S} ✓ packaged → {pkg['message']}")
-        else:
-            print(f"{datetime.now():%Y-%m-%d %H:%M:%S}  ✗ packaging failed:", pkg.get("error"))
+    def select_documents():
+        if headless:
+            layout_paths, cover_paths = discover_documents(folder_selector.folder_path, folder_id, index=source_index)
+            print(f"Found {len(layout_paths)} layout file(s) and {len(cover_paths)} cover file(s)")
+            return layout_paths, cover_paths
 
-        # STEP 3 – Always start next iteration with a fresh app
-        apple_script_agent.close_indesign()
-        time.sleep(5)
+        # Ask for the layout folder and the cover file up front, so the rest
+        # of the run needs no operator input
+        layout_paths, _ = apple_script_agent.count_indesign_files(index=source_index)
+        cover_paths, _ = apple_script_agent.count_cover_indesign_files() if layout_paths else ([], 0)
+        return layout_paths, cover_paths
 
-    # STEP 4 – Get all .indd paths first
-    paths, total = apple_script_agent.count_cover_indesign_files()
-    if total == 0:
-        print("Nothing to process – exiting.")
-        sys.exit(0)
+    def package_documents():
+        layout_paths, cover_paths = pipeline.results["select documents"]
+        if not layout_paths:
+            print("Nothing to package – no InDesign files selected.")
+            return {"packaged": 0, "failed": []}
 
-    # STEP 5 – Iterate once per file
-    for idx, path in enumerate(paths, start=1):
-        print(f"[{idx}/{total}]  {os.path.basename(path)}")
-        print(repr(path))
-        apple_script_agent.open_indesign_file(path)
+        # Package the layout files and the cover across the worker pool,
+        # longest expected jobs first so the run doesn't end on a big one
+        estimator = CostEstimator(index=source_index)
+        ordered_paths = estimator.order(list(layout_paths) + list(cover_paths))
+        if prefetcher is not None:
+            prefetcher.schedule(ordered_paths)
+        # Each package is checked on a background thread as soon as its document
+        # finishes; a broken one is re-queued while InDesign moves on
+        verifier = PackageVerifier(journal=journal, package_cache=package_cache, index=source_index)
+        pool = WorkerPool(make_worker, concurrency=args.workers, verifier=verifier)
+        layout_dir = os.path.join(archived_project_path, layout_endpoint)
+        jobs = pool.run(PackagingJob(path, folder_id=folder_id, project_name=archived_project_path,
+                                     layout_dir=layout_dir)
+                        for path in ordered_paths)
+        if prefetcher is not None:
+            prefetcher.close()
+            prefetcher.print_summary()
+        if stager is not None:
+            stager.close()
+            stager.print_summary()
+        for session in sessions:
+            session.print_timings()
+            for timing in session.timings:
+                if timing["success"]:
+                    estimator.record(timing["path"], timing["open_seconds"] + timing["package_seconds"])
+        estimator.save()
+        pool.print_summary(jobs)
+        verifier.print_summary()
+        apple_script_agent.waiter.print_summary()
+        print(f"Extensis Connect refreshed {font_activation.refresh_count} time(s) this run")
+        return {
+            "packaged": sum(1 for job in jobs if job.result.get("success")),
+            "failed": [os.path.basename(job.path) for job in jobs if not job.result.get("success")],
+        }
 
+    def deduplicate_packages():
+        # Fonts, profiles and shared links are packaged with every document;
+        # keep one copy of each in the archive
+        deduplicator = PackageDeduplicator(os.path.join(archived_project_path, layout_endpoint), mode=args.dedup)
+        result = deduplicator.run()
+        deduplicator.print_summary(result)
+        return {"files_linked": result["files_linked"], "bytes_reclaimed": result["bytes_reclaimed"]}
 
-        pkg = apple_script_agent.package_indesign_file(
-            folder_id=folder_id,
-            project_name=archived_project_path
-        )
-        if pkg["success"]:
-            print(f"{datetime.now():%Y-%m-%d %H:%M:%S} ✓ packaged → {pkg['message']}")
+    # Optional .tar.gz of the archive: the copied folders are streamed into it
+    # while InDesign packages, the rest once the archive is complete
+    compressor = ArchiveCompressor(f"{archived_project_path}.tar.gz", archived_project_path) if args.compress else None
+
+    def compress_copies():
+        copied = [os.path.join(archived_project_path, f"{folder_id}_{name}")
+                  for name in ("Digital_Content", "Logs", "Manuscript", "Office")]
+        return sum(compressor.add_tree(path) for path in copied + [archive_printer_pdfs_path]
+                   if os.path.isdir(path))
+
+    def compress_archive():
+        # The journal is still being written; it stays out of the container
+        compressor.add_tree(archived_project_path, exclude=lambda path: os.path.basename(path) == JOURNAL_NAME)
+        result = compressor.close()
+        compressor.print_summary(result)
+        return {"path": result["path"], "bytes_in": result["bytes_in"], "bytes_out": result["bytes_out"]}
+
+    def verify_archive():
+        file_checker_agent = FileCheck()
+        result = file_checker_agent.verify_nonzero_file_sizes(project_directory_path)
+        if result["success"]:
+            print("✅ All files have non-zero sizes.")
         else:
-            print(f"{datetime.now():%Y-%m-%d %H:%M:%S}  ✗ packaging failed:", pkg.get("error"))
-
-        # STEP 6 – Always start next iteration with a fresh app
-        apple_script_agent.close_indesign()
-        time.sleep(5)
-
-
-    file_checker_agent = FileCheck()
-    result = file_checker_agent.verify_nonzero_file_sizes(project_directory_path)
-    if result["success"]:
-        print("✅ All files have non-zero sizes.")
-    else:
-        print(f"⚠️ Check complete with {result['checked_count']} files checked.")
-        if result["empty_files"]:
-            print(f"⚠️ Found {len(result['empty_files'])} empty files:")
-            for idx, file in enumerate(result['empty_files'], 1):
-                print(f"  {idx}. {file}")
+            print(f"⚠️ Check complete with {result['checked_count']} files checked.")
+            if result["empty_files"]:
+                print(f"⚠️ Found {len(result['empty_files'])} empty files:")
+                for idx, file in enumerate(result['empty_files'], 1):
+                    print(f"  {idx}. {file}")
+            else:
+                print("✅ No empty files found.")
+
+        # Check if the bot did not find "CTID_Print" files in the original project directory
+        # Returns a ⚠️ CRITICAL WARNING print if there are no "CTID_Print" files in project_layout_path
+        has_print_pdf = folder_selector.check_for_missing_print_pdf_files(
+            project_layout_path=project_layout_path,
+            folder_id_print=folder_id_print,
+            index=source_index
+        )
+        return {"empty_files": len(result["empty_files"]), "has_print_pdf": has_print_pdf}
+
+    def checksum_archive():
+        # Hash the archive and the sources its copies came from, catching truncated
+        # or corrupted copies, and store the checksums for `run_cnt.py --verify`
+        copied_from = {os.path.join(archived_project_path, f"{folder_id}_{name}"):
+                       os.path.join(folder_selector.folder_path, f"{folder_id}_{name}")
+                       for name in ("Digital_Content", "Logs", "Manuscript", "Office")}
+        copied_from[archive_printer_pdfs_path] = project_layout_path
+        result = ChecksumManifest(archived_project_path, algorithm=args.checksum).write(sources=copied_from)
+        if result["mismatched"]:
+            print(f"⚠️ {len(result['mismatched'])} archived file(s) differ from their source")
+        return result
+
+    # The directory and print-PDF copies run on background workers while
+    # InDesign packages documents on the main thread; everything joins
+    # before the file size check.
+    # Steps marked resumable are skipped by --resume when the journal shows
+    # them done and their outputs still exist.
+    pipeline = Pipeline(journal=journal)
+    pipeline.add_step("archive directories", create_archive_directories)
+    pipeline.add_step("copy subdirectories", copy_subdirectories,
+                      depends_on=["archive directories"], background=True, resumable=True,
+                      outputs=[os.path.join(archived_project_path, f"{folder_id}_{name}")
+                               for name in ("Digital_Content", "Logs", "Manuscript", "Office")
+                               if source_index.exists(os.path.join(folder_selector.folder_path, f"{folder_id}_{name}"))])
+    pipeline.add_step("project subdirectories", create_subdirectories, depends_on=["archive directories"])
+    pipeline.add_step("copy print files", copy_print_pdfs,
+                      depends_on=["project subdirectories"], background=True, resumable=True,
+                      outputs=[archive_printer_pdfs_path])
+    if compressor is not None:
+        pipeline.add_step("compress copies", compress_copies,
+                          depends_on=["copy subdirectories", "copy print files"], background=True)
+    pipeline.add_step("activate fonts", activate_fonts)
+    pipeline.add_step("select documents", select_documents, resumable=True)
+    pipeline.add_step("package documents", package_documents,
+                      depends_on=["project subdirectories", "activate fonts", "select documents"])
+    verify_after = ["copy subdirectories", "copy print files", "package documents"]
+    if args.dedup != "off":
+        pipeline.add_step("deduplicate packages", deduplicate_packages, depends_on=["package documents"])
+        verify_after.append("deduplicate packages")
+    pipeline.add_step("verify archive", verify_archive, depends_on=verify_after)
+    pipeline.add_step("checksum archive", checksum_archive, depends_on=["verify archive"])
+    if compressor is not None:
+        pipeline.add_step("compress archive", compress_archive, depends_on=["compress copies", "checksum archive"])
+    pipeline.run()
+    if compressor is not None and not compressor.closed:
+        # A step it needed failed; don't leave a partial container behind
+        compressor.close(abort=True)
+    pipeline.print_timeline()
+    if io_scheduler is not None:
+        print("I/O by volume:")
+        io_scheduler.print_summary()
+        io_scheduler.close()
+    journal.finish()
+
+    # Shut down the persistent scripting bridge, unless the caller shares it across projects
+    if backend is None:
+        apple_script_agent.backend.close()
+        print(f"Ran {apple_script_agent.backend.commands_run} scripting commands "
+              f"in {apple_script_agent.backend.command_seconds:.1f}s")
+
+    failed_steps = [step.name for step in pipeline.steps.values() if step.error is not None or step.skipped]
+    packaged = pipeline.results.get("package documents") or {}
+    verified = pipeline.results.get("verify archive") or {}
+    checksums = pipeline.results.get("checksum archive") or {}
+    return {
+        "success": (not failed_steps and not packaged.get("failed") and not verified.get("empty_files")
+                    and not checksums.get("mismatched")),
+        "project": folder_selector.folder_path,
+        "archive": archived_project_path,
+        "packaged": packaged.get("packaged", 0),
+        "failed": packaged.get("failed", []),
+        "failed_steps": failed_steps,
+    }
+
+
+def make_io_scheduler(args):
+    """
+    The IOScheduler described by the --io-* and --throttle-hours options, or
+    None if none was given (transfers then run unscheduled).
+    """
+    if args.io_concurrency is None and not args.io_limit and not args.io_volume and not args.throttle_hours:
+        return None
+    default_limits = VolumeLimits(args.io_concurrency or VolumeLimits().max_concurrency,
+                                  args.io_limit * 1024 ** 2 if args.io_limit else None)
+    return IOScheduler(default_limits, volume_limits=dict(args.io_volume), throttle_hours=args.throttle_hours)
+
+
+def archive_folder(project_folder, args, backend):
+    """
+    Headless archive_project for one folder, turning any error into a failed summary.
+    """
+    folder_selector = TKFolderSelector()
+    folder_selector.use_folder(project_folder)
+    try:
+        if not os.path.isdir(folder_selector.folder_path):
+            raise FileNotFoundError(f"{folder_selector.folder_path} is not a directory")
+        return archive_project(folder_selector, args, backend=backend, headless=True)
+    except Exception as e:
+        print(f"✗ {folder_selector.folder_name}: {e}")
+        return {"success": False, "project": folder_selector.folder_path, "error": str(e)}
+
+
+def run_batch(project_folders, args):
+    """
+    Archive every project in *project_folders* unattended, one after another,
+    sharing one scripting bridge. A project that fails is reported and the
+    queue moves on to the next one.
+
+    Returns:
+        list: One archive_project summary per project
+    """
+    backend = default_backend()
+    summaries = []
+    try:
+        for index, project_folder in enumerate(project_folders, 1):
+            print(f"\n===== [{index}/{len(project_folders)}] {project_folder} =====")
+            summaries.append(archive_folder(project_folder, args, backend))
+    finally:
+        backend.close()
+        print(f"Ran {backend.commands_run} scripting commands in {backend.command_seconds:.1f}s")
+
+    print(f"\nBatch complete: {sum(1 for s in summaries if s['success'])}/{len(summaries)} project(s) archived")
+    for summary in summaries:
+        name = os.path.basename(summary["project"])
+        if summary["success"]:
+            print(f"  ✓ {name}: {summary['packaged']} document(s) packaged")
+        elif "error" in summary:
+            print(f"  ✗ {name}: {summary['error']}")
         else:
-            print("✅ No empty files found.")
-
-    # Check if the bot did not find "CTID_Print" files in the original project directory
-    # Returns a ⚠️ CRITICAL WARNING print if there are no "CTID_Print" files in project_layout_path
-    folder_selector.check_for_missing_print_pdf_files(
-        project_layout_path=project_layout_path,
-        folder_id_print=folder_id_print
-    )
+            problems = [f"step '{step}' failed" for step in summary["failed_steps"]]
+            problems += [f"{doc} not packaged" for doc in summary["failed"]]
+            print(f"  ✗ {name}: {', '.join(problems) or 'empty or corrupted files in the archive'}")
+    return summaries
+
+
+def drain_queue(args):
+    """
+    Archive projects claimed from the shared queue in args.queue until it is
+    empty. Several Macs (or several local processes) can drain the same queue.
+    """
+    work_queue = WorkQueue(args.queue)
+    backend = default_backend()
+    try:
+        worker = QueueWorker(work_queue, lambda project_folder: archive_folder(project_folder, args, backend))
+        processed = worker.run()
+    finally:
+        backend.close()
+    print(f"\n{work_queue.worker_id} processed {processed} project(s)")
+    work_queue.print_status()
+    work_queue.close()
+
+
+def watch_drop_folder(args):
+    """
+    Archive projects as they land in args.watch, each in its own run_cnt.py
+    process so a crashed run can't take the service down. Each run's output
+    goes to a log in the drop folder's .cnt_logs directory.
+    """
+    log_dir = os.path.join(args.watch, ".cnt_logs")
+    os.makedirs(log_dir, exist_ok=True)
+
+    def archive(project_folder):
+        log_path = os.path.join(log_dir, f"{os.path.basename(project_folder)}.log")
+        command = [sys.executable, os.path.abspath(__file__), project_folder, "--workers", str(args.workers)]
+        if args.io_concurrency:
+            command += ["--io-concurrency", str(args.io_concurrency)]
+        if args.io_limit:
+            command += ["--io-limit", str(args.io_limit)]
+        for path, limits in args.io_volume:
+            mbps = f":{limits.bytes_per_second / 1024 ** 2:g}" if limits.bytes_per_second else ""
+            command += ["--io-volume", f"{path}={limits.max_concurrency}{mbps}"]
+        if args.throttle_hours:
+            command += ["--throttle-hours", "-".join(str(hour) for hour in args.throttle_hours)]
+        with open(log_path, "a", encoding="utf-8") as log:
+            print(f"   {os.path.basename(project_folder)}: logging to {log_path}")
+            return subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL).returncode == 0
+
+    DropFolderWatcher(args.watch, archive, settle_seconds=args.settle, max_jobs=args.max_jobs).run()
+
+
+def verify_archive_checksums(archive_path):
+    """
+    Re-hash an existing archive and compare it with its checksum manifest.
+
+    Returns:
+        bool: True if every listed file is present and unchanged
+    """
+    checksum_manifest = ChecksumManifest.find(archive_path)
+    if checksum_manifest is None:
+        print(f"⚠️  No checksum manifest in {archive_path}")
+        return False
+    result = checksum_manifest.verify()
+    print("✅ Archive matches its checksums." if result["success"] else "⚠️ Archive does not match its checksums.")
+    return result["success"]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.verify:
+        sys.exit(0 if verify_archive_checksums(args.verify) else 1)
+
+    if args.watch:
+        watch_drop_folder(args)
+        return
+
+    project_folders = list(args.projects)
+    if args.batch:
+        project_folders += load_project_list(args.batch)
+
+    if args.queue:
+        if project_folders:
+            # Queue paths must be valid on every Mac, so store them absolute
+            work_queue = WorkQueue(args.queue)
+            added = work_queue.enqueue(os.path.abspath(folder) for folder in project_folders)
+            print(f"Queued {added} of {len(project_folders)} project(s)")
+            work_queue.print_status()
+            work_queue.close()
+        if args.drain:
+            drain_queue(args)
+        elif not project_folders:
+            WorkQueue(args.queue).print_status()
+        return
+
+    if project_folders:
+        # Headless: no dialogs, no prompt; the exit status reports failures
+        summaries = run_batch(project_folders, args)
+        sys.exit(0 if all(summary["success"] for summary in summaries) else 1)
+
+    # Create an instance of the folder selector
+    folder_selector = TKFolderSelector()
+
+    # Call the select_folder method
+    selected_folder_name = folder_selector.select_folder()
+    if not selected_folder_name:
+        sys.exit()  # Close the program if no project directory is selected.
+
+    archive_project(folder_selector, args)
 
     input("\nPress Enter to close the program ")
 
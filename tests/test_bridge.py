@@ -0,0 +1,41 @@
+import os
+
+from cnt.bridge import FakeBackend
+from cnt.cnt import AppleScript
+from cnt.package_check import package_problems
+
+
+def _document(tmp_path):
+    layout = tmp_path / "11492_S24_Monroe_Color" / "11492_Layout"
+    (layout / "Links").mkdir(parents=True)
+    (layout / "Links" / "cover.tif").write_bytes(b"tiff")
+    (layout / "Chapter_01.indd").write_bytes(b"indesign")
+    return str(layout / "Chapter_01.indd")
+
+
+def test_fake_backend_packages_the_open_document(tmp_path):
+    indd_path = _document(tmp_path)
+    agent = AppleScript(backend=FakeBackend())
+    assert agent.open_indesign_file(indd_path)
+
+    layout_dir = str(tmp_path / "archive" / "11492_Layout")
+    result = agent.package_indesign_file("11492", refresh_fonts=False, layout_dir=layout_dir)
+    assert result["success"], result
+    assert result["package_path"] == os.path.join(layout_dir, "Chapter_01_Packaged")
+    assert result["report"].document == "Chapter_01.indd"
+    assert package_problems(result["package_path"], indd_path) == []
+
+
+def test_fake_backend_fails_to_package_without_an_open_document(tmp_path):
+    agent = AppleScript(backend=FakeBackend())
+    result = agent.package_indesign_file("11492", refresh_fonts=False, layout_dir=str(tmp_path / "11492_Layout"))
+    assert not result["success"]
+    assert "No document is open" in result["error"]
+
+
+def test_caller_responses_take_precedence(tmp_path):
+    backend = FakeBackend({"tell myDoc to package": {"success": False, "error": "Package failed"}})
+    agent = AppleScript(backend=backend)
+    agent.open_indesign_file(_document(tmp_path))
+    result = agent.package_indesign_file("11492", refresh_fonts=False, layout_dir=str(tmp_path / "11492_Layout"))
+    assert result == {"success": False, "error": "Package failed"}
@@ -0,0 +1,69 @@
+import hashlib
+import os
+
+import pytest
+
+from cnt.checksums import ChecksumManifest, ChecksumEngine
+from run_cnt import verify_archive_checksums
+
+
+def _archive(tmp_path):
+    archive = tmp_path / "11492_Monroe"
+    (archive / "11492_Logs").mkdir(parents=True)
+    (archive / "11492_Logs" / "log.txt").write_text("print run approved")
+    (archive / "11492_Print").mkdir()
+    (archive / "11492_Print" / "11492_Print_Cover.pdf").write_bytes(os.urandom(70000))
+    (archive / ".cnt_manifest.json").write_text("{}")
+    return archive
+
+
+@pytest.mark.parametrize("algorithm", ["blake2b", "sha256"])
+def test_round_trip(tmp_path, algorithm):
+    archive = _archive(tmp_path)
+    result = ChecksumManifest(str(archive), algorithm=algorithm).write(engine=ChecksumEngine(2, algorithm, 4096))
+    assert result["success"] and result["files"] == 2
+
+    manifest = ChecksumManifest.find(str(archive))
+    assert manifest.algorithm == algorithm
+    with open(manifest.path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    log = archive / "11492_Logs" / "log.txt"
+    assert f"{hashlib.new(algorithm, log.read_bytes()).hexdigest()}  11492_Logs/log.txt" in lines
+
+    verified = manifest.verify()
+    assert verified["success"] and verified["checked"] == 2
+    assert verified["unlisted"] == [] and verify_archive_checksums(str(archive))
+
+
+def test_switching_algorithm_replaces_the_old_manifest(tmp_path):
+    archive = _archive(tmp_path)
+    ChecksumManifest(str(archive), algorithm="sha256").write()
+    ChecksumManifest(str(archive), algorithm="blake2b").write()
+    assert ChecksumManifest.find(str(archive)).algorithm == "blake2b"
+    assert not os.path.exists(archive / ".cnt_checksums.sha256")
+
+
+def test_tampered_missing_and_unlisted_files_fail_verification(tmp_path):
+    archive = _archive(tmp_path)
+    ChecksumManifest(str(archive), algorithm="sha256").write()
+    (archive / "11492_Logs" / "log.txt").write_text("print run rejected")
+    (archive / "11492_Print" / "11492_Print_Cover.pdf").unlink()
+    (archive / "11492_Print" / "11492_Print_Interior.pdf").write_bytes(b"%PDF")
+
+    result = ChecksumManifest.find(str(archive)).verify()
+    assert not result["success"]
+    assert result["mismatched"] == ["11492_Logs/log.txt"]
+    assert result["missing"] == ["11492_Print/11492_Print_Cover.pdf"]
+    assert result["unlisted"] == ["11492_Print/11492_Print_Interior.pdf"]
+    assert not verify_archive_checksums(str(archive))
+
+
+def test_copy_that_differs_from_its_source_is_reported(tmp_path):
+    archive = _archive(tmp_path)
+    source = tmp_path / "11492_S24_Monroe_Color" / "11492_Logs"
+    source.mkdir(parents=True)
+    (source / "log.txt").write_text("print run approved, final")
+
+    result = ChecksumManifest(str(archive)).write(sources={str(archive / "11492_Logs"): str(source)})
+    assert not result["success"]
+    assert result["mismatched"] == [str(archive / "11492_Logs" / "log.txt")]
@@ -0,0 +1,38 @@
+import os
+import tarfile
+
+from cnt.compression import ArchiveCompressor, extract_member
+
+
+def _archive(tmp_path):
+    root = tmp_path / "11492_S24_Monroe_Color"
+    layout = root / "11492_Layout" / "Chapter_01_Packaged"
+    layout.mkdir(parents=True)
+    (layout / "Chapter_01.indd").write_bytes(b"indesign " * 5000)
+    (layout / "Chapter_01.pdf").write_bytes(os.urandom(40000))
+    os.link(layout / "Chapter_01.indd", layout / "Chapter_01 copy.indd")
+
+    compressor = ArchiveCompressor(str(tmp_path / "archive.tar.gz"), str(root), max_workers=2, block_size=16384)
+    compressor.add_tree(str(root))
+    return root, compressor.close()
+
+
+def test_extract_member_covers_compressed_stored_and_hardlinked_entries(tmp_path):
+    root, result = _archive(tmp_path)
+    assert result["files"] == 2 and result["stored_bytes"] > 0
+
+    for name in ("Chapter_01.indd", "Chapter_01.pdf", "Chapter_01 copy.indd"):
+        member = f"{root.name}/11492_Layout/Chapter_01_Packaged/{name}"
+        extracted = extract_member(result["path"], member, str(tmp_path / "out"))
+        with open(extracted, "rb") as f:
+            assert f.read() == (root / "11492_Layout" / "Chapter_01_Packaged" / name).read_bytes()
+
+
+def test_archive_is_an_ordinary_tar_gz(tmp_path):
+    root, result = _archive(tmp_path)
+    with tarfile.open(result["path"], "r:gz") as tar:
+        links = [info for info in tar.getmembers() if info.islnk()]
+        tar.extractall(tmp_path / "all")
+    assert len(links) == 1
+    copy = tmp_path / "all" / root.name / "11492_Layout" / "Chapter_01_Packaged" / "Chapter_01 copy.indd"
+    assert copy.read_bytes() == b"indesign " * 5000
@@ -0,0 +1,84 @@
+import ctypes
+import errno
+import os
+import sys
+import types
+
+import pytest
+
+import cnt.copying as copying
+from cnt.copying import CopyEngine
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="exercises the Linux fast paths")
+
+
+def _unsupported(name, calls, error=errno.EOPNOTSUPP):
+    def fail(*args):
+        calls.append(name)
+        raise OSError(error, os.strerror(error))
+    return fail
+
+
+def _fake_clonefile(calls):
+    def clonefile(source, destination, flags):
+        calls.append("clonefile")
+        ctypes.set_errno(errno.ENOTSUP)
+        return -1
+    return clonefile
+
+
+def _files(tmp_path, count=2):
+    pairs = []
+    for index in range(count):
+        source = tmp_path / f"cover_{index}.tif"
+        source.write_bytes(os.urandom(3 * 1024 * 1024 + index))
+        pairs.append((str(source), str(tmp_path / f"copy_{index}.tif")))
+    return pairs
+
+
+@pytest.mark.parametrize("forced, expected", [
+    (["clonefile"], "copy_file_range"),
+    (["ficlone"], "copy_file_range"),
+    (["ficlone", "copy_file_range"], "sendfile"),
+    (["ficlone", "copy_file_range", "sendfile"], "buffered"),
+])
+def test_unsupported_fast_paths_fall_back(tmp_path, monkeypatch, forced, expected):
+    calls = []
+    if "clonefile" in forced:
+        monkeypatch.setattr(copying, "_clonefile", _fake_clonefile(calls))
+    if "ficlone" in forced:
+        monkeypatch.setattr(copying, "fcntl", types.SimpleNamespace(ioctl=_unsupported("ficlone", calls)))
+    if "copy_file_range" in forced:
+        monkeypatch.setattr(os, "copy_file_range", _unsupported("copy_file_range", calls, errno.EXDEV))
+    if "sendfile" in forced:
+        monkeypatch.setattr(os, "sendfile", _unsupported("sendfile", calls, errno.EINVAL))
+
+    pairs = _files(tmp_path)
+    result = CopyEngine(max_workers=1).copy_files(pairs)
+    assert result["success"], result["errors"]
+    assert result["methods"] == {expected: len(pairs)}
+    for source, destination in pairs:
+        with open(source, "rb") as src, open(destination, "rb") as dst:
+            assert src.read() == dst.read()
+    # An unsupported mechanism isn't tried again for the same devices
+    assert sorted(calls) == sorted(forced)
+
+
+def test_real_fast_path_error_fails_the_file(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(os, "copy_file_range", _unsupported("copy_file_range", calls, errno.EIO))
+    pairs = _files(tmp_path, count=1)
+    result = CopyEngine().copy_files(pairs)
+    assert not result["success"]
+    assert [path for path, _message in result["errors"]] == [pairs[0][0]]
+    assert result["files"] == 0
+
+
+def test_unexpected_exception_is_counted_as_failure(tmp_path, monkeypatch):
+    def broken(*args):
+        raise RuntimeError("ctypes blew up")
+    monkeypatch.setattr(CopyEngine, "_copy_file", broken)
+    pairs = _files(tmp_path)
+    result = CopyEngine().copy_files(pairs)
+    assert not result["success"]
+    assert sorted(result["errors"]) == sorted((source, "ctypes blew up") for source, _destination in pairs)
@@ -0,0 +1,91 @@
+import os
+import shutil
+
+import pytest
+
+from cnt.copying import CopyEngine
+from cnt.dedup import PackageDeduplicator, unshare_package
+from run_cnt import parse_args, run_batch
+
+FONT = os.urandom(100 * 1024)
+
+
+def _packages(layout):
+    for chapter in ("Chapter_01", "Chapter_02", "Chapter_03"):
+        package = layout / f"{chapter}_Packaged"
+        (package / "Document fonts").mkdir(parents=True)
+        (package / "Document fonts" / "MinionPro.otf").write_bytes(FONT)
+        (package / f"{chapter}.indd").write_bytes(chapter.encode() * 20000)  # same size, different content
+    return [layout / f"{chapter}_Packaged" / "Document fonts" / "MinionPro.otf"
+            for chapter in ("Chapter_01", "Chapter_02", "Chapter_03")]
+
+
+def _inode(path):
+    return os.stat(path).st_ino
+
+
+def test_identical_files_are_hardlinked(tmp_path):
+    fonts = _packages(tmp_path)
+    deduplicator = PackageDeduplicator(str(tmp_path), mode="hardlink")
+    result = deduplicator.run()
+    assert (result["files_linked"], result["bytes_reclaimed"], result["errors"]) == (2, 2 * len(FONT), [])
+    assert len({_inode(font) for font in fonts}) == 1
+    assert all(font.read_bytes() == FONT for font in fonts)
+    # Equal-size documents with different content are left alone
+    assert len({_inode(path) for path in tmp_path.glob("*_Packaged/*.indd")}) == 3
+    # A second run finds them already linked
+    assert deduplicator.run()["files_linked"] == 0
+
+
+def test_unshare_package_removes_only_linked_files(tmp_path):
+    fonts = _packages(tmp_path)
+    PackageDeduplicator(str(tmp_path), mode="hardlink").run()
+    assert unshare_package(str(fonts[1].parent.parent)) == 1
+    assert not fonts[1].exists() and fonts[0].exists()
+
+
+def test_identical_files_are_reflinked(tmp_path, monkeypatch):
+    def clone(self, source_file, destination_file):
+        shutil.copyfile(source_file, destination_file)  # stands in for a copy-on-write clone
+        return "reflink"
+    monkeypatch.setattr(CopyEngine, "clone_file", clone)
+    fonts = _packages(tmp_path)
+    mtime = os.stat(fonts[2]).st_mtime_ns - 10 ** 9
+    os.utime(fonts[2], ns=(mtime, mtime))
+
+    result = PackageDeduplicator(str(tmp_path), mode="reflink").run()
+    assert (result["files_linked"], result["unclonable"]) == (2, 0)
+    assert len({_inode(font) for font in fonts}) == 3  # clones stay independent files
+    assert os.stat(fonts[2]).st_mtime_ns == mtime
+    assert all(font.read_bytes() == FONT for font in fonts)
+
+
+def test_duplicates_are_kept_where_the_filesystem_cannot_clone(tmp_path, monkeypatch):
+    monkeypatch.setattr(CopyEngine, "clone_file", lambda self, source_file, destination_file: None)
+    fonts = _packages(tmp_path)
+    result = PackageDeduplicator(str(tmp_path), mode="reflink").run()
+    assert (result["files_linked"], result["unclonable"]) == (0, 2)
+    assert not list(tmp_path.glob("**/*.cnt_dedup"))
+
+
+def _project(tmp_path):
+    layout = tmp_path / "11492_S24_Monroe_Color" / "11492_Layout"
+    (layout / "Document fonts").mkdir(parents=True)
+    (layout / "Document fonts" / "MinionPro.otf").write_bytes(FONT)
+    for chapter in ("Chapter_01", "Chapter_02"):
+        (layout / f"{chapter}.indd").write_bytes(chapter.encode() * 100)
+    return str(tmp_path / "11492_S24_Monroe_Color")
+
+
+@pytest.mark.parametrize("options, linked", [([], False), (["--dedup", "hardlink"], True)])
+def test_packages_are_only_deduplicated_when_asked(tmp_path, monkeypatch, options, linked):
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    project = _project(tmp_path)
+    assert parse_args([project]).dedup == "off"
+
+    summaries = run_batch([project], parse_args([project] + options))
+    assert summaries[0]["success"]
+    layout = tmp_path / "home" / "Documents" / "Archived_Projects" / "11492_Monroe" / "11492_Layout"
+    fonts = sorted(layout.glob("*_Packaged/Document fonts/MinionPro.otf"))
+    assert len(fonts) == 2
+    assert (_inode(fonts[0]) == _inode(fonts[1])) == linked
@@ -0,0 +1,127 @@
+import threading
+import types
+from datetime import datetime
+
+import pytest
+
+import cnt.io_scheduler as io_scheduler
+from cnt.io_scheduler import IOScheduler, VolumeLimits
+
+MB = 1024 * 1024
+
+
+class _Clock:
+    # Stands in for the time module: sleep() only moves the clock forward
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    perf_counter = monotonic
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(io_scheduler, "time", clock)
+    return clock
+
+
+def _at_hour(monkeypatch, hour):
+    monkeypatch.setattr(io_scheduler, "datetime",
+                        types.SimpleNamespace(now=lambda: datetime(2026, 10, 12, hour, 30)))
+
+
+def _capped(tmp_path, mbps=1, throttle_hours=None):
+    scheduler = IOScheduler(VolumeLimits(4, mbps * MB), throttle_hours=throttle_hours, lock_dir="")
+    return scheduler, scheduler.volumes(str(tmp_path / "Chapter_01.indd"))
+
+
+def test_token_bucket_paces_transfers_to_the_cap(tmp_path, clock):
+    scheduler, volumes = _capped(tmp_path, mbps=2)
+    for _chunk in range(10):
+        scheduler.consume(MB // 2, volumes)
+    assert clock.slept == pytest.approx(2.5)
+    assert volumes[0].bytes == 5 * MB
+
+
+def test_idle_volume_allows_one_second_of_burst(tmp_path, clock):
+    scheduler, volumes = _capped(tmp_path, mbps=1)
+    clock.sleep(30)
+    clock.slept = 0.0
+    scheduler.consume(MB, volumes)
+    assert clock.slept == 0.0
+    scheduler.consume(MB, volumes)  # the burst is used up
+    assert clock.slept == pytest.approx(1.0)
+
+
+def test_caps_only_apply_during_throttle_hours(tmp_path, clock, monkeypatch):
+    scheduler, volumes = _capped(tmp_path, throttle_hours=(8, 18))
+    _at_hour(monkeypatch, 20)
+    assert not scheduler.is_capped(volumes)
+    scheduler.consume(10 * MB, volumes)
+    assert clock.slept == 0.0
+
+    _at_hour(monkeypatch, 10)
+    assert scheduler.is_capped(volumes)
+    scheduler.consume(MB, volumes)
+    assert clock.slept == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("hour, throttling", [(23, True), (3, True), (12, False)])
+def test_throttle_hours_can_span_midnight(monkeypatch, hour, throttling):
+    _at_hour(monkeypatch, hour)
+    assert IOScheduler(throttle_hours=(22, 6), lock_dir="").throttling() == throttling
+
+
+def _hold(scheduler, path, entered, leave):
+    with scheduler.transfer(path):
+        entered.set()
+        leave.wait(5)
+
+
+def test_concurrency_limit_per_volume(tmp_path):
+    scheduler = IOScheduler(VolumeLimits(2), lock_dir="")
+    path = str(tmp_path / "Chapter_01.indd")
+    leave = threading.Event()
+    entered = [threading.Event() for _ in range(3)]
+    threads = [threading.Thread(target=_hold, args=(scheduler, path, event, leave)) for event in entered]
+    for thread in threads:
+        thread.start()
+    assert entered[0].wait(5) and entered[1].wait(5)
+    assert not entered[2].wait(0.2)
+    assert scheduler.volume(path).active == 2
+    leave.set()
+    for thread in threads:
+        thread.join(5)
+    assert all(event.is_set() for event in entered) and scheduler.volume(path).active == 0
+
+
+def test_slot_lock_files_are_shared_between_schedulers(tmp_path):
+    # Two schedulers stand in for two run_cnt.py processes sharing one NAS share
+    lock_dir = str(tmp_path / "slots")
+    first, second = (IOScheduler(VolumeLimits(1), lock_dir=lock_dir) for _ in range(2))
+    path = str(tmp_path / "Chapter_01.indd")
+    entered, leave = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(first, path, entered, leave))
+    holder.start()
+    assert entered.wait(5)
+
+    waiting_entered, done = threading.Event(), threading.Event()
+    done.set()
+    waiter = threading.Thread(target=_hold, args=(second, path, waiting_entered, done))
+    waiter.start()
+    assert not waiting_entered.wait(0.3)
+    leave.set()
+    assert waiting_entered.wait(5)
+    holder.join(5)
+    waiter.join(10)
+    assert second.volume(path).waits == 1
+    first.close()
+    second.close()
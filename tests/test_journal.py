@@ -0,0 +1,63 @@
+import json
+
+from cnt.journal import RunJournal
+from cnt.pipeline import Pipeline
+
+
+def _run(archive, steps, resume=False):
+    journal = RunJournal(str(archive))
+    journal.start(resume=resume, project="11492_S24_Monroe_Color")
+    pipeline = Pipeline(journal=journal)
+    calls = []
+    for name, result, outputs in steps:
+        pipeline.add_step(name, lambda name=name, result=result: calls.append(name) or result,
+                          resumable=True, outputs=outputs)
+    pipeline.run()
+    journal.finish()
+    return pipeline, calls
+
+
+def test_completed_step_is_skipped_on_resume(tmp_path):
+    steps = [("archive directories", {"success": True}, []), ("copy print files", {"success": True}, [])]
+    _run(tmp_path, steps)
+    pipeline, calls = _run(tmp_path, steps, resume=True)
+    assert calls == []
+    assert pipeline.steps["archive directories"].resumed
+    assert pipeline.results["copy print files"] == {"success": True}
+
+
+def test_step_runs_again_when_an_output_is_missing(tmp_path):
+    output = tmp_path / "11492_Print"
+    output.mkdir()
+    steps = [("archive directories", None, []), ("copy print files", None, [str(output)])]
+    _run(tmp_path, steps)
+    output.rmdir()
+    _pipeline, calls = _run(tmp_path, steps, resume=True)
+    assert calls == ["copy print files"]
+
+
+def test_unsuccessful_step_is_not_journaled(tmp_path):
+    steps = [("copy subdirectories", {"success": False, "subdirectories": {}}, [])]
+    pipeline, _calls = _run(tmp_path, steps)
+    assert pipeline.steps["copy subdirectories"].incomplete
+    _pipeline, calls = _run(tmp_path, steps, resume=True)
+    assert calls == ["copy subdirectories"]
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    journal = RunJournal(str(tmp_path))
+    journal.start()
+    journal.step_done("archive directories", result={"success": True})
+    journal.document_done("/Volumes/Production/Chapter_01.indd", str(tmp_path / "Chapter_01_Packaged"))
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"event": "step_done", "step": "copy print files", "result": None})[:25])
+
+    replayed = RunJournal(str(tmp_path))
+    assert replayed.start(resume=True)
+    assert list(replayed.steps) == ["archive directories"]
+    assert replayed.documents == {"/Volumes/Production/Chapter_01.indd": str(tmp_path / "Chapter_01_Packaged")}
+    # The resumed run appends after the torn line and stays readable
+    replayed.step_done("copy print files")
+    again = RunJournal(str(tmp_path))
+    assert again.replay()
+    assert list(again.steps) == ["archive directories", "copy print files"]
@@ -0,0 +1,59 @@
+import os
+
+from cnt.copying import CopyEngine
+from cnt.manifest import ArchiveManifest
+
+
+def _project(tmp_path):
+    source = tmp_path / "11492_Manuscript"
+    source.mkdir()
+    for name in ("chapter_01.docx", "chapter_02.docx", "notes.txt"):
+        (source / name).write_text(f"{name} draft")
+    archive = tmp_path / "archive"
+    return source, archive, str(archive / "11492_Manuscript")
+
+
+def _sync(source, archive, destination, on_deleted="flag"):
+    manifest = ArchiveManifest.load(str(archive))
+    return CopyEngine(max_workers=2).copy_tree(str(source), destination, manifest=manifest, on_deleted=on_deleted)
+
+
+def test_second_run_skips_unchanged_files(tmp_path):
+    source, archive, destination = _project(tmp_path)
+    assert _sync(source, archive, destination)["files"] == 3
+    result = _sync(source, archive, destination)
+    assert (result["files"], result["skipped"]) == (0, 3)
+
+
+def test_changed_file_is_copied_again(tmp_path):
+    source, archive, destination = _project(tmp_path)
+    _sync(source, archive, destination)
+    (source / "notes.txt").write_text("notes, second pass")
+    result = _sync(source, archive, destination)
+    assert (result["files"], result["skipped"]) == (1, 2)
+    with open(os.path.join(destination, "notes.txt")) as f:
+        assert f.read() == "notes, second pass"
+
+
+def test_deleted_source_is_flagged_once_and_kept(tmp_path):
+    source, archive, destination = _project(tmp_path)
+    _sync(source, archive, destination)
+    (source / "notes.txt").unlink()
+    archived = os.path.join(destination, "notes.txt")
+
+    assert _sync(source, archive, destination)["deleted"] == [archived]
+    assert os.path.exists(archived)
+    assert ArchiveManifest.load(str(archive)).entries["11492_Manuscript/notes.txt"]["deleted_from_source"]
+    # Already flagged, so a later run doesn't report it again
+    assert _sync(source, archive, destination)["deleted"] == []
+
+
+def test_deleted_source_is_removed(tmp_path):
+    source, archive, destination = _project(tmp_path)
+    _sync(source, archive, destination)
+    (source / "notes.txt").unlink()
+    archived = os.path.join(destination, "notes.txt")
+
+    assert _sync(source, archive, destination, on_deleted="remove")["deleted"] == [archived]
+    assert not os.path.exists(archived)
+    assert "11492_Manuscript/notes.txt" not in ArchiveManifest.load(str(archive)).entries
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from cnt.package_cache import PackageCache
+from cnt.source_index import SourceIndex
+
+
+def _layout(tmp_path):
+    source = tmp_path / "11492_S24_Monroe_Color" / "11492_Layout"
+    (source / "Links" / "Chapter_01").mkdir(parents=True)
+    (source / "Links" / "Chapter_01" / "cover.tif").write_bytes(b"tiff" * 100)
+    (source / "Document fonts").mkdir()
+    (source / "Document fonts" / "MinionPro.otf").write_bytes(b"font")
+    (source / "Chapter_01.indd").write_bytes(b"indesign draft 1")
+    return str(source / "Chapter_01.indd")
+
+
+def _packaged(tmp_path, indd_path, **options):
+    # A first run packaged the document and stored its fingerprint
+    cache = PackageCache(str(tmp_path / "archive" / "11492_Layout"), **options)
+    package_path = cache.package_path_for(indd_path)
+    os.makedirs(package_path)
+    with open(os.path.join(package_path, os.path.basename(indd_path)), "wb") as f:
+        f.write(b"packaged")
+    cache.store(indd_path, cache.fingerprint(indd_path), package_path)
+    return package_path
+
+
+def _lookup(tmp_path, indd_path, index=False, **options):
+    # A later run loads the cache from disk
+    source_index = SourceIndex.build(os.path.dirname(os.path.dirname(indd_path))) if index else None
+    cache = PackageCache(str(tmp_path / "archive" / "11492_Layout"), index=source_index, **options)
+    return cache, cache.lookup(indd_path, cache.fingerprint(indd_path))
+
+
+@pytest.mark.parametrize("index", [False, True])
+def test_unchanged_document_hits(tmp_path, index):
+    indd_path = _layout(tmp_path)
+    package_path = _packaged(tmp_path, indd_path)
+    cache, found = _lookup(tmp_path, indd_path, index=index)
+    assert found == package_path
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_changed_document_misses(tmp_path):
+    indd_path = _layout(tmp_path)
+    _packaged(tmp_path, indd_path)
+    stat = os.stat(indd_path)
+    with open(indd_path, "wb") as f:
+        f.write(b"indesign draft 2")  # same size, and the mtime is put back
+    os.utime(indd_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    cache, found = _lookup(tmp_path, indd_path)
+    assert found is None and cache.misses == 1
+
+
+def _touch(indd_path):
+    stat = os.stat(indd_path)
+    os.utime(indd_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_touched_document_misses_without_hashing(tmp_path):
+    indd_path = _layout(tmp_path)
+    _packaged(tmp_path, indd_path, hash_document=False)
+    _touch(indd_path)
+    assert _lookup(tmp_path, indd_path, hash_document=False)[1] is None
+
+
+def test_touched_document_hits_when_hashing(tmp_path):
+    indd_path = _layout(tmp_path)
+    package_path = _packaged(tmp_path, indd_path)
+    _touch(indd_path)
+    assert _lookup(tmp_path, indd_path)[1] == package_path
+
+
+@pytest.mark.parametrize("index", [False, True])
+@pytest.mark.parametrize("asset", ["Links/Chapter_01/cover.tif", "Document fonts/MinionPro.otf"])
+def test_changed_asset_misses(tmp_path, index, asset):
+    indd_path = _layout(tmp_path)
+    _packaged(tmp_path, indd_path)
+    path = os.path.join(os.path.dirname(indd_path), *asset.split("/"))
+    with open(path, "ab") as f:
+        f.write(b"edited")
+    assert _lookup(tmp_path, indd_path, index=index)[1] is None
+
+
+def test_new_link_misses(tmp_path):
+    indd_path = _layout(tmp_path)
+    _packaged(tmp_path, indd_path)
+    with open(os.path.join(os.path.dirname(indd_path), "Links", "map.ai"), "wb") as f:
+        f.write(b"map")
+    assert _lookup(tmp_path, indd_path)[1] is None
+
+
+def test_broken_package_misses(tmp_path):
+    indd_path = _layout(tmp_path)
+    package_path = _packaged(tmp_path, indd_path)
+    open(os.path.join(package_path, "Instructions.txt"), "w").close()
+    assert _lookup(tmp_path, indd_path)[1] is None
@@ -0,0 +1,40 @@
+import json
+
+from cnt.bridge import FakeBackend
+from cnt.cnt import AppleScript
+from cnt.package_check import parse_package_report
+
+
+def _package(tmp_path, output):
+    agent = AppleScript(backend=FakeBackend({"tell myDoc to package": {"output": output}}))
+    return agent.package_indesign_file("11492", refresh_fonts=False, layout_dir=str(tmp_path / "11492_Layout"))
+
+
+def test_parse_json_report():
+    report = parse_package_report(json.dumps({
+        "package_path": "/tmp/11492_Layout/Chapter_01_Packaged", "document": "Chapter_01.indd",
+        "font_count": 4, "missing_fonts": ["Minion Pro"], "link_count": 12, "missing_links": ["cover.tif"],
+        "modified_links": [], "embedded_links": 1, "inspect_seconds": 0.4, "package_seconds": 8.5,
+    }))
+    assert report.package_path == "/tmp/11492_Layout/Chapter_01_Packaged"
+    assert report.missing_fonts == ("Minion Pro",) and report.missing_links == ("cover.tif",)
+    assert (report.font_count, report.link_count, report.embedded_links) == (4, 12, 1)
+    assert report.package_seconds == 8.5
+
+
+def test_bare_path_and_empty_output_are_not_reports():
+    assert parse_package_report("/tmp/11492_Layout/Chapter_01_Packaged") is None
+    assert parse_package_report("") is None
+    assert parse_package_report('{"document": "Chapter_01.indd"}') is None
+
+
+def test_bare_path_is_still_accepted(tmp_path):
+    result = _package(tmp_path, "/tmp/11492_Layout/Chapter_01_Packaged\n")
+    assert result["success"]
+    assert result["package_path"] == "/tmp/11492_Layout/Chapter_01_Packaged"
+    assert result["report"] is None
+
+
+def test_empty_output_is_a_failure(tmp_path):
+    result = _package(tmp_path, "")
+    assert result == {"success": False, "error": "The package script returned no package path"}
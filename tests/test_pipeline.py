@@ -0,0 +1,23 @@
+import time
+
+from cnt.pipeline import Pipeline
+
+
+def test_waiting_background_steps_do_not_starve_the_pool():
+    pipeline = Pipeline(max_workers=2)
+    pipeline.add_step("copy_links", lambda: time.sleep(0.1) or "links", background=True)
+    for index in range(4):
+        pipeline.add_step(f"package_{index}", lambda index=index: index, depends_on=["copy_links"], background=True)
+    pipeline.add_step("report", lambda: "done", depends_on=[f"package_{index}" for index in range(4)])
+    results = pipeline.run()
+    assert results["report"] == "done"
+    assert [results[f"package_{index}"] for index in range(4)] == [0, 1, 2, 3]
+
+
+def test_failed_dependency_skips_its_dependents():
+    pipeline = Pipeline(max_workers=1)
+    pipeline.add_step("copy", lambda: 1 / 0, background=True)
+    pipeline.add_step("package", lambda: "package", depends_on=["copy"], background=True)
+    results = pipeline.run()
+    assert isinstance(results["copy"], ZeroDivisionError)
+    assert results["package"] is None
@@ -0,0 +1,91 @@
+import os
+import time
+
+from cnt.prefetch import LinkPrefetcher
+
+KB = 1024
+
+
+def _document(tmp_path, chapter, links_kb=400):
+    folder = tmp_path / "11492_Layout" / chapter
+    (folder / "Links").mkdir(parents=True)
+    (folder / "Links" / "figure.tif").write_bytes(os.urandom(links_kb * KB))
+    (folder / f"{chapter}.indd").write_bytes(os.urandom(100 * KB))
+    return str(folder / f"{chapter}.indd")
+
+
+def _prefetcher(tmp_path, max_kb, lookahead=1):
+    return LinkPrefetcher(str(tmp_path / "cache"), max_bytes=max_kb * KB, lookahead=lookahead)
+
+
+def _wait_cached(prefetcher, indd_path):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        entries = [prefetcher._entries.get(part) for part in prefetcher._parts(indd_path)]
+        if all(entry is not None and entry.ready.is_set() for entry in entries):
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"{indd_path} was not prefetched")
+
+
+def test_least_recently_used_document_is_evicted(tmp_path):
+    first, second, third = (_document(tmp_path, f"Chapter_0{index}") for index in (1, 2, 3))
+    prefetcher = _prefetcher(tmp_path, max_kb=1100)
+    assert prefetcher._fetch_document(first) and prefetcher._fetch_document(second)
+    assert prefetcher._fetch_document(first)  # used again, so the second chapter is now the oldest
+    assert prefetcher._fetch_document(third)
+
+    assert set(prefetcher._entries) == set(prefetcher._parts(first) + prefetcher._parts(third))
+    assert prefetcher.evictions == 2 and prefetcher.used_bytes <= prefetcher.max_bytes
+    assert not os.path.exists(prefetcher.local_dir(os.path.dirname(second)) + "/Links")
+    assert prefetcher.take(first) and prefetcher.take(second) is None
+    prefetcher.close()
+
+
+def test_taken_documents_are_opened_locally_and_unpinned_ones_evicted(tmp_path):
+    documents = [_document(tmp_path, f"Chapter_0{index}") for index in (1, 2, 3)]
+    prefetcher = _prefetcher(tmp_path, max_kb=1100)
+    prefetcher.schedule(documents)
+
+    _wait_cached(prefetcher, documents[0])
+    local = prefetcher.take(documents[0])
+    assert local != documents[0] and open(local, "rb").read() == open(documents[0], "rb").read()
+    assert os.path.exists(os.path.join(os.path.dirname(local), "Links", "figure.tif"))
+    prefetcher.release(documents[0])
+
+    _wait_cached(prefetcher, documents[1])
+    assert prefetcher.take(documents[1])
+    _wait_cached(prefetcher, documents[2])
+    assert prefetcher.take(documents[2])
+    assert prefetcher.evictions == 2 and not os.path.exists(local)
+    assert (prefetcher.hits, prefetcher.misses) == (3, 0)
+    prefetcher.close()
+    assert not os.path.exists(prefetcher.cache_root)
+
+
+def test_pinned_documents_are_never_evicted(tmp_path):
+    documents = [_document(tmp_path, f"Chapter_0{index}") for index in (1, 2, 3)]
+    prefetcher = _prefetcher(tmp_path, max_kb=1100)
+    prefetcher.schedule(documents)
+
+    _wait_cached(prefetcher, documents[0])
+    first = prefetcher.take(documents[0])  # still packaging, not released
+    _wait_cached(prefetcher, documents[1])
+    assert prefetcher.take(documents[1])
+    prefetcher._thread.join(timeout=5)
+
+    # No room for the third chapter, so it is opened from the source
+    assert prefetcher.take(documents[2]) is None
+    assert os.path.exists(first) and prefetcher.evictions == 0
+    assert not any(part in prefetcher._entries for part in prefetcher._parts(documents[2]))
+    prefetcher.close()
+
+
+def test_document_larger_than_the_cache_is_opened_from_the_source(tmp_path):
+    document = _document(tmp_path, "Chapter_01", links_kb=2000)
+    prefetcher = _prefetcher(tmp_path, max_kb=1100)
+    prefetcher.schedule([document])
+    prefetcher._thread.join(timeout=5)
+    assert prefetcher.take(document) is None
+    assert prefetcher.used_bytes == 0 and prefetcher.evictions == 0
+    prefetcher.close()
@@ -0,0 +1,80 @@
+import os
+import threading
+
+from cnt.staging import PackageStager
+
+MB = 1024 * 1024
+
+
+class _Estimator:
+    # Every document is estimated at 9 MB, reserved as 10.9 MB
+    def document_bytes(self, indd_path):
+        return 9 * MB
+
+
+def _stager(tmp_path, budget_bytes):
+    return PackageStager(str(tmp_path / "scratch"), budget_bytes=budget_bytes, estimator=_Estimator())
+
+
+def _reserve_in_background(stager, indd_path):
+    slots = []
+    thread = threading.Thread(target=lambda: slots.append(stager.reserve(indd_path)))
+    thread.start()
+    return thread, slots
+
+
+def test_second_slot_waits_until_space_is_released(tmp_path):
+    stager = _stager(tmp_path, budget_bytes=16 * MB)
+    first = stager.reserve("/Volumes/Production/Chapter_01.indd")
+    assert stager.used_bytes == first.reserved and os.path.isdir(first.layout_dir)
+
+    thread, slots = _reserve_in_background(stager, "/Volumes/Production/Chapter_02.indd")
+    thread.join(timeout=0.3)
+    assert thread.is_alive() and not slots
+
+    stager.release(first)
+    thread.join(timeout=5)
+    assert not thread.is_alive() and len(slots) == 1
+    assert not os.path.exists(first.layout_dir)
+    assert stager.used_bytes == stager.peak_bytes == slots[0].reserved
+    stager.release(slots[0])
+    assert stager.used_bytes == 0
+    stager.close()
+
+
+def test_hand_off_shrinks_the_reservation_and_the_move_frees_it(tmp_path):
+    stager = _stager(tmp_path, budget_bytes=16 * MB)
+    first = stager.reserve("/Volumes/Production/Chapter_01.indd")
+    package_path = os.path.join(first.layout_dir, "Chapter_01_Packaged")
+    os.makedirs(package_path)
+    with open(os.path.join(package_path, "Chapter_01.indd"), "wb") as f:
+        f.write(os.urandom(2 * MB))
+
+    thread, slots = _reserve_in_background(stager, "/Volumes/Production/Chapter_02.indd")
+    thread.join(timeout=0.3)
+    assert thread.is_alive()
+
+    moved = []
+    future = stager.hand_off(first, package_path, str(tmp_path / "archive" / "11492_Layout"), on_moved=moved.append)
+    assert future.result(timeout=5)["success"]
+    thread.join(timeout=5)
+    assert len(slots) == 1
+    assert moved == [str(tmp_path / "archive" / "11492_Layout" / "Chapter_01_Packaged")]
+    assert os.path.getsize(os.path.join(moved[0], "Chapter_01.indd")) == 2 * MB
+    assert stager.used_bytes == slots[0].reserved
+    stager.release(slots[0])
+    stager.close()
+
+
+def test_package_larger_than_the_budget_runs_alone(tmp_path):
+    stager = _stager(tmp_path, budget_bytes=4 * MB)
+    slot = stager.reserve("/Volumes/Production/Chapter_01.indd")
+    assert slot.reserved > stager.budget_bytes
+    thread, slots = _reserve_in_background(stager, "/Volumes/Production/Chapter_02.indd")
+    thread.join(timeout=0.3)
+    assert thread.is_alive()
+    stager.release(slot)
+    thread.join(timeout=5)
+    stager.release(slots[0])
+    stager.close()
+    assert not os.path.exists(tmp_path / "scratch")
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cnt.watcher import DropFolderWatcher, PollingNotifier
+
+PROJECT = "11492_S24_Monroe_Color"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _watcher(tmp_path, archived, settle_seconds=60.0, poll_interval=5.0, clock=time.monotonic):
+    drop = tmp_path / "drop"
+    drop.mkdir(exist_ok=True)
+    return DropFolderWatcher(str(drop), lambda path: archived.append(path) or True, settle_seconds=settle_seconds,
+                             poll_interval=poll_interval, notifier=PollingNotifier(str(drop)), clock=clock)
+
+
+def _write(project, name, size=1024):
+    os.makedirs(project, exist_ok=True)
+    with open(os.path.join(project, name), "ab") as f:
+        f.write(os.urandom(size))
+
+
+def _scan(watcher):
+    # One scan, with the queued jobs run to completion
+    watcher._pool = ThreadPoolExecutor(max_workers=1)
+    watcher.scan()
+    watcher._pool.shutdown(wait=True)
+
+
+def test_folder_is_archived_once_it_has_been_quiet_for_the_debounce(tmp_path):
+    clock, archived = _Clock(), []
+    watcher = _watcher(tmp_path, archived, clock=clock)
+    project = os.path.join(watcher.drop_folder, PROJECT)
+    _write(project, "Chapter_01.indd")
+    _scan(watcher)
+
+    # Still being copied in: every change restarts the quiet period
+    for clock.now in (30.0, 70.0):
+        _write(project, "Chapter_01.indd")
+        _scan(watcher)
+    clock.now = 129.0
+    _scan(watcher)
+    assert archived == [] and PROJECT in watcher.pending
+
+    clock.now = 130.0
+    _scan(watcher)
+    assert archived == [project] and not watcher.pending
+    assert watcher.state[PROJECT]["success"]
+
+    # Archived and unchanged: not queued again
+    clock.now = 500.0
+    _scan(watcher)
+    assert archived == [project]
+
+
+def test_project_changed_after_archiving_is_archived_again(tmp_path):
+    clock, archived = _Clock(), []
+    watcher = _watcher(tmp_path, archived, clock=clock)
+    project = os.path.join(watcher.drop_folder, PROJECT)
+    _write(project, "Chapter_01.indd")
+    _scan(watcher)
+    clock.now = 60.0
+    _scan(watcher)
+
+    _write(project, "Chapter_02.indd")
+    clock.now = 100.0
+    _scan(watcher)
+    assert archived == [project] and PROJECT in watcher.pending
+    clock.now = 160.0
+    _scan(watcher)
+    assert archived == [project, project]
+
+
+def test_badly_named_folders_are_ignored(tmp_path):
+    clock, archived = _Clock(), []
+    watcher = _watcher(tmp_path, archived, clock=clock)
+    _write(os.path.join(watcher.drop_folder, "scans from Tuesday"), "page_01.tif")
+    for clock.now in (0.0, 100.0):
+        _scan(watcher)
+    assert archived == [] and watcher.ignored == {"scans from Tuesday"}
+
+
+def test_polling_watcher_waits_for_a_folder_being_written_to(tmp_path):
+    archived_at = []
+    watcher = _watcher(tmp_path, [], settle_seconds=0.4, poll_interval=0.05)
+    watcher.archive = lambda path: archived_at.append(time.monotonic()) or True
+    project = os.path.join(watcher.drop_folder, PROJECT)
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    try:
+        for _chunk in range(8):
+            _write(project, "Chapter_01.indd")
+            last_write = time.monotonic()
+            time.sleep(0.1)
+        assert archived_at == []
+        deadline = time.monotonic() + 5
+        while not archived_at and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        watcher.stop()
+        thread.join(5)
+    assert len(archived_at) == 1
+    assert archived_at[0] - last_write >= watcher.settle_seconds
@@ -0,0 +1,76 @@
+import multiprocessing
+import os
+import threading
+import time
+
+from cnt.work_queue import WorkQueue, QueueWorker
+
+
+def _drain(db_path, log_path, worker_id):
+    # Runs in a separate process, like a --drain worker on another Mac
+    def archive(project):
+        with open(log_path, "a", encoding="utf-8") as log:
+            log.write(f"{project}\t{worker_id}\n")
+        time.sleep(0.02)
+        return {"success": True}
+
+    work_queue = WorkQueue(db_path, worker_id=worker_id)
+    QueueWorker(work_queue, archive).run()
+    work_queue.close()
+
+
+def test_workers_claim_every_job_exactly_once(tmp_path):
+    db_path = str(tmp_path / "queue.db")
+    log_path = str(tmp_path / "claims.log")
+    projects = [f"/Volumes/Production/{11000 + index}_S24_Book" for index in range(30)]
+    work_queue = WorkQueue(db_path)
+    assert work_queue.enqueue(projects) == len(projects)
+
+    workers = [multiprocessing.Process(target=_drain, args=(db_path, log_path, f"mac-{index}"))
+               for index in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    with open(log_path, encoding="utf-8") as log:
+        claims = [line.split("\t")[0] for line in log.read().splitlines()]
+    assert sorted(claims) == sorted(projects)
+    assert work_queue.counts() == {"queued": 0, "leased": 0, "done": len(projects), "failed": 0}
+    work_queue.close()
+
+
+def test_expired_lease_is_retried_by_another_worker(tmp_path):
+    db_path = str(tmp_path / "queue.db")
+    crashed = WorkQueue(db_path, lease_seconds=0.05, worker_id="crashed")
+    other = WorkQueue(db_path, lease_seconds=60, worker_id="other")
+    crashed.enqueue(["/Volumes/Production/11492_S24_Monroe_Color"])
+
+    first = crashed.claim()
+    assert first.attempts == 1
+    time.sleep(0.1)
+    second = other.claim()
+    assert second is not None and second.id == first.id and second.attempts == 2
+
+    # The crashed worker's late outcome is discarded and doesn't touch the new lease
+    enqueued_at = other._connection().execute("SELECT enqueued_at FROM jobs").fetchone()[0]
+    assert not crashed.complete(first, success=False, error="crashed")
+    row = other._connection().execute("SELECT status, worker, enqueued_at FROM jobs").fetchone()
+    assert row == ("leased", "other", enqueued_at)
+
+    assert other.complete(second, success=True)
+    assert other.counts()["done"] == 1
+    crashed.close()
+    other.close()
+
+
+def test_close_closes_every_thread_connection(tmp_path):
+    work_queue = WorkQueue(str(tmp_path / "queue.db"))
+    thread = threading.Thread(target=work_queue.counts)
+    thread.start()
+    thread.join()
+    assert len(work_queue._connections) == 2
+    work_queue.close()
+    assert work_queue._connections == []
+    assert os.path.exists(str(tmp_path / "queue.db"))
@@ -0,0 +1,34 @@
+from cnt.workers import WorkerPool, PackagingJob, FakeWorker
+
+
+def _jobs(tmp_path, count):
+    return [PackagingJob(str(tmp_path / f"chapter_{index}.indd"), folder_id="11492", project_name=str(tmp_path))
+            for index in range(count)]
+
+
+def _run(tmp_path, concurrency, count=12, fail=None):
+    pool = WorkerPool(lambda index: FakeWorker(f"fake-{index + 1}", min_seconds=0.05, fail=fail),
+                      concurrency=concurrency)
+    jobs = pool.run(_jobs(tmp_path, count))
+    return pool, jobs
+
+
+def test_every_job_is_packaged(tmp_path):
+    pool, jobs = _run(tmp_path, concurrency=3)
+    assert all(job.result["success"] for job in jobs)
+    assert sum(stats["jobs"] for stats in pool.worker_stats.values()) == len(jobs)
+
+
+def test_throughput_scales_with_concurrency(tmp_path):
+    single, _ = _run(tmp_path, concurrency=1)
+    parallel, _ = _run(tmp_path, concurrency=4)
+    # 12 jobs of 50 ms: ~0.6 s on one worker, ~0.15 s on four
+    assert parallel.seconds < single.seconds / 2
+    assert len(parallel.worker_stats) == 4
+
+
+def test_failed_job_is_retried_then_reported(tmp_path):
+    pool, jobs = _run(tmp_path, concurrency=2, count=4, fail=lambda job: job.path.endswith("chapter_0.indd"))
+    failed = [job for job in jobs if not job.result["success"]]
+    assert [job.attempts for job in failed] == [pool.max_attempts]
+    assert all(job.result["success"] for job in jobs if job not in failed)